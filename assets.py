@@ -0,0 +1,54 @@
+import hashlib
+import os
+import pygame
+
+# 缓存格式版本：改变存储格式或缩放算法时递增，旧缓存自动失效
+CACHE_VERSION = 1
+CACHE_DIR = ".asset_cache"
+
+
+class AssetCache:
+    """预缩放图片的磁盘缓存：键为源文件哈希+目标尺寸，命中时直接读取原始像素"""
+
+    def __init__(self, cache_dir=CACHE_DIR, enabled=True):
+        self.cache_dir = cache_dir
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+
+    def _cache_path(self, path, data, size):
+        digest = hashlib.sha1(data).hexdigest()[:16]
+        stem = os.path.splitext(os.path.basename(path))[0]
+        return os.path.join(self.cache_dir, f"v{CACHE_VERSION}-{stem}-{size[0]}x{size[1]}-{digest}.rgb")
+
+    def load_scaled(self, path, size):
+        """加载图片并缩放到 size，返回已转换为显示格式的表面"""
+        with open(path, "rb") as f:
+            data = f.read()
+        cache_path = self._cache_path(path, data, size) if self.enabled else None
+
+        if cache_path is not None and os.path.exists(cache_path):
+            with open(cache_path, "rb") as f:
+                pixels = f.read()
+            if len(pixels) == size[0] * size[1] * 3:
+                self.hits += 1
+                return pygame.image.frombuffer(pixels, size, "RGB").convert()
+
+        # 未命中：解码并平滑缩放，然后写入缓存
+        self.misses += 1
+        image = pygame.image.load(path).convert()
+        surface = pygame.transform.smoothscale(image, size)
+        if cache_path is not None:
+            self._store(cache_path, pygame.image.tostring(surface, "RGB"))
+        return surface
+
+    def _store(self, cache_path, pixels):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # 先写临时文件再原子替换，避免中断时留下半个缓存文件
+            tmp_path = cache_path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(pixels)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            pass
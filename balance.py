@@ -0,0 +1,310 @@
+import os
+import sys
+import ast
+import json
+import math
+import time
+import random
+import argparse
+import multiprocessing
+import numpy as np
+from simulation import Simulation, SimInput
+from trajectory import TrajectoryPreview
+from settings import FPS, FOOD_TYPES
+
+ENDING_TIMEOUT = "timeout"  # 达到最长时间仍未结束（其他结局见 simulation.ENDING_*）
+
+MONEY_SAMPLE_TICKS = FPS  # 金钱曲线每秒采样一次
+AIM_ANGLES = np.radians(np.arange(-85.0, 0.0, 0.5))  # 自动瞄准搜索的投掷角度（向右上方）
+
+
+class AutoPlayer:
+    """脚本化的自动玩家：优先服务耐心最少的顾客，巨人出现时朝巨人投掷
+
+    先切换到目标想要的食物框，下一tick再投掷；每次投掷后有一段反应时间，
+    并按 accuracy 的概率投准（投偏时在解出的角度上加随机误差）。
+    """
+
+    def __init__(self, seed, accuracy=0.85, reaction=(20, 40), aim_error=6.0):
+        self.rng = random.Random(seed)
+        self.accuracy = accuracy
+        self.reaction = reaction  # 两次投掷之间的间隔范围（tick）
+        self.aim_error = math.radians(aim_error)  # 投偏时的角度误差上限
+        self.preview = TrajectoryPreview()
+        self.cooldown = 0
+        self.in_flight = {}  # 顾客位置 -> (顾客serial, 预计命中的tick)，避免对同一顾客重复投掷
+        self._angles = {}  # (食物框, 目标矩形) -> 能命中的角度列表
+
+    def _target(self, sim):
+        """选出下一个投掷目标：(目标键, 顾客或巨人, 放大后的半宽, 半高)"""
+        giant = sim.giant_customer
+        if giant is not None:
+            return "giant", giant, giant.width//2 + 50, giant.height//2 + 50
+        best = None
+        for i, customer in enumerate(sim.customers):
+            if customer is None:
+                continue
+            pending = self.in_flight.get(i)
+            if pending is not None and pending[0] == customer.serial and pending[1] >= sim.tick_count:
+                continue
+            if best is None or customer.patience < best[1].patience:
+                best = (i, customer)
+        if best is None:
+            return None
+        customer = best[1]
+        return best[0], customer, customer.width//2 + 40, customer.height//2 + 40
+
+    def _hitting_angles(self, sim, box_rect):
+        """当前食物框能命中目标矩形的所有角度（结果按食物框和目标矩形缓存）"""
+        key = (sim.current_food_box, box_rect)
+        angles = self._angles.get(key)
+        if angles is None:
+            center_x, center_y, half_width, half_height = box_rect
+            start_x, start_y = sim.launch_point()
+            angles = []
+            for angle in AIM_ANGLES.tolist():
+                trajectory = self.preview.get(sim, (start_x + math.cos(angle) * 100,
+                                                    start_y + math.sin(angle) * 100))
+                inside = ((np.abs(trajectory.xs - center_x) < half_width)
+                          & (np.abs(trajectory.ys - center_y) < half_height))
+                if inside.any():
+                    angles.append(angle)
+            self._angles[key] = angles
+        return angles
+
+    def act(self, sim):
+        """根据当前局面给出这一tick的输入"""
+        if self.cooldown > 0:
+            self.cooldown -= 1
+            return SimInput()
+        target = self._target(sim)
+        if target is None:
+            return SimInput()
+        key, entity, half_width, half_height = target
+
+        # 先切换到想要的食物框（与玩家按数字键一样，下一tick再投）
+        lane = FOOD_TYPES.index(entity.desired_food)
+        if sim.current_food_box != lane:
+            return SimInput(lane=lane)
+
+        box_rect = (entity.x, entity.y - entity.height // 2, half_width, half_height)
+        angles = self._hitting_angles(sim, box_rect)
+        if not angles:
+            self.cooldown = self.rng.randint(*self.reaction)
+            return SimInput()
+        # 取能命中角度区间的中间值，投偏时加随机误差
+        angle = angles[len(angles) // 2]
+        if self.rng.random() >= self.accuracy:
+            angle += self.rng.uniform(-self.aim_error, self.aim_error)
+        start_x, start_y = sim.launch_point()
+        aim = (start_x + math.cos(angle) * 100, start_y + math.sin(angle) * 100)
+
+        hit = self.preview.predict_hit(sim, aim)
+        if key != "giant":
+            arrival = hit[2] if hit is not None else 0
+            self.in_flight[key] = (entity.serial, sim.tick_count + arrival)
+        self.cooldown = self.rng.randint(*self.reaction)
+        return SimInput(throws=[aim])
+
+
+def play_game(job):
+    """跑完一整局（在工作进程中执行），返回这一局的结果"""
+    index, seed, max_ticks, overrides, policy = job
+    sim = Simulation(seed=seed)
+    for name, value in overrides.items():
+        setattr(sim, name, value)
+    player = AutoPlayer(seed ^ 0x5EED, **policy)
+
+    money_curve = [sim.money]
+    while sim.running and sim.tick_count < max_ticks:
+        sim.step(player.act(sim))
+        if sim.tick_count % MONEY_SAMPLE_TICKS == 0:
+            money_curve.append(sim.money)
+
+    return {
+        "game": index,
+        "seed": seed,
+        "ending": ENDING_TIMEOUT if sim.running else sim.ending,
+        "ticks": sim.tick_count,
+        "seconds": sim.tick_count / FPS,
+        "score": sim.score,
+        "money": sim.money,
+        "max_combo": sim.max_combo,
+        "rating": sim.rating,
+        "money_curve": money_curve,
+    }
+
+
+def game_seeds(base_seed, games):
+    """由基础种子派生每局的种子：同一基础种子总是得到同一组对局"""
+    rng = random.Random(base_seed)
+    return [rng.getrandbits(32) for _ in range(games)]
+
+
+def _percentiles(values):
+    data = np.asarray(values, dtype=np.float64)
+    return {
+        "mean": float(data.mean()),
+        "std": float(data.std()),
+        "p5": float(np.percentile(data, 5)),
+        "p50": float(np.percentile(data, 50)),
+        "p95": float(np.percentile(data, 95)),
+    }
+
+
+METRICS = ("score", "max_combo", "seconds", "final_money")
+
+
+def aggregate(results):
+    """把逐局结果汇总成报告（与完成顺序无关）；没有结果时各项统计为None"""
+    results = sorted(results, key=lambda result: result["game"])
+    if not results:
+        report = {"games": 0, "endings": {}, "money_curve": {"mean": [], "survival": []}}
+        report.update((metric, None) for metric in METRICS)
+        return report
+    endings = {}
+    for result in results:
+        endings[result["ending"]] = endings.get(result["ending"], 0) + 1
+
+    # 金钱曲线：每秒仍在进行的对局的平均金钱，以及存活比例
+    longest = max(len(result["money_curve"]) for result in results)
+    curve_mean = []
+    survival = []
+    for second in range(longest):
+        values = [result["money_curve"][second] for result in results if second < len(result["money_curve"])]
+        curve_mean.append(sum(values) / len(values))
+        survival.append(len(values) / len(results))
+
+    return {
+        "games": len(results),
+        "endings": {name: {"count": count, "ratio": count / len(results)}
+                    for name, count in sorted(endings.items())},
+        "score": _percentiles([result["score"] for result in results]),
+        "max_combo": _percentiles([result["max_combo"] for result in results]),
+        "seconds": _percentiles([result["seconds"] for result in results]),
+        "final_money": _percentiles([result["money"] for result in results]),
+        "money_curve": {"mean": curve_mean, "survival": survival},
+    }
+
+
+def run_batch(games, base_seed=1, workers=None, max_ticks=FPS * 300, overrides=None,
+              policy=None, chunksize=4, on_result=None):
+    """把所有对局分发到进程池，结果按完成顺序逐个交给 on_result，最后返回汇总报告"""
+    overrides = overrides or {}
+    policy = policy or {}
+    workers = workers or os.cpu_count() or 1
+    jobs = [(i, seed, max_ticks, overrides, policy) for i, seed in enumerate(game_seeds(base_seed, games))]
+
+    start = time.perf_counter()
+    results = []
+    if workers == 1:
+        stream = map(play_game, jobs)
+        pool = None
+    else:
+        pool = multiprocessing.Pool(workers)
+        stream = pool.imap_unordered(play_game, jobs, chunksize=chunksize)
+    try:
+        for result in stream:
+            results.append(result)
+            if on_result is not None:
+                on_result(result)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    elapsed = time.perf_counter() - start
+
+    report = aggregate(results)
+    report["meta"] = {
+        "base_seed": base_seed,
+        "workers": workers,
+        "max_ticks": max_ticks,
+        "overrides": overrides,
+        "policy": policy,
+        "elapsed": elapsed,
+        "games_per_second": len(results) / elapsed if elapsed > 0 else 0.0,
+        "ticks_per_second": sum(result["ticks"] for result in results) / elapsed if elapsed > 0 else 0.0,
+    }
+    return report
+
+
+def positive_int(text):
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return value
+
+
+def parse_override(text):
+    """解析 --set name=value，只允许覆盖 Simulation 已有的数值属性"""
+    name, sep, value = text.partition("=")
+    if not sep:
+        raise argparse.ArgumentTypeError(f"expected name=value, got {text!r}")
+    try:
+        value = ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        raise argparse.ArgumentTypeError(f"{name}: not a number: {value!r}")
+    current = getattr(Simulation(seed=0), name, None)
+    if not isinstance(current, (int, float)) or isinstance(current, bool) or not isinstance(value, (int, float)):
+        raise argparse.ArgumentTypeError(f"{name}: not a tunable numeric Simulation attribute")
+    return name, value
+
+
+def print_report(report):
+    meta = report["meta"]
+    print(f"{report['games']} games on {meta['workers']} workers in {meta['elapsed']:.1f}s "
+          f"({meta['games_per_second']:.1f} games/s, {meta['ticks_per_second']:.0f} ticks/s)")
+    for name, ending in report["endings"].items():
+        print(f"  {name:<12}{ending['count']:>7}  {ending['ratio']:6.1%}")
+    if not report["games"]:
+        return
+    print(f"{'metric':<14}{'mean':>10}{'std':>10}{'p5':>10}{'p50':>10}{'p95':>10}")
+    for metric in METRICS:
+        stats = report[metric]
+        print(f"{metric:<14}{stats['mean']:>10.1f}{stats['std']:>10.1f}{stats['p5']:>10.1f}"
+              f"{stats['p50']:>10.1f}{stats['p95']:>10.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Food Flinger Monte Carlo balance runner (headless auto-play)")
+    parser.add_argument("--games", type=positive_int, default=1000)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=1, help="base seed; per-game seeds are derived from it")
+    parser.add_argument("--max-seconds", type=float, default=300, help="end a game as a timeout after this long")
+    parser.add_argument("--set", dest="overrides", type=parse_override, action="append", default=[],
+                        metavar="NAME=VALUE", help="override a Simulation attribute, e.g. throw_cost=4")
+    parser.add_argument("--accuracy", type=float, default=0.85, help="auto-player hit probability")
+    parser.add_argument("--reaction", type=int, nargs=2, default=(20, 40), metavar=("MIN", "MAX"),
+                        help="ticks between throws")
+    parser.add_argument("--chunksize", type=int, default=4)
+    parser.add_argument("--results", metavar="PATH", help="stream per-game results as JSONL")
+    parser.add_argument("--output", "-o", metavar="PATH", help="write the aggregate report as JSON")
+    args = parser.parse_args(argv)
+
+    policy = {"accuracy": args.accuracy, "reaction": tuple(args.reaction)}
+    results_file = open(args.results, "w") if args.results else None
+    done = [0]
+
+    def on_result(result):
+        done[0] += 1
+        if results_file is not None:
+            results_file.write(json.dumps(result) + "\n")
+        if done[0] % 100 == 0 or done[0] == args.games:
+            print(f"\r{done[0]}/{args.games} games", end="", file=sys.stderr, flush=True)
+
+    try:
+        report = run_batch(args.games, args.seed, args.workers, int(args.max_seconds * FPS),
+                           dict(args.overrides), policy, args.chunksize, on_result)
+    finally:
+        if results_file is not None:
+            results_file.close()
+    print(file=sys.stderr)
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
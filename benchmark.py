@@ -0,0 +1,301 @@
+import os
+import gc
+import sys
+import json
+import time
+import argparse
+import platform
+
+# 无窗口运行：必须在导入pygame之前设置
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import numpy as np
+import pygame
+import particles
+from main import Game, RENDER_MODES, seed_arg
+from settings import SCREEN_WIDTH, FOOD_CODES, FOOD_TYPES
+
+PHASES = ("handle_events", "update", "draw", "flip")
+FOREVER = 10**9  # 用作“永不过期”的计时器值
+
+
+def fill_customers(game):
+    """三个位置都站满顾客，并且永远不会失去耐心"""
+    sim = game.sim
+    for i in range(len(sim.customer_positions)):
+        if sim.customers[i] is None:
+            sim.customer_spawn_timer = 0
+            sim.spawn_customer()
+    for customer in sim.customers:
+        if customer is not None:
+            customer.patience = FOREVER
+
+
+def keep_alive(game):
+    """压测时不让对局因破产或差评结束"""
+    game.sim.money = 10**6
+    game.sim.rating = 5.0
+    game.sim.running = True
+
+
+def aim_at(sim, target_x, target_y):
+    """选中目标想要的食物对应的食物框，返回投掷瞄准点"""
+    box = sim.food_boxes[sim.current_food_box]
+    # 食物抛出后有重力，瞄准点抬高一些
+    return target_x, target_y - 0.35 * (target_x - box["x"])
+
+
+class Scenario:
+    def __init__(self, name, description, setup=None, before_frame=None):
+        self.name = name
+        self.description = description
+        self.setup = setup
+        self.before_frame = before_frame
+
+
+def setup_idle(game):
+    game.sim.customer_spawn_timer = FOREVER
+
+
+def frame_busy(game, frame):
+    keep_alive(game)
+    fill_customers(game)
+    if frame % 10 == 0:
+        sim = game.sim
+        slot = frame // 10 % len(sim.customers)
+        customer = sim.customers[slot]
+        if customer is not None:
+            sim.current_food_box = FOOD_TYPES.index(customer.desired_food)
+            game.input.push_throw(aim_at(sim, customer.x, customer.y - customer.height))
+
+
+def setup_giant(game):
+    game.sim.spawn_giant_customer()
+
+
+def frame_giant(game, frame):
+    keep_alive(game)
+    sim = game.sim
+    if sim.giant_customer is None:
+        sim.spawn_giant_customer()
+    giant = sim.giant_customer
+    giant.timer = FOREVER
+    giant.hits = 0
+    if frame % 6 == 0:
+        sim.current_food_box = FOOD_TYPES.index(giant.desired_food)
+        game.input.push_throw(aim_at(sim, giant.x, giant.y - giant.height))
+
+
+PARTICLE_BURST = 5000
+
+
+def frame_particles(game, frame):
+    keep_alive(game)
+    effects = game.sim.effects
+    missing = PARTICLE_BURST - len(effects)
+    if missing > 0:
+        rng = game.sim.effect_rng
+        kinds = rng.choice([particles.BILL, particles.ANGRY_EMOJI], missing)
+        effects.emit(rng.uniform(100, SCREEN_WIDTH - 100, missing), rng.uniform(100, 400, missing),
+                     dx=rng.uniform(-4, 4, missing), dy=rng.uniform(-9, -5, missing),
+                     life=rng.integers(30, 60, missing), kind=kinds, gravity=particles.GRAVITY,
+                     rotation=rng.uniform(0, 360, missing), spin=10)
+
+
+FOODS_IN_FLIGHT = 2000
+
+
+def frame_foods(game, frame):
+    keep_alive(game)
+    sim = game.sim
+    sim.customer_spawn_timer = FOREVER
+    foods = sim.thrown_foods
+    missing = FOODS_IN_FLIGHT - len(foods)
+    rng = sim.effect_rng
+    for _ in range(missing):
+        foods.spawn(rng.uniform(50, SCREEN_WIDTH - 50), rng.uniform(50, 300),
+                    rng.uniform(-3, 3), rng.uniform(-12, -4), FOOD_CODES[FOOD_TYPES[int(rng.integers(3))]])
+
+
+CROWD_ROWS = 4
+CROWD_COLS = 10
+
+
+def setup_crowd(game):
+    """把顾客位置扩展成 4x10 的网格（40个位置）"""
+    sim = game.sim
+    sim.customer_positions = [{"x": 660 + col * 55, "y": 300 + row * 90}
+                              for row in range(CROWD_ROWS) for col in range(CROWD_COLS)]
+    sim.customers = [None] * len(sim.customer_positions)
+
+
+def frame_crowd(game, frame):
+    keep_alive(game)
+    fill_customers(game)
+    sim = game.sim
+    sim.dismiss_giant()
+    slot = frame % len(sim.customers)
+    customer = sim.customers[slot]
+    if customer is not None:
+        sim.current_food_box = FOOD_TYPES.index(customer.desired_food)
+        game.input.push_throw(aim_at(sim, customer.x, customer.y - customer.height))
+    frame_foods(game, frame)
+
+
+SCENARIOS = [
+    Scenario("idle", "empty shop, no customers", setup=setup_idle),
+    Scenario("busy", "three customers served continuously", before_frame=frame_busy),
+    Scenario("giant", "giant bonus fight with rapid throws", setup=setup_giant, before_frame=frame_giant),
+    Scenario("particles_5k", "5k-particle effect burst kept alive", before_frame=frame_particles),
+    Scenario("foods_2k", "2k thrown foods in flight", before_frame=frame_foods),
+    Scenario("crowd", "40 customer slots with 2k foods in flight", setup=setup_crowd, before_frame=frame_crowd),
+]
+
+
+def summarize(samples):
+    data = np.asarray(samples) * 1000.0
+    return {
+        "mean_ms": float(data.mean()),
+        "p95_ms": float(np.percentile(data, 95)),
+        "p99_ms": float(np.percentile(data, 99)),
+        "max_ms": float(data.max()),
+    }
+
+
+def run_scenario(scenario, frames, warmup, seed, render_mode=RENDER_MODES[0]):
+    game = Game(seed=seed, scores_path=":memory:")  # 不写入玩家的成绩库
+    try:
+        game.set_render_mode(render_mode)
+        if scenario.setup is not None:
+            scenario.setup(game)
+        timings = {phase: [] for phase in PHASES}
+        clock = time.perf_counter
+        for frame in range(warmup + frames):
+            if scenario.before_frame is not None:
+                scenario.before_frame(game, frame)
+
+            t0 = clock()
+            game.handle_events()
+            t1 = clock()
+            game.update()
+            t2 = clock()
+            game.draw(present=False)
+            t3 = clock()
+            game.present()
+            t4 = clock()
+
+            if frame >= warmup:
+                timings["handle_events"].append(t1 - t0)
+                timings["update"].append(t2 - t1)
+                timings["draw"].append(t3 - t2)
+                timings["flip"].append(t4 - t3)
+        entities = {
+            "thrown_foods": len(game.sim.thrown_foods),
+            "effects": len(game.sim.effects),
+            "customers": sum(1 for c in game.sim.customers if c is not None),
+        }
+    finally:
+        # 每个场景结束后拆掉整个游戏（成绩库线程、GC回调、冻结的对象），后面的场景不受前面的影响
+        game.shutdown()
+        gc.unfreeze()
+
+    total = [sum(phase) for phase in zip(*(timings[p] for p in PHASES))]
+    result = {phase: summarize(timings[phase]) for phase in PHASES}
+    result["frame"] = summarize(total)
+    result["entities"] = entities
+    return result
+
+
+def run_suite(names=None, frames=600, warmup=60, seed=1, render_mode=RENDER_MODES[0]):
+    results = {}
+    for scenario in SCENARIOS:
+        if names and scenario.name not in names:
+            continue
+        results[scenario.name] = run_scenario(scenario, frames, warmup, seed, render_mode)
+    return {
+        "meta": {
+            "frames": frames,
+            "warmup": warmup,
+            "seed": seed,
+            "render_mode": render_mode,
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "platform": platform.platform(),
+            "video_driver": os.environ.get("SDL_VIDEODRIVER"),
+        },
+        "scenarios": results,
+    }
+
+
+def compare(report, baseline, threshold):
+    """与基线比较，返回回归列表（mean或p95变慢超过阈值）"""
+    regressions = []
+    for name, result in report["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if base is None:
+            continue
+        for phase in PHASES + ("frame",):
+            for metric in ("mean_ms", "p95_ms"):
+                old = base.get(phase, {}).get(metric)
+                new = result[phase][metric]
+                # 极小的数值（<0.05ms）噪声太大，不参与比较
+                if old is None or max(old, new) < 0.05:
+                    continue
+                if new > old * (1 + threshold):
+                    regressions.append((name, phase, metric, old, new))
+    return regressions
+
+
+def print_report(report):
+    print(f"{'scenario':<14}{'phase':<15}{'mean':>9}{'p95':>9}{'p99':>9}")
+    for name, result in report["scenarios"].items():
+        for phase in PHASES + ("frame",):
+            stats = result[phase]
+            print(f"{name:<14}{phase:<15}{stats['mean_ms']:>9.3f}{stats['p95_ms']:>9.3f}{stats['p99_ms']:>9.3f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Food Flinger scenario benchmarks (per-frame times in ms)")
+    parser.add_argument("scenarios", nargs="*", help="scenarios to run (default: all)")
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--warmup", type=int, default=60)
+    parser.add_argument("--seed", type=seed_arg, default=1)
+    parser.add_argument("--output", "-o", metavar="PATH", help="write results as JSON")
+    parser.add_argument("--compare", metavar="BASELINE", help="flag regressions against a stored JSON baseline")
+    parser.add_argument("--threshold", type=float, default=0.15, help="allowed slowdown ratio (default 0.15)")
+    parser.add_argument("--render", choices=RENDER_MODES, default=RENDER_MODES[0],
+                        help="render mode to measure (default: full)")
+    parser.add_argument("--list", action="store_true", help="list scenarios and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for scenario in SCENARIOS:
+            print(f"{scenario.name:<14}{scenario.description}")
+        return 0
+
+    # 资源路径相对于游戏目录
+    output = os.path.abspath(args.output) if args.output else None
+    baseline_path = os.path.abspath(args.compare) if args.compare else None
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+    report = run_suite(args.scenarios, args.frames, args.warmup, args.seed, args.render)
+    print_report(report)
+    if output:
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if baseline_path:
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        for name, phase, metric, old, new in regressions:
+            print(f"REGRESSION {name}/{phase} {metric}: {old:.3f} -> {new:.3f} ms")
+        if regressions:
+            return 1
+        print("No regressions.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,218 @@
+import os
+import json
+import time
+import queue
+import threading
+import numpy as np
+import pygame
+
+CAPTURE_DIR = "captures"
+CAPTURE_FPS = 30
+FORMATS = ("raw", "png")
+
+# 32位显示表面的像素布局（小端）对应的 ffmpeg 像素格式
+_PIXEL_FORMATS = {
+    (0xFF0000, 0x00FF00, 0x0000FF): "bgr0",
+    (0x0000FF, 0x00FF00, 0xFF0000): "rgb0",
+}
+
+_STOP = object()
+
+
+def pixel_format(surface):
+    """表面像素在内存中的 ffmpeg 格式名；不是32位RGB时为None"""
+    if surface.get_bytesize() != 4:
+        return None
+    return _PIXEL_FORMATS.get(tuple(surface.get_masks()[:3]))
+
+
+class FrameRing:
+    """预分配的帧环形缓冲：每帧把显示表面的像素整块拷贝进下一个槽位
+
+    帧按序号 seq 递增编号，存放在 seq % capacity 号槽位。
+    写出线程正在读取的序号区间 [pinned_from, pinned_to) 不能被覆盖，
+    轮到这些槽位时新帧直接丢弃（帧循环从不等待写出线程）。
+    """
+
+    def __init__(self, surface, capacity):
+        self.surface = surface
+        self.width, self.height = surface.get_size()
+        self.pitch = surface.get_pitch()
+        self.capacity = capacity
+        # 一次性分配并写满，避免游戏中第一次写入各个页面时缺页
+        self.frames = np.empty((capacity, self.height, self.pitch), dtype=np.uint8)
+        self.frames.fill(0)
+        self.times = np.zeros(capacity)
+        self.seq = 0  # 下一帧的序号
+        self.pinned_from = 0  # 写出线程按顺序推进 pinned_from，主线程只设置新的区间
+        self.pinned_to = 0
+        self.dropped = 0
+
+    @property
+    def nbytes(self):
+        return self.frames.nbytes
+
+    def __len__(self):
+        return min(self.seq, self.capacity)
+
+    def grab(self, now):
+        """拷贝一帧（一次memcpy）；槽位还在被写出时丢弃这一帧，返回是否拷贝了"""
+        seq = self.seq
+        if self.pinned_from <= seq - self.capacity < self.pinned_to:
+            self.dropped += 1
+            return False
+        slot = seq % self.capacity
+        # 直接访问表面的像素内存（不拷贝），用完立即释放以解除表面锁定
+        pixels = self.surface.get_buffer()
+        np.copyto(self.frames[slot].reshape(-1), np.frombuffer(pixels, dtype=np.uint8))
+        del pixels
+        self.times[slot] = now
+        self.seq = seq + 1
+        return True
+
+    def pin(self, count):
+        """锁定最近的 count 帧交给写出线程，返回序号区间"""
+        start = max(0, self.seq - min(count, self.capacity))
+        self.pinned_from = start
+        self.pinned_to = self.seq
+        return start, self.seq
+
+    def frame(self, seq):
+        """序号 seq 的像素（去掉行尾的对齐字节）和抓取时刻"""
+        slot = seq % self.capacity
+        return self.frames[slot, :, :self.width * 4], self.times[slot]
+
+    def release(self, seq):
+        """写出线程写完了 seq 之前的帧"""
+        self.pinned_from = seq
+
+
+class VideoCapture:
+    """游戏录像：帧循环每帧只往环形缓冲拷贝一次画面，“保存最近N秒”由后台线程写盘
+
+    - grab() 在画面推送之后调用，按 fps 限速，超过一帧的开销只有一次memcpy
+    - save() 锁定最近 seconds 秒的帧交给写出线程，立即返回片段目录
+    - 缓冲比保存的长度多 headroom 秒，写出期间帧循环先往这些空槽位里写；
+      写出线程跟不上时新帧被丢弃并计数，不会阻塞帧循环
+    - raw 格式写一个原始像素文件（附带 ffmpeg 合成命令），png 格式写逐帧图片
+    """
+
+    def __init__(self, surface, seconds, fps=CAPTURE_FPS, fmt="raw", directory=CAPTURE_DIR, headroom=1.0):
+        if fmt not in FORMATS:
+            raise ValueError(f"unknown capture format: {fmt}")
+        self.pixel_format = pixel_format(surface)
+        if self.pixel_format is None:
+            raise ValueError("video capture needs a 32-bit RGB display surface")
+        self.fps = fps
+        self.interval = 1.0 / fps
+        self.fmt = fmt
+        self.directory = directory
+        self.window = max(1, round(seconds * fps))  # save() 保存的帧数
+        self.ring = FrameRing(surface, self.window + max(1, round(headroom * fps)))
+        self._next_grab = 0.0
+        self._queue = queue.SimpleQueue()
+        self.saving = None  # 正在写出的片段目录
+        self.saved = 0
+        self.last_clip = None
+        self.error = None  # 写出线程遇到的最后一个错误（写盘失败不影响游戏）
+        self._thread = threading.Thread(target=self._run, name="video-capture", daemon=True)
+        self._thread.start()
+
+    def grab(self, now=None):
+        """帧推送之后调用：到了下一个采样时刻就拷贝当前画面"""
+        now = time.perf_counter() if now is None else now
+        if now < self._next_grab:
+            return False
+        # 帧率低于采样率时不补帧，从当前时刻重新计时
+        self._next_grab = max(self._next_grab + self.interval, now)
+        return self.ring.grab(now)
+
+    def save(self):
+        """保存最近的帧（非阻塞）；上一个片段还没写完时返回None"""
+        if self.saving is not None or len(self.ring) == 0:
+            return None
+        path = base = os.path.join(self.directory, time.strftime("clip-%Y%m%d-%H%M%S"))
+        suffix = 1
+        while os.path.exists(path):
+            suffix += 1
+            path = f"{base}-{suffix}"
+        start, end = self.ring.pin(self.window)
+        self.saving = path
+        self._queue.put((path, start, end))
+        return path
+
+    def stats(self):
+        ring = self.ring
+        return {
+            "frames": len(ring),
+            "seconds": len(ring) / self.fps,
+            "buffer_mb": ring.nbytes / 2 ** 20,
+            "dropped": ring.dropped,
+            "saving": self.saving,
+            "saved": self.saved,
+        }
+
+    def close(self, timeout=30.0):
+        """写完正在保存的片段后结束写出线程"""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is _STOP:
+                break
+            path, start, end = job
+            try:
+                self._write_clip(path, start, end)
+                self.last_clip = path
+            except (OSError, pygame.error) as e:
+                self.error = e
+            finally:
+                self.ring.release(end)
+                self.saved += 1
+                self.saving = None
+
+    def _write_clip(self, path, start, end):
+        ring = self.ring
+        os.makedirs(path, exist_ok=True)
+        times = []
+        if self.fmt == "raw":
+            with open(os.path.join(path, "frames.raw"), "wb") as f:
+                for seq in range(start, end):
+                    pixels, t = ring.frame(seq)
+                    f.write(np.ascontiguousarray(pixels))
+                    times.append(t)
+                    ring.release(seq + 1)  # 写完一帧就让出它的槽位
+        else:
+            scratch = pygame.Surface((ring.width, ring.height), 0, ring.surface)
+            for seq in range(start, end):
+                pixels, t = ring.frame(seq)
+                target = scratch.get_buffer()
+                view = np.frombuffer(target, dtype=np.uint8).reshape(ring.height, scratch.get_pitch())
+                view[:, :ring.width * 4] = pixels
+                del view, target
+                ring.release(seq + 1)
+                pygame.image.save(scratch, os.path.join(path, f"frame_{seq - start:05d}.png"))
+                times.append(t)
+
+        info = {
+            "format": self.fmt,
+            "width": ring.width,
+            "height": ring.height,
+            "fps": self.fps,
+            "frames": len(times),
+            "duration": times[-1] - times[0] + self.interval if times else 0.0,
+            "dropped_total": ring.dropped,
+            "timestamps": [t - times[0] for t in times],
+        }
+        if self.fmt == "raw":
+            info["pixel_format"] = self.pixel_format
+            info["ffmpeg"] = (f"ffmpeg -f rawvideo -pixel_format {self.pixel_format} "
+                              f"-video_size {ring.width}x{ring.height} -framerate {self.fps} "
+                              f"-i frames.raw -pix_fmt yuv420p clip.mp4")
+        else:
+            info["ffmpeg"] = f"ffmpeg -framerate {self.fps} -i frame_%05d.png -pix_fmt yuv420p clip.mp4"
+        with open(os.path.join(path, "info.json"), "w") as f:
+            json.dump(info, f, indent=2)
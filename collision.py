@@ -0,0 +1,134 @@
+import numpy as np
+from settings import SCREEN_WIDTH, SCREEN_HEIGHT
+
+CELL_SIZE = 64
+
+
+class CollisionSystem:
+    """投掷食物与顾客/巨人的碰撞检测：均匀网格空间哈希做粗筛
+
+    - 食物：每个槽位记录所在格子，每个tick只更新换了格子的槽位
+    - 目标：按包围盒登记到覆盖的格子里，目标集合变化时才重建
+    - 检测：每个食物只和自己格子里的目标配对，一次向量化遍历得到所有命中对
+    """
+
+    def __init__(self, pool, cell_size=CELL_SIZE, width=SCREEN_WIDTH, height=SCREEN_HEIGHT):
+        self.pool = pool
+        self.cell_size = cell_size
+        self.cols = -(-width // cell_size)
+        # 屏幕上方（y<0）的食物统一放在第-1行，屏幕下方的食物已被剔除
+        self.rows = -(-height // cell_size)
+        self.cell_of = np.full(pool.capacity, -1, dtype=np.int64)  # 每个槽位所在的格子（-1表示不在网格中）
+        self._tracked = 0  # 网格覆盖过的最高槽位+1
+        self._targets_key = None
+        self._target_grid = None
+        self.moves = 0  # 统计：增量更新中换了格子的食物数
+        self.target_rebuilds = 0  # 统计：目标网格重建次数
+
+    def _cell_range(self, center_x, center_y, half_width, half_height):
+        size = self.cell_size
+        x0 = max(0, int((center_x - half_width) // size))
+        x1 = min(self.cols - 1, int((center_x + half_width) // size))
+        y0 = max(-1, int((center_y - half_height) // size))
+        y1 = min(self.rows, int((center_y + half_height) // size))
+        return x0, x1, y0, y1
+
+    def sync(self):
+        """增量更新食物所在格子：只写入换了格子、新出现或已消失的槽位"""
+        pool = self.pool
+        n = max(pool.high, self._tracked)
+        self._tracked = pool.high
+        if n == 0:
+            return
+        alive = pool.alive[:n]
+        cells = np.full(n, -1, dtype=np.int64)
+        # 用 minimum/maximum 代替 np.clip（小数组上 np.clip 的固定开销更大）
+        cx = np.minimum(np.maximum(pool.x[:n][alive] // self.cell_size, 0), self.cols - 1).astype(np.int64)
+        cy = np.minimum(np.maximum(pool.y[:n][alive] // self.cell_size, -1), self.rows).astype(np.int64)
+        cells[alive] = (cy + 1) * self.cols + cx
+
+        changed = np.flatnonzero(cells != self.cell_of[:n])
+        if changed.size:
+            self.cell_of[changed] = cells[changed]
+            self.moves += changed.size
+
+    def _build_target_grid(self, targets):
+        """把目标登记到覆盖的格子：返回按格子排序的 (起点, 数量, 目标下标) 表和目标参数数组"""
+        n_cells = (self.rows + 2) * self.cols
+        cell_ids = []
+        target_ids = []
+        for index, (_, center_x, center_y, half_width, half_height, _) in enumerate(targets):
+            x0, x1, y0, y1 = self._cell_range(center_x, center_y, half_width, half_height)
+            for cy in range(y0, y1 + 1):
+                row = (cy + 1) * self.cols
+                for cx in range(x0, x1 + 1):
+                    cell_ids.append(row + cx)
+                    target_ids.append(index)
+        cell_ids = np.asarray(cell_ids, dtype=np.int64)
+        order = np.argsort(cell_ids, kind="stable")
+        counts = np.bincount(cell_ids, minlength=n_cells)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+        params = np.array([target[1:5] for target in targets], dtype=np.float64)
+        foods = np.array([-1 if target[5] is None else target[5] for target in targets], dtype=np.int64)
+        self.target_rebuilds += 1
+        return starts, counts, np.asarray(target_ids, dtype=np.int64)[order], params, foods
+
+    def find_hits(self, targets):
+        """一次遍历算出所有命中对
+
+        targets 为 [(目标键, 中心x, 中心y, 半宽, 半高, 食物编号或None), ...]，按检测顺序排列。
+        每个目标接住范围内最早投出的（匹配的）食物，同一个食物只会被一个目标接住。
+        返回 [(槽位, 目标键), ...]。
+        """
+        if not targets:
+            return []
+        key = tuple(targets)
+        if key != self._targets_key:
+            self._targets_key = key
+            self._target_grid = self._build_target_grid(targets)
+        starts, counts, entries, params, target_foods = self._target_grid
+
+        # 粗筛：每个食物只与所在格子里的目标配对
+        pool = self.pool
+        slots = np.flatnonzero(self.cell_of[:self._tracked] >= 0)
+        if slots.size == 0:
+            return []
+        cells = self.cell_of[slots]
+        per_food = counts[cells]
+        total = int(per_food.sum())
+        if total == 0:
+            return []
+        food_slots = np.repeat(slots, per_food)
+        first = np.repeat(starts[cells], per_food)
+        offsets = np.arange(total) - np.repeat(np.cumsum(per_food) - per_food, per_food)
+        target_index = entries[first + offsets]
+
+        # 精确检测：放大后的矩形范围 + 目标想要的食物（-1表示任何食物）
+        p = params[target_index]
+        wanted = target_foods[target_index]
+        inside = (pool.alive[food_slots]
+                  & (np.abs(pool.x[food_slots] - p[:, 0]) < p[:, 2])
+                  & (np.abs(pool.y[food_slots] - p[:, 1]) < p[:, 3])
+                  & ((wanted < 0) | (pool.food[food_slots] == wanted)))
+        if not inside.any():
+            return []
+        food_slots = food_slots[inside]
+        target_index = target_index[inside]
+
+        # 按目标顺序、投出先后依次分配，已被前面目标接住的食物跳过
+        order = np.lexsort((pool.seq[food_slots], target_index))
+        taken = set()
+        served = set()
+        hits = []
+        for slot, index in zip(food_slots[order].tolist(), target_index[order].tolist()):
+            if index in served or slot in taken:
+                continue
+            served.add(index)
+            taken.add(slot)
+            hits.append((slot, targets[index][0]))
+        return hits
+
+    def clear(self):
+        self.cell_of[:] = -1
+        self._tracked = 0
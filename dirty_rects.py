@@ -0,0 +1,111 @@
+import pygame
+
+MAX_RECTS = 400  # 一帧的脏矩形超过这个数量时改为整屏刷新
+MAX_AREA_RATIO = 0.5  # 合并后的面积超过整屏的这个比例时改为整屏刷新
+
+
+def merge_rects(rects, screen_rect):
+    """把互相重叠的矩形合并成它们的包围矩形（裁剪到屏幕内，去掉空矩形），合并后的矩形两两不重叠"""
+    merged = []
+    for rect in rects:
+        rect = rect.clip(screen_rect)
+        if not (rect.width and rect.height):
+            continue
+        i = rect.collidelist(merged)
+        while i >= 0:
+            rect.union_ip(merged.pop(i))
+            i = rect.collidelist(merged)
+        merged.append(rect)
+    return merged
+
+
+class DirtyRectRenderer:
+    """脏矩形渲染：只恢复和推送上一帧与本帧实际绘制过的区域
+
+    重叠的矩形先合并再推送；矩形太多或合并后面积太大时，这一帧退回整屏背景加 flip()
+    （这时逐块推送比整屏刷新更慢）
+    """
+
+    def __init__(self, background, enabled=False, max_rects=MAX_RECTS, max_area_ratio=MAX_AREA_RATIO):
+        self.background = background
+        self.enabled = enabled
+        self.max_rects = max_rects
+        self.max_area_ratio = max_area_ratio
+        self.screen_rect = background.get_rect()
+        self._previous = []  # 上一帧绘制过的矩形
+        self._current = []  # 本帧绘制过的矩形
+        self._full_redraw = True
+        self._full_frame = False  # 本帧画了整屏背景，推送时直接 flip()
+        # 统计：本帧推送的像素数
+        self.pixels_pushed = 0
+        self.rects_pushed = 0
+        self.fell_back = False  # 本帧是否因为脏区域太多而退回整屏刷新
+        self.fallback_frames = 0
+
+    def set_enabled(self, enabled):
+        """运行时切换模式；切换后第一帧总是整屏刷新"""
+        self.enabled = enabled
+        self._full_redraw = True
+
+    def invalidate(self):
+        """下一帧整屏重画（屏幕被其他场景覆盖过之后调用）"""
+        self._full_redraw = True
+        self._previous = []
+
+    def toggle(self):
+        self.set_enabled(not self.enabled)
+
+    def begin_frame(self, screen):
+        """开始一帧：整屏模式画满背景，脏矩形模式只擦除上一帧的区域"""
+        self._current = []
+        self.fell_back = False
+        restore = None
+        if self.enabled and not self._full_redraw:
+            restore = self._merged(self._previous)
+            self.fell_back = restore is None
+        self._full_frame = restore is None
+        if restore is None:
+            screen.blit(self.background, (0, 0))
+        else:
+            for rect in restore:
+                screen.blit(self.background, rect, rect)
+
+    def mark(self, rect):
+        """记录一个绘制调用返回的包围矩形"""
+        if self.enabled:
+            self._current.append(rect)
+        return rect
+
+    def present(self):
+        """把本帧结果推送到屏幕"""
+        rects = None
+        if not self._full_frame:
+            # 旧位置需要擦除，新位置需要显示，两者都要推送
+            rects = self._merged(self._previous + self._current)
+            self.fell_back = rects is None
+        if rects is None:
+            pygame.display.flip()
+            self.pixels_pushed = self.screen_rect.width * self.screen_rect.height
+            self.rects_pushed = 1
+            self._full_redraw = False
+        else:
+            pygame.display.update(rects)
+            self.pixels_pushed = sum(rect.width * rect.height for rect in rects)
+            self.rects_pushed = len(rects)
+        if self.fell_back:
+            self.fallback_frames += 1
+        self._previous = self._current
+
+    def _merged(self, rects):
+        """合并后的脏矩形；超过数量或面积上限（应当整屏刷新）时返回None"""
+        if len(rects) > self.max_rects:
+            return None
+        merged = merge_rects(rects, self.screen_rect)
+        screen_area = self.screen_rect.width * self.screen_rect.height
+        if sum(rect.width * rect.height for rect in merged) > self.max_area_ratio * screen_area:
+            return None
+        return merged
+
+    def bandwidth_ratio(self):
+        """本帧推送像素占整屏像素的比例"""
+        return self.pixels_pushed / float(self.screen_rect.width * self.screen_rect.height)
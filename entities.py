@@ -0,0 +1,87 @@
+class Customer:
+    """普通顾客（固定字段，用 __slots__ 代替字典）"""
+
+    __slots__ = ("serial", "x", "y", "width", "height", "desired_food", "color", "patience_timer")
+
+    def __init__(self, x, y, width, height, desired_food, color):
+        self.reset(x, y, width, height, desired_food, color)
+
+    def reset(self, x, y, width, height, desired_food, color):
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.desired_food = desired_food
+        self.color = color
+        self.patience_timer = None  # 由模拟在调度器里登记
+
+    @property
+    def patience(self):
+        """剩余耐心（tick），由耐心计时器算出"""
+        return self.patience_timer.remaining()
+
+    @patience.setter
+    def patience(self, value):
+        self.patience_timer = self.patience_timer.scheduler.reschedule(self.patience_timer, value)
+
+
+class GiantCustomer:
+    """巨人顾客：有存在时间和被击中次数"""
+
+    __slots__ = ("serial", "x", "y", "width", "height", "color", "leave_timer", "hits", "desired_food")
+
+    def __init__(self, x, y, width, height, color, desired_food):
+        self.reset(x, y, width, height, color, desired_food)
+
+    def reset(self, x, y, width, height, color, desired_food):
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.color = color
+        self.leave_timer = None  # 由模拟在调度器里登记
+        self.hits = 0
+        self.desired_food = desired_food
+
+    @property
+    def timer(self):
+        """剩余存在时间（tick），由离开计时器算出"""
+        return self.leave_timer.remaining()
+
+    @timer.setter
+    def timer(self, value):
+        self.leave_timer = self.leave_timer.scheduler.reschedule(self.leave_timer, value)
+
+
+class EntityPool:
+    """空闲链表对象池：release() 回收的实体在下一次 acquire() 时用 reset() 重新初始化，不再重新分配
+
+    对象会被重用，所以要区分“同一个顾客”时比较 serial（每次 acquire 递增）而不是对象本身
+    """
+
+    def __init__(self, cls):
+        self.cls = cls
+        self._free = []
+        self._next_serial = 0
+        self.allocated = 0  # 实际创建过的实体数
+        self.reused = 0
+
+    def acquire(self, *fields):
+        free = self._free
+        if free:
+            entity = free.pop()
+            entity.reset(*fields)
+            self.reused += 1
+        else:
+            entity = self.cls(*fields)
+            self.allocated += 1
+        entity.serial = self._next_serial
+        self._next_serial += 1
+        return entity
+
+    def release(self, entity):
+        """实体离场后放回空闲链表（调用方不能再持有它）"""
+        self._free.append(entity)
+
+    def __len__(self):
+        return len(self._free)
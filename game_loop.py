@@ -0,0 +1,224 @@
+import time
+import queue
+import threading
+from collections import deque
+from settings import FPS
+from snapshot import SimSnapshot
+from input_pipeline import take_tick_actions
+
+
+class FixedTimestep:
+    """固定步长累加器：模拟按固定频率tick，渲染频率随显示能力变化
+
+    负载过高时一帧内会连续跑多个tick（相当于跳过渲染），但从不丢弃tick。
+    """
+
+    def __init__(self, tick_rate=FPS, max_ticks_per_frame=5, max_lag=5.0, history=240,
+                 clock=time.perf_counter):
+        self.tick_rate = tick_rate
+        self.dt = 1.0 / tick_rate
+        self.max_ticks_per_frame = max_ticks_per_frame  # 强制渲染前最多连续跑几个tick
+        self.max_lag = max_lag  # 积压超过这个秒数（例如窗口被拖动、系统休眠）时丢弃多余时间
+        self.clock = clock
+        self.accumulator = 0.0
+        self._last = None
+
+        # 统计
+        self.frame_times = deque(maxlen=history)  # 最近每帧的真实耗时（秒）
+        self.ticks_per_frame = deque(maxlen=history)
+        self.total_ticks = 0
+        self.total_frames = 0
+        self.skipped_renders = 0  # 因负载过高而省略的渲染次数
+        self.dropped_time = 0.0  # 超过 max_lag 被丢弃的时间（秒）
+
+    def reset(self):
+        self.accumulator = 0.0
+        self._last = None
+
+    def advance(self):
+        """开始新的一帧，返回本帧应运行的tick数"""
+        now = self.clock()
+        if self._last is None:
+            frame_time = self.dt
+        else:
+            frame_time = now - self._last
+        self._last = now
+        self.frame_times.append(frame_time)
+
+        self.accumulator += frame_time
+        if self.accumulator > self.max_lag:
+            self.dropped_time += self.accumulator - self.max_lag
+            self.accumulator = self.max_lag
+
+        ticks = min(int(self.accumulator / self.dt), self.max_ticks_per_frame)
+        self.accumulator -= ticks * self.dt
+        if ticks > 1:
+            self.skipped_renders += ticks - 1
+        self.ticks_per_frame.append(ticks)
+        self.total_ticks += ticks
+        self.total_frames += 1
+        return ticks
+
+    def alpha(self):
+        """渲染插值系数：当前时间位于上一tick和下一tick之间的位置"""
+        return min(1.0, self.accumulator / self.dt)
+
+    def tick_lag(self):
+        """尚未模拟的积压时间（以tick为单位）"""
+        return self.accumulator / self.dt
+
+    def stats(self):
+        frame_times = self.frame_times
+        mean_frame = sum(frame_times) / len(frame_times) if frame_times else 0.0
+        ticks = self.ticks_per_frame
+        return {
+            "fps": 1.0 / mean_frame if mean_frame > 0 else 0.0,
+            "mean_frame_ms": mean_frame * 1000,
+            "max_frame_ms": max(frame_times) * 1000 if frame_times else 0.0,
+            "ticks_per_frame": sum(ticks) / len(ticks) if ticks else 0.0,
+            "tick_lag": self.tick_lag(),
+            "skipped_renders": self.skipped_renders,
+            "dropped_time": self.dropped_time,
+            "total_ticks": self.total_ticks,
+            "total_frames": self.total_frames,
+        }
+
+
+class SimulationThread:
+    """在工作线程里按固定频率运行模拟，每个tick结束时发布一个不可变快照
+
+    - 主线程通过 submit() 把输入动作放进线程安全的队列，工作线程每个tick按原有规则取出
+    - 发布快照只是一次引用赋值，渲染时用 latest() 取最新的快照，热路径上不加锁；
+      同时存在的最多三份（工作线程正在构建的、最新发布的、主线程正在画的），相当于三缓冲
+    - 已应用的动作和每个tick的耗时经由队列交回主线程，用于统计输入延迟和分析
+    """
+
+    def __init__(self, sim, to_input, on_step=None, on_publish=None, tick_rate=FPS, max_lag=0.25, history=240,
+                 clock=time.perf_counter):
+        self.sim = sim  # 启动后只有工作线程可以访问
+        self.to_input = to_input  # (sim, actions, aim) -> SimInput
+        self.on_step = on_step  # 每个tick应用的输入（例如录像），在工作线程调用
+        self.on_publish = on_publish  # 每个发布的快照（例如观战广播），在工作线程调用
+        self.tick_rate = tick_rate
+        self.dt = 1.0 / tick_rate
+        self.max_lag = max_lag  # 落后超过这个秒数时不再追赶
+        self.clock = clock
+        self._inputs = queue.SimpleQueue()  # 主线程 -> 工作线程：(动作列表, 瞄准点)
+        self._applied = queue.SimpleQueue()  # 工作线程 -> 主线程：(tick, 动作列表)
+        self._tick_times = queue.SimpleQueue()  # 工作线程 -> 主线程：每个tick的耗时
+        self._pending = deque()
+        self._waiting = []  # 已应用但还没画出来的动作（只在主线程访问）
+        self._aim = None
+        self._latest = SimSnapshot(sim, clock())
+        self._stop = threading.Event()
+        self._thread = None
+
+        # 统计（工作线程写，主线程只读）
+        self.tick_times = deque(maxlen=history)
+        self.total_ticks = 0
+        self.dropped_time = 0.0
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """开始（或在暂停后继续）运行；暂停前排队的输入被丢弃"""
+        if self.running:
+            return
+        while not self._inputs.empty():
+            self._inputs.get_nowait()
+        self._pending.clear()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="simulation", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止并等待工作线程退出，之后主线程可以直接访问模拟"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def submit(self, actions, aim):
+        self._inputs.put((actions, aim))
+
+    def latest(self):
+        """最新发布的快照（不会再被修改）"""
+        return self._latest
+
+    def alpha(self):
+        """渲染插值系数：距离最新快照发布过去了多少个tick"""
+        return min(1.0, (self.clock() - self._latest.time) * self.tick_rate)
+
+    def take_applied(self, tick):
+        """取出在第 tick 个tick之前（含）已经应用的动作"""
+        waiting = self._waiting
+        while not self._applied.empty():
+            waiting.append(self._applied.get_nowait())
+        done = []
+        keep = []
+        for applied_tick, actions in waiting:
+            if applied_tick <= tick:
+                done.extend(actions)
+            else:
+                keep.append((applied_tick, actions))
+        self._waiting = keep
+        return done
+
+    def take_tick_times(self):
+        """取出上次调用以来每个tick的耗时（秒）"""
+        times = []
+        while not self._tick_times.empty():
+            times.append(self._tick_times.get_nowait())
+        return times
+
+    def _run(self):
+        clock = self.clock
+        next_tick = clock()
+        while not self._stop.is_set():
+            now = clock()
+            if now < next_tick:
+                self._stop.wait(next_tick - now)
+                continue
+            self._tick()
+            if not self.sim.running:
+                break
+            next_tick += self.dt
+            behind = clock() - next_tick
+            if behind > self.max_lag:
+                # 例如系统休眠：丢弃积压，不连续追赶
+                self.dropped_time += behind
+                next_tick = clock()
+
+    def _tick(self):
+        start = self.clock()
+        while not self._inputs.empty():
+            actions, aim = self._inputs.get_nowait()
+            self._pending.extend(actions)
+            self._aim = aim
+        sim = self.sim
+        actions = take_tick_actions(self._pending)
+        inputs = self.to_input(sim, actions, self._aim)
+        if self.on_step is not None:
+            self.on_step(inputs)
+        sim.step(inputs)
+        end = self.clock()
+        snapshot = self._latest = SimSnapshot(sim, end)
+        if self.on_publish is not None:
+            self.on_publish(snapshot)
+        if actions:
+            self._applied.put((sim.tick_count, actions))
+        self._tick_times.put(end - start)
+        self.tick_times.append(end - start)
+        self.total_ticks += 1
+
+    def stats(self):
+        times = list(self.tick_times)
+        return {
+            "mean_tick_ms": sum(times) / len(times) * 1000 if times else 0.0,
+            "max_tick_ms": max(times) * 1000 if times else 0.0,
+            "total_ticks": self.total_ticks,
+            "dropped_time": self.dropped_time,
+        }
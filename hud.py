@@ -0,0 +1,116 @@
+import pygame
+from settings import SCREEN_WIDTH, WHITE, GRAY, RED, YELLOW, ORANGE
+
+HUD_HEIGHT = 280
+COMBO_BAR_STEPS = 30  # 连击计时条的分档数（计时条只在跨档时重绘）
+
+# 十角星的顶点（相对于星星左上角）
+STAR_POINTS = [(10, 0), (12, 7), (20, 7), (14, 12), (16, 20),
+               (10, 15), (4, 20), (6, 12), (0, 7), (8, 7)]
+HALF_STAR_POINTS = [(10, 0), (10, 15), (4, 20), (6, 12), (0, 7), (8, 7)]
+
+
+def build_star_glyphs():
+    """预先渲染满星、半星和空星"""
+    glyphs = {}
+    for name in ("full", "half", "empty"):
+        glyph = pygame.Surface((21, 21), pygame.SRCALPHA)
+        pygame.draw.polygon(glyph, YELLOW if name == "full" else GRAY, STAR_POINTS)
+        if name == "half":
+            # 左半边涂黄色
+            pygame.draw.polygon(glyph, YELLOW, HALF_STAR_POINTS)
+        glyphs[name] = glyph
+    return glyphs
+
+
+class HudLayer:
+    """离屏合成的HUD图层：只有相关数值变化时才重绘，每帧只需一次批量blit"""
+
+    def __init__(self, text_cache, width=SCREEN_WIDTH, height=HUD_HEIGHT):
+        self.text_cache = text_cache
+        self.surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        self.star_glyphs = build_star_glyphs()
+        self.key = None
+        self.regions = []  # 图层中实际有内容的区域（屏幕坐标），供脏矩形渲染使用
+        self._blit_sequence = []
+        self.renders = 0  # 重绘次数统计
+
+    def state_key(self, sim):
+        """HUD依赖的所有数值；任何一个变化都需要重绘"""
+        combo_bucket = sim.combo_timer * COMBO_BAR_STEPS // 180 if sim.combo > 0 else -1
+        return (sim.score, sim.money, sim.combo, combo_bucket, sim.rating, sim.difficulty_level,
+                sim.customers_served, sim.max_combo, sim.giant_customer is None)
+
+    def update(self, sim):
+        key = self.state_key(sim)
+        if key != self.key:
+            self.key = key
+            self.render(sim)
+
+    def invalidate(self):
+        self.key = None
+
+    def draw(self, screen, mark=None):
+        """用一次 Surface.blits 把HUD图层贴到屏幕上"""
+        screen.blits(self._blit_sequence, doreturn=False)
+        if mark is not None:
+            for region in self.regions:
+                mark(region)
+
+    def _blit(self, source, position):
+        self.regions.append(self.surface.blit(source, position))
+
+    def _rect(self, color, rect, width=0):
+        self.regions.append(pygame.draw.rect(self.surface, color, rect, width))
+
+    def render(self, sim):
+        self.renders += 1
+        self.surface.fill((0, 0, 0, 0))
+        self.regions = []
+        render_text = self.text_cache.render
+
+        # 绘制分数和金钱
+        self._blit(render_text(f"Score: {sim.score}", 36, WHITE), (10, 10))
+        self._blit(render_text(f"Money: ${sim.money}", 36, WHITE), (10, 50))
+
+        # 绘制连击系统
+        if sim.combo > 0:
+            self._blit(render_text(f"COMBO: {sim.combo}x", 48, YELLOW), (10, 90))
+            # 绘制连击计时条（按档位取整）
+            combo_bucket = sim.combo_timer * COMBO_BAR_STEPS // 180
+            combo_bar_width = int(combo_bucket / COMBO_BAR_STEPS * 150)
+            self._rect(YELLOW, (10, 135, combo_bar_width, 8))
+            self._rect(WHITE, (10, 135, 150, 8), 2)
+
+        # 绘制店铺评分系统（5颗星）
+        self._blit(render_text("Rating:", 32, WHITE), (10, 150))
+        star_x = 100
+        star_y = 155
+        full_stars = int(sim.rating)
+        half_star = (sim.rating - full_stars) >= 0.5
+        for i in range(5):
+            if i < full_stars:
+                glyph = self.star_glyphs["full"]
+            elif i == full_stars and half_star:
+                glyph = self.star_glyphs["half"]
+            else:
+                glyph = self.star_glyphs["empty"]
+            self._blit(glyph, (star_x + i*25, star_y))
+
+        # 绘制难度等级
+        self._blit(render_text(f"Difficulty: Lv.{sim.difficulty_level}", 28, RED), (10, 190))
+
+        # 绘制顾客服务进度（距离巨人顾客还差几个）
+        if sim.giant_customer is None:
+            customers_until_giant = sim.giant_trigger - sim.customers_served
+            self._blit(render_text(f"Giant in: {customers_until_giant} customers", 28, YELLOW), (10, 220))
+
+        # 绘制最高连击记录
+        if sim.max_combo > 0:
+            self._blit(render_text(f"Max Combo: {sim.max_combo}x", 24, ORANGE), (10, 250))
+
+        # 绘制控制说明
+        self._blit(render_text("Move: AD | Aim: mouse | Throw: left click", 24, WHITE), (SCREEN_WIDTH - 350, 10))
+
+        # 图层大部分透明，只贴有内容的区域
+        self._blit_sequence = [(self.surface, region.topleft, region) for region in self.regions]
@@ -0,0 +1,137 @@
+import time
+from collections import deque
+import pygame
+
+# 动作类型
+THROW = "throw"
+LANE = "lane"
+
+# 按住A/D时的重复：按下立即移动一格，之后每隔 REPEAT_INTERVAL 秒再移动一格（按时间而不是按帧计）
+REPEAT_DELAY = 0.25
+REPEAT_INTERVAL = 0.25
+LANE_KEYS = {pygame.K_a: -1, pygame.K_d: 1}
+
+
+class InputAction:
+    """一个带时间戳的输入动作：投掷（位置为点击时的 event.pos）或切换食物框（delta为-1/1）"""
+
+    __slots__ = ("kind", "time", "pos", "delta")
+
+    def __init__(self, kind, time, pos=None, delta=0):
+        self.kind = kind
+        self.time = time
+        self.pos = pos
+        self.delta = delta
+
+
+def take_tick_actions(queue):
+    """从动作队列（deque）取出下一个tick的动作：遇到“投掷之后的切换”就停下，剩下的留给后面的tick"""
+    actions = []
+    thrown = False
+    while queue:
+        action = queue[0]
+        if action.kind == LANE and thrown:
+            break
+        thrown = thrown or action.kind == THROW
+        actions.append(queue.popleft())
+    return actions
+
+
+class InputPipeline:
+    """把输入事件排进带时间戳的队列，按发生顺序交给模拟，并统计输入到上屏的延迟
+
+    - feed() 在取事件时记录时间戳，投掷使用事件里的点击位置
+    - poll() 按真实时间生成按键重复
+    - take_tick() 取出下一个tick要应用的动作；投掷之后的切换留到下一个tick，保证先后顺序不变
+    - presented() 在画面推送后调用：已应用动作的延迟 = 推送时间 - 输入时间
+    """
+
+    def __init__(self, clock=time.perf_counter, repeat_delay=REPEAT_DELAY, repeat_interval=REPEAT_INTERVAL,
+                 history=240, profiler=None):
+        self.clock = clock
+        self.repeat_delay = repeat_delay
+        self.repeat_interval = repeat_interval
+        self.profiler = profiler  # 启用时把每个动作的延迟也记进分析器
+        self._queue = deque()
+        self._held = {}  # 按住的方向键 -> 下一次重复的时间
+        self._applied = []  # 已交给模拟、还没显示到屏幕上的动作
+        self.latency = {THROW: deque(maxlen=history), LANE: deque(maxlen=history)}
+
+    def feed(self, event, now=None):
+        """处理一个pygame事件；是输入动作时返回True"""
+        if now is None:
+            now = self.clock()
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            self._queue.append(InputAction(THROW, now, pos=event.pos))
+            return True
+        if event.type == pygame.KEYDOWN and event.key in LANE_KEYS:
+            self._queue.append(InputAction(LANE, now, delta=LANE_KEYS[event.key]))
+            self._held[event.key] = now + self.repeat_delay
+            return True
+        if event.type == pygame.KEYUP and event.key in LANE_KEYS:
+            self._held.pop(event.key, None)
+            return True
+        return False
+
+    def push_throw(self, pos, now=None):
+        """直接加入一次投掷（脚本和压测使用）"""
+        self._queue.append(InputAction(THROW, self.clock() if now is None else now, pos=pos))
+
+    def poll(self, now=None):
+        """为仍按住的方向键生成到 now 为止应有的重复动作（时间戳为应当重复的时刻）"""
+        if now is None:
+            now = self.clock()
+        for key, due in list(self._held.items()):
+            while due <= now:
+                self._queue.append(InputAction(LANE, due, delta=LANE_KEYS[key]))
+                due += self.repeat_interval
+            self._held[key] = due
+
+    def take_tick(self):
+        """取出下一个tick的动作"""
+        actions = take_tick_actions(self._queue)
+        self._applied.extend(actions)
+        return actions
+
+    def drain(self):
+        """取出所有排队的动作（模拟在工作线程运行时，交给它按tick拆分）"""
+        actions = list(self._queue)
+        self._queue.clear()
+        return actions
+
+    def mark_applied(self, actions):
+        """其他线程已经应用的动作：下一次 presented() 时计入延迟"""
+        self._applied.extend(actions)
+
+    def presented(self, now=None):
+        """画面已推送：记录这之前应用的所有动作的输入到上屏延迟"""
+        if not self._applied:
+            return
+        if now is None:
+            now = self.clock()
+        profiler = self.profiler
+        for action in self._applied:
+            latency = now - action.time
+            self.latency[action.kind].append(latency)
+            if profiler is not None and profiler.enabled:
+                profiler.sample(f"latency.{action.kind}", latency)
+        self._applied = []
+
+    def reset(self):
+        """丢弃未处理的输入和按住状态（切换场景时调用）"""
+        self._queue.clear()
+        self._held.clear()
+        self._applied = []
+
+    def stats(self, kind):
+        """最近动作的输入到上屏延迟（毫秒）"""
+        window = self.latency[kind]
+        if not window:
+            return {"mean_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0, "count": 0}
+        ordered = sorted(window)
+        return {
+            "mean_ms": sum(ordered) / len(ordered) * 1000,
+            "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+            "max_ms": ordered[-1] * 1000,
+            "count": len(ordered),
+        }
@@ -1,830 +1,649 @@
+import time
+PROCESS_START = time.perf_counter()  # 启动计时起点（尽早记录）
+
 import pygame
+import gc
 import sys
-import random
-import math
-from enum import Enum
-
-# 初始化pygame
-pygame.init()
-
-# 初始化字体系统
-pygame.font.init()
-
-# 游戏常量
-SCREEN_WIDTH = 1200
-SCREEN_HEIGHT = 600
-FPS = 60
-
-# 颜色定义
-WHITE = (255, 255, 255)
-BLACK = (0, 0, 0)
-GRAY = (128, 128, 128)
-BROWN = (139, 69, 19)
-GREEN = (0, 255, 0)
-RED = (255, 0, 0)
-BLUE = (0, 0, 255)
-YELLOW = (255, 255, 0)
-ORANGE = (255, 165, 0)
-
-# 食物类型枚举
-class FoodType(Enum):
-    BURGER = "burger"
-    FRIES = "fries"
-    COLA = "cola"
+import argparse
+import numpy as np
+from settings import (SCREEN_WIDTH, SCREEN_HEIGHT, FPS, THROWN_FOOD_SIZE, WHITE, BLACK, GRAY, BROWN,
+                      GREEN, RED, YELLOW, FoodType, FOOD_TYPES)
+import particles
+from dirty_rects import DirtyRectRenderer
+from sprites import SpriteRenderer, EffectAtlas
+from hud import HudLayer
+from game_loop import FixedTimestep, SimulationThread
+from assets import AssetCache
+from startup import StartupTimer
+from profiler import FrameProfiler, GcMonitor, NULL_PROFILER
+from simulation import Simulation, SimInput
+from replay import InputRecorder, verify
+from text_cache import FontRegistry, TextCache
+from score_store import ScoreStore, SCORES_PATH, ENDING_QUIT
+from scenes import TitleScene, PlayingScene, PausedScene, post_scores_changed
+from trajectory import TrajectoryPreview
+from snapshot import SimSnapshot
+from spectator import SpectatorServer
+from capture import VideoCapture, CAPTURE_DIR, CAPTURE_FPS, FORMATS
+from input_pipeline import InputPipeline, THROW, LANE
+
+# F2 依次切换的渲染模式：整屏刷新、脏矩形、LayeredDirty精灵组
+RENDER_MODES = ("full", "dirty", "sprites")
+
+def actions_to_input(sim, actions, aim):
+    """把一个tick的输入动作转换为模拟输入（切换换算成绝对的食物框下标）"""
+    lane = None
+    throws = []
+    for action in actions:
+        if action.kind == THROW:
+            throws.append(action.pos)
+        elif action.kind == LANE:
+            current = sim.current_food_box if lane is None else lane
+            lane = max(0, min(len(sim.food_boxes) - 1, current + action.delta))
+    return SimInput(lane=lane, aim=aim, throws=throws)
+
+def seed_arg(text):
+    """命令行的种子：必须能作为 numpy 的种子并写进录像文件头（无符号64位）"""
+    try:
+        value = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"seed must be an integer, got {text!r}")
+    if not 0 <= value < 2 ** 64:
+        raise argparse.ArgumentTypeError(f"seed must be between 0 and 2**64-1, got {value}")
+    return value
+
+def init_pygame():
+    """只初始化用到的显示和字体子系统（不初始化未使用的音频等）"""
+    if not pygame.display.get_init():
+        pygame.display.init()
+    if not pygame.font.get_init():
+        pygame.font.init()
 
 class Game:
-    def __init__(self):
+    """渲染和输入外壳：游戏规则都在 Simulation 中"""
+
+    def __init__(self, seed=None, record_path=None, profile=False, profile_export=None,
+                 startup=None, asset_cache=True, scores_path=SCORES_PATH, threaded=False, spectate=None,
+                 capture=None):
+        # 启动耗时统计（到第一帧显示为止）
+        self.startup = startup if startup is not None else StartupTimer()
+        self.startup.mark("imports")
+        init_pygame()
+        self.startup.mark("pygame init")
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         pygame.display.set_caption("FOOD FLINGER")
+        self.startup.mark("display")
         self.clock = pygame.time.Clock()
+        self.timestep = FixedTimestep(FPS)
         self.running = True
-        # 持久化最高分
-        self.high_score = 0
-        self.all_scores = []  # 记录每一局结束时的分数
-        try:
-            with open("highscore.txt", "r") as f:
-                self.high_score = int(f.read().strip())
-        except Exception:
-            self.high_score = 0
-        self.game_over_message = None
-
-        # 游戏状态
-        self.counter_height = 120
-        self.counter_width = 600
-        self.counter_x = 0
-        self.counter_y = SCREEN_HEIGHT - self.counter_height
-        # 玩家和食物框尺寸更大
-        self.player_width = 150  # 从120增大到150
-        self.player_height = 150  # 从120增大到150
-        self.player_y = self.counter_y - 75  # 玩家站在柜台正上方（调整位置以适应更大的员工）
-
-        # 加载食物图片（转换为更好的格式）
+        self.print_startup_report = False
+        # 成绩存储（后台线程读写SQLite，排行榜查询不阻塞帧循环）
+        self.scores = ScoreStore(scores_path, on_change=post_scores_changed)
+        # 当前场景（标题/游戏中/暂停/结算），run() 开始时进入标题画面
+        self.scene = None
+        self.session_active = False  # 当前这局是否已开始且还没记录成绩
+
+        # 字体注册表和文字渲染缓存（避免每帧重复创建字体和光栅化）
+        self.fonts = FontRegistry()
+        self.text_cache = TextCache(self.fonts)
+        # HUD离屏图层
+        self.hud = HudLayer(self.text_cache)
+
+        # 投掷轨迹预览（与实际投掷相同的物理，按瞄准方向缓存）
+        self.trajectory = TrajectoryPreview()
+        self.trajectory_dot = pygame.Surface((5, 5), pygame.SRCALPHA)
+        pygame.draw.circle(self.trajectory_dot, GRAY, (2, 2), 2)
+
+        # 游戏规则核心（同一种子+同样输入可以完整复现一局）
+        self.sim = Simulation(seed)
+        # 多线程模式：模拟在工作线程按固定频率运行，渲染只读取它发布的快照
+        self.threaded = threaded
+        self.sim_thread = None
+        self.drawn_state = None  # 最近一帧画的状态（模拟本身或快照）
+
+        # 输入录制
+        self.record_path = record_path
+        self.recorder = InputRecorder(self.sim.seed) if record_path else None
+
+        # 帧性能分析（F3 显示/隐藏浮层；未启用时几乎没有开销）
+        self.profiler = FrameProfiler(enabled=profile or bool(profile_export), export_path=profile_export)
+        self.sim.profiler = self.profiler
+        # 垃圾回收停顿统计（分析器启用时显示在浮层中）
+        self.gc_monitor = GcMonitor(self.profiler).install()
+        self.show_profiler_overlay = False
+        self._overlay_image = None
+        self._overlay_refresh = 0
+        self.startup.mark("game state")
+
+        # 图片资源：首次启动解码并smoothscale，之后直接读取磁盘缓存中的预缩放像素
+        self.assets = AssetCache(enabled=asset_cache)
         self.food_images = {}
         food_files = {
             FoodType.BURGER: "Image/Burger.jpg",
             FoodType.FRIES: "Image/Fries.jpg",
             FoodType.COLA: "Image/Cola.jpg"
         }
-        # 使用更好的加载和缩放方法
         for food_type, file_path in food_files.items():
-            img = pygame.image.load(file_path).convert()
-            # 食物图片尺寸更大
-            self.food_images[food_type] = pygame.transform.smoothscale(img, (100, 100))
-
-        # 加载店员图片（转换为更好的格式）
-        staff_img = pygame.image.load("Image/Staff.jpg").convert()
-        # 使用smoothscale获得更好的质量
-        self.staff_image = pygame.transform.smoothscale(staff_img, (self.player_width, self.player_height))
-
-        # 加载背景图片
-        background_img = pygame.image.load("Image/Background.png").convert()
-        # 缩放背景图片以适应屏幕尺寸
-        self.background_image = pygame.transform.smoothscale(background_img, (SCREEN_WIDTH, SCREEN_HEIGHT))
-
-        self.current_food_box = 0  # 当前选择的食物框索引
-        # 食物框放在柜台上方（而不是悬空）
-        food_box_y = self.counter_y + 10  # 放在柜台顶部
-        food_box_gap = self.counter_width // 4
-        self.food_boxes = [
-            {"x": self.counter_x + food_box_gap * 1, "y": food_box_y, "type": FoodType.BURGER, "color": BROWN},
-            {"x": self.counter_x + food_box_gap * 2, "y": food_box_y, "type": FoodType.FRIES, "color": YELLOW},
-            {"x": self.counter_x + food_box_gap * 3, "y": food_box_y, "type": FoodType.COLA, "color": RED}
-        ]
-
-        # 按键状态
-        self.keys_pressed = pygame.key.get_pressed()
-        self.key_delay = 0  # 按键延迟计数器
-
-        # 顾客系统
-        self.customers = [None, None, None]  # 3个固定位置
-        self.customer_spawn_timer = 0
-        self.customers_served = 0  # 已服务的顾客数量
-        self.giant_customer = None  # 巨人顾客（特殊）
-
-        # 顾客位置定义
-        self.customer_positions = [
-            {"x": 800, "y": 450},   # 位置1
-            {"x": 900, "y": 450},   # 位置2
-            {"x": 1000, "y": 450}   # 位置3
-        ]
-
-        # 投掷系统
-        self.thrown_foods = []
-
-        # 分数
-        self.score = 0
-        self.money = 10  # 初始10元
-        
-        # 连击系统
-        self.combo = 0  # 当前连击数
-        self.max_combo = 0  # 最高连击数
-        self.combo_timer = 0  # 连击计时器（一段时间不操作连击消失）
-        
-        # 难度系统
-        self.difficulty_level = 1  # 难度等级
-        self.base_customer_spawn_delay = 180  # 基础生成延迟
-        self.base_customer_patience = 300  # 基础耐心值
-        
-        # 店铺评分系统
-        self.rating = 5.0  # 当前评分（0-5星）
-        self.success_count = 0  # 成功出餐计数（每3次加半颗星）
-        self.fail_count = 0  # 失败计数（每次扣半颗星）
-        
-        # 特效系统
-        self.effects = []  # 存储所有特效（钞票和文字）
-        
+            self.food_images[food_type] = self.assets.load_scaled(file_path, (THROWN_FOOD_SIZE, THROWN_FOOD_SIZE))
+        self.startup.mark("food images")
+
+        # 加载店员图片
+        self.staff_image = self.assets.load_scaled("Image/Staff.jpg", (self.sim.player_width, self.sim.player_height))
+        self.startup.mark("staff image")
+
+        # 加载背景图片（缩放到屏幕尺寸）
+        self.background_image = self.assets.load_scaled("Image/Background.png", (SCREEN_WIDTH, SCREEN_HEIGHT))
+        self.startup.mark("background image")
+        self.startup.note(f"asset cache: {self.assets.hits} hit / {self.assets.misses} miss")
+
+        # 钞票和生气表情的预渲染帧（旋转角 × 透明度档位），运行时只按下标blit
+        self.effect_atlas = EffectAtlas(self.text_cache)
+        self.startup.mark("effect atlas")
+
+        # 脏矩形渲染器和精灵组渲染器（F2 在整屏刷新/脏矩形/精灵组三种模式之间切换）
+        self.render_mode = RENDER_MODES[0]
+        self.dirty = DirtyRectRenderer(self.background_image)
+        self.sprites = SpriteRenderer(self.background_image, self.text_cache, self.staff_image,
+                                      self.food_images, self.trajectory_dot, self.effect_atlas)
+
+        # 输入队列：带时间戳的投掷/切换动作，按发生顺序逐tick应用，并统计输入到上屏的延迟
+        self.input = InputPipeline(profiler=self.profiler)
+
+        # 观战服务器（spectate 为 (host, port)）：每个tick的快照在后台线程编码并广播给观众
+        self.spectators = SpectatorServer(*spectate).start() if spectate else None
+        if self.spectators is not None:
+            self.startup.mark("spectator server")
+
+        # 录像（capture 为 VideoCapture 的参数字典）：每帧拷贝画面到环形缓冲，F9 保存最近几秒
+        self.capture = VideoCapture(self.screen, **capture) if capture else None
+        if self.capture is not None:
+            self.startup.mark("capture buffer")
+
+        # 资源和缓存都已加载：冻结现有对象，之后的完整回收不再扫描它们
+        gc.collect()
+        gc.freeze()
+        self.startup.mark("gc freeze")
+
     def handle_events(self):
-        # 更新按键状态
-        self.keys_pressed = pygame.key.get_pressed()
-        
+        now = self.input.clock()
         for event in pygame.event.get():
+            if self.input.feed(event, now):
+                continue
             if event.type == pygame.QUIT:
                 self.running = False
-            elif event.type == pygame.MOUSEBUTTONDOWN:
-                if event.button == 1:  # 左键
-                    self.throw_food()
-    
-    def move_player(self):
-        # 使用连续按键检测，添加延迟避免切换太快
-        if self.key_delay <= 0:
-            if self.keys_pressed[pygame.K_a]:
-                self.current_food_box = max(0, self.current_food_box - 1)
-                self.key_delay = 15  # 15帧延迟
-            elif self.keys_pressed[pygame.K_d]:
-                self.current_food_box = min(len(self.food_boxes) - 1, self.current_food_box + 1)
-                self.key_delay = 15  # 15帧延迟
-        else:
-            self.key_delay -= 1
-    
-    def throw_food(self):
-        # 从当前选择的食物框投掷食物
-        box = self.food_boxes[self.current_food_box]
-        mouse_x, mouse_y = pygame.mouse.get_pos()
-
-        # 计算投掷方向
-        dx = mouse_x - box["x"]
-        dy = mouse_y - (self.player_y - 20)
-        distance = math.sqrt(dx*dx + dy*dy)
-
-        if distance > 0:
-            # 标准化方向向量
-            dx /= distance
-            dy /= distance
-
-            # 创建投掷的食物
-            food = {
-                "x": box["x"],
-                "y": self.player_y - 20,
-                "dx": dx * 17,
-                "dy": dy * 17,
-                "type": box["type"]
-            }
-            self.thrown_foods.append(food)
-
-            # 每次出餐扣除3元
-            self.money -= 3
-            # 显示扣除成本的文字特效
-            cost_effect = {
-                "x": box["x"],
-                "y": self.player_y - 60,
-                "dy": -2,
-                "life": 40,
-                "text": "- $3 (cost)",
-                "type": "text"
-            }
-            self.effects.append(cost_effect)
-
-    def create_money_effect(self, x, y, combo_multiplier=1):
-        """创建金钱特效：飞出的钞票和文字"""
-        # 创建3-5张飞出的钞票
-        num_bills = random.randint(3, 5)
-        for i in range(num_bills):
-            bill = {
-                "x": x,
-                "y": y,
-                "dx": random.uniform(-3, 3),  # 随机水平速度
-                "dy": random.uniform(-8, -4),  # 向上飞
-                "life": 60,  # 生命周期（帧数）
-                "type": "bill"  # 钞票类型
-            }
-            self.effects.append(bill)
-        
-        # 计算实际得分和金钱（分数受combo影响，金钱不受影响）
-        score_gained = 10 * combo_multiplier
-        money_gained = 5
-        # 创建文字特效（显示连击倍率）
-        if combo_multiplier > 1:
-            text = f"+{score_gained} Score  +$5  {combo_multiplier}x COMBO!"
-        else:
-            text = f"+{score_gained} Score  +$5"
-        text_effect = {
-            "x": x,
-            "y": y - 20,
-            "dy": -2,  # 向上漂浮
-            "life": 60,  # 生命周期（帧数）
-            "text": text,
-            "type": "text"  # 文字类型
-        }
-        self.effects.append(text_effect)
-    
-    def create_angry_effect(self, x, y):
-        """创建生气特效：飞出的生气符号和扣分文字"""
-        # 创建3-4个生气符号（愤怒emoji）
-        num_emojis = random.randint(3, 4)
-        for i in range(num_emojis):
-            emoji = {
-                "x": x,
-                "y": y,
-                "dx": random.uniform(-4, 4),  # 随机水平速度
-                "dy": random.uniform(-9, -5),  # 向上飞
-                "life": 60,  # 生命周期（帧数）
-                "rotation": random.uniform(0, 360),  # 随机旋转角度
-                "type": "angry_emoji"  # 生气表情类型
-            }
-            self.effects.append(emoji)
-        
-        # 创建扣分文字特效
-        text_effect = {
-            "x": x,
-            "y": y - 20,
-            "dy": -2,  # 向上漂浮
-            "life": 60,  # 生命周期（帧数）
-            "text": "-5 Score",
-            "type": "angry_text"  # 生气文字类型
-        }
-        self.effects.append(text_effect)
-    
-    def update_effects(self):
-        """更新所有特效"""
-        for effect in self.effects[:]:
-            effect["life"] -= 1
-            
-            if effect["type"] == "bill":
-                # 钞票运动
-                effect["x"] += effect["dx"]
-                effect["y"] += effect["dy"]
-                effect["dy"] += 0.3  # 重力
-            elif effect["type"] == "text":
-                # 文字向上漂浮
-                effect["y"] += effect["dy"]
-            elif effect["type"] == "angry_emoji":
-                # 生气表情运动
-                effect["x"] += effect["dx"]
-                effect["y"] += effect["dy"]
-                effect["dy"] += 0.3  # 重力
-                effect["rotation"] += 10  # 旋转
-            elif effect["type"] == "angry_text":
-                # 扣分文字向上漂浮
-                effect["y"] += effect["dy"]
-            
-            # 移除生命周期结束的特效
-            if effect["life"] <= 0:
-                self.effects.remove(effect)
-
-    def spawn_customer(self):
-        # 如果巨人顾客存在，不生成普通顾客
-        if self.giant_customer is not None:
-            return
-        
-        if self.customer_spawn_timer <= 0:
-            # 检查预设的三个位置中是否有空位
-            empty_positions = []
-            for i in range(len(self.customer_positions)):
-                if i >= len(self.customers) or self.customers[i] is None:
-                    empty_positions.append(i)
-
-            # 如果有空位，在随机空位上生成新顾客
-            if empty_positions:
-                position_index = random.choice(empty_positions)
-                position = self.customer_positions[position_index]
-
-                # 计算当前难度的生成延迟和耐心值
-                current_spawn_delay = max(60, self.base_customer_spawn_delay - (self.difficulty_level - 1) * 15)  # 最少1秒
-                current_patience = max(120, self.base_customer_patience - (self.difficulty_level - 1) * 20)  # 最少2秒
-
-                # 创建新顾客（尺寸扩大到1.5倍）
-                customer = {
-                    "x": position["x"],
-                    "y": position["y"],
-                    "width": 45,  # 从30扩大到45
-                    "height": 75,  # 从50扩大到75
-                    "desired_food": random.choice(list(FoodType)),
-                    "color": BLUE,
-                    "patience": current_patience  # 根据难度调整耐心值
-                }
-
-                # 确保customers列表有足够的长度
-                while len(self.customers) <= position_index:
-                    self.customers.append(None)
-
-                # 在指定位置放置顾客
-                self.customers[position_index] = customer
-                self.customer_spawn_timer = current_spawn_delay
-        else:
-            self.customer_spawn_timer -= 1
-    
-    def spawn_giant_customer(self):
-        """生成巨人顾客"""
-        self.giant_customer = {
-            "x": 1000,  # 在右侧中央
-            "y": SCREEN_HEIGHT - 100,  # 站在地面
-            "width": 120,  # 超大尺寸
-            "height": 200,  # 超大尺寸
-            "color": ORANGE,  # 橙色表示特殊
-            "timer": 600,  # 存在10秒（60fps * 10）
-            "hits": 0,  # 被击中次数
-            "desired_food": random.choice(list(FoodType))  # 当前想要的食物
-        }
-    
-    def update_giant_customer(self):
-        """更新巨人顾客"""
-        if self.giant_customer is not None:
-            self.giant_customer["timer"] -= 1
-            # 检查投掷的食物是否击中巨人顾客
-            for food in self.thrown_foods[:]:
-                giant = self.giant_customer
-                giant_center_x = giant["x"]
-                giant_center_y = giant["y"] - giant["height"] // 2
-                if (abs(food["x"] - giant_center_x) < (giant["width"]//2 + 50) and 
-                    abs(food["y"] - giant_center_y) < (giant["height"]//2 + 50)):
-                    if food["type"] == giant["desired_food"]:
-                        # 巨人吃到正确食物，加分加钱
-                        self.score += 20
-                        self.money += 5  # 现在每个只加5元
-                        self.giant_customer["hits"] += 1
-                        self.create_giant_money_effect(giant["x"], giant["y"] - giant["height"])
-                    self.thrown_foods.remove(food)
-                    break
-            # 吃满10个食物后离开并奖励50元
-            if self.giant_customer["hits"] >= 10:
-                self.money += 50
-                self.giant_customer = None
-            # 时间到了也离开（保留原有机制）
-            elif self.giant_customer["timer"] <= 0:
-                self.giant_customer = None
-    
-    def create_giant_money_effect(self, x, y):
-        """创建巨人顾客的金钱特效：更少钞票，不卡顿"""
-        # 创建2-3张飞出的钞票（大幅减少）
-        num_bills = random.randint(2, 3)
-        for i in range(num_bills):
-            bill = {
-                "x": x,
-                "y": y,
-                "dx": random.uniform(-4, 4),
-                "dy": random.uniform(-8, -4),
-                "life": 40,  # 更短寿命
-                "type": "bill"
-            }
-            self.effects.append(bill)
-        # 只显示一次文字特效
-        text_effect = {
-            "x": x,
-            "y": y - 30,
-            "dy": -2,
-            "life": 40,
-            "text": "+20 Score  +$10",
-            "type": "text"
-        }
-        self.effects.append(text_effect)
-    
-    def show_game_over(self):
-        # 记录本局分数
-        self.all_scores.append(self.score)
-        # 计算历史最高分
-        if self.score > self.high_score:
-            self.high_score = self.score
-            try:
-                with open("highscore.txt", "w") as f:
-                    f.write(str(self.high_score))
-            except Exception:
-                pass
-        font = pygame.font.Font(None, 64)
-        small_font = pygame.font.Font(None, 36)
-        self.screen.fill(BLACK)
-        if self.game_over_message:
-            text = font.render(self.game_over_message, True, RED)
-            self.screen.blit(text, (SCREEN_WIDTH//2 - text.get_width()//2, SCREEN_HEIGHT//2 - 100))
-        score_text = small_font.render(f"Your Score: {self.score}", True, WHITE)
-        high_score_text = small_font.render(f"High Score: {self.high_score}", True, YELLOW)
-        self.screen.blit(score_text, (SCREEN_WIDTH//2 - score_text.get_width()//2, SCREEN_HEIGHT//2))   
-        self.screen.blit(high_score_text, (SCREEN_WIDTH//2 - high_score_text.get_width()//2, SCREEN_HEIGHT//2 + 50))
-        tip = small_font.render("Press ESC to exit", True, GRAY)
-        self.screen.blit(tip, (SCREEN_WIDTH//2 - tip.get_width()//2, SCREEN_HEIGHT//2 + 120))
-        pygame.display.flip()
-        waiting = True
-        while waiting:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    waiting = False
-                elif event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_ESCAPE:
-                        waiting = False
-    # ...existing code...
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_F2:
+                    self.cycle_render_mode()
+                elif event.key == pygame.K_F3:
+                    self.toggle_profiler_overlay()
+                elif event.key == pygame.K_F9:
+                    self.save_capture()
+                elif event.key in (pygame.K_ESCAPE, pygame.K_p) and self.scene is not None:
+                    self.change_scene(PausedScene(self))
+        # 按住方向键时按时间生成重复的切换
+        self.input.poll(now)
+        if self.sim_thread is not None and self.sim_thread.running:
+            self.sim_thread.submit(self.input.drain(), pygame.mouse.get_pos())
+
+    def read_input(self):
+        """取出本tick的输入动作，转换为模拟输入"""
+        return actions_to_input(self.sim, self.input.take_tick(), pygame.mouse.get_pos())
 
     def update(self):
-        # 破产判定
-        if self.money < 0 and self.running:
-            self.running = False
-            self.game_over_message = "You are bankrupt! Game over."
-        # 更新玩家移动
-        self.move_player()
-        
-        # 更新投掷的食物
-        for food in self.thrown_foods[:]:
-            food["x"] += food["dx"]
-            food["y"] += food["dy"]
-            food["dy"] += 0.3  # 重力
-            
-            # 检查食物是否落地或出界
-            if food["y"] > SCREEN_HEIGHT or food["x"] > SCREEN_WIDTH or food["x"] < 0:
-                self.thrown_foods.remove(food)
-        
-        # 更新特效
-        self.update_effects()
-        
-        # 更新顾客
-        self.spawn_customer()
-        
-        for i, customer in enumerate(self.customers):
-            if customer is not None:  # 检查顾客是否存在
-                customer["patience"] -= 1
-                
-                # 检查投掷的食物是否击中顾客
-                for food in self.thrown_foods[:]:
-                    # 计算顾客的实际中心位置（顾客矩形从 y-height 到 y）
-                    customer_center_x = customer["x"]
-                    customer_center_y = customer["y"] - customer["height"] // 2  # 顾客的垂直中心
-                    
-                    # 碰撞检测：检查食物是否在顾客全身范围内
-                    if (abs(food["x"] - customer_center_x) < (customer["width"]//2 + 40) and 
-                        abs(food["y"] - customer_center_y) < (customer["height"]//2 + 40) and
-                        food["type"] == customer["desired_food"]):
-                        
-                        # 增加连击
-                        self.combo += 1
-                        self.combo_timer = 180  # 3秒内如果没有新的成功，连击清零
-                        if self.combo > self.max_combo:
-                            self.max_combo = self.combo
-                        
-                        # 计算连击倍率（1x, 2x, 3x...）
-                        combo_multiplier = min(self.combo, 10)  # 最多10倍
-                        
-                        # 顾客满意，付钱离开（分数随连击增加）
-                        base_score = 10
-                        base_money = 5
-                        self.score += base_score * combo_multiplier
-                        self.money += base_money  # 金钱不受combo影响
-                        self.customers_served += 1  # 增加已服务顾客计数
-                        
-                        # 店铺评分系统：每成功3次加半颗星
-                        self.success_count += 1
-                        if self.success_count >= 3:
-                            self.rating = min(5.0, self.rating + 0.5)  # 最多5星
-                            self.success_count = 0
-                        
-                        # 生成特效：飞出的钞票和文字（显示连击倍率）
-                        self.create_money_effect(customer["x"], customer["y"] - customer["height"], combo_multiplier)
-                        
-                        self.customers[i] = None  # 将位置设置为空
-                        self.thrown_foods.remove(food)
-                        break
-                
-                # 顾客失去耐心离开
-                if customer["patience"] <= 0:
-                    # 连击清零
-                    self.combo = 0
-                    self.combo_timer = 0
-                    
-                    # 扣除分数
-                    self.score -= 5
-                    
-                    # 店铺评分系统：失败扣半颗星
-                    self.fail_count += 1
-                    self.rating = max(0.0, self.rating - 0.5)  # 最少0星
-                    self.success_count = 0  # 重置成功计数
-                    
-                    # 生成生气特效
-                    self.create_angry_effect(customer["x"], customer["y"] - customer["height"])
-                    
-                    self.customers[i] = None  # 将位置设置为空
-        
-        # 更新巨人顾客
-        self.update_giant_customer()
-
-        # 检查是否需要生成巨人顾客
-        if self.customers_served >= 15 and self.giant_customer is None:
-            self.spawn_giant_customer()
-            self.customers_served = 0  # 重置计数器
-
-        # 更新连击计时器
-        if self.combo_timer > 0:
-            self.combo_timer -= 1
-            if self.combo_timer <= 0:
-                self.combo = 0  # 连击清零
-
-        # 难度递增系统：每服务10个顾客，难度等级+1
-        total_served = self.customers_served
-        new_difficulty = (total_served // 10) + 1
-        if new_difficulty > self.difficulty_level:
-            self.difficulty_level = new_difficulty
-
-        # 游戏结束判定
-        if self.rating <= 0 and self.running:
-            self.running = False
-            self.game_over_message = "Too many bad reviews, your shop is forced to close."
-    
-    def draw(self):
-        # 绘制背景图片
-        self.screen.blit(self.background_image, (0, 0))
+        """运行一个模拟tick"""
+        inputs = self.read_input()
+        if self.recorder is not None:
+            self.recorder.record(inputs)
+        self.sim.step(inputs)
+        if self.spectators is not None and self.spectators.watching:
+            self.spectators.publish(SimSnapshot(self.sim, time.perf_counter()))
+
+    def view(self):
+        """渲染读取的状态：多线程模式下是最新发布的快照，否则是模拟本身"""
+        if self.sim_thread is not None:
+            return self.sim_thread.latest()
+        return self.sim
+
+    def frame_alpha(self):
+        if self.sim_thread is not None:
+            return self.sim_thread.alpha()
+        return self.timestep.alpha()
+
+    def resume_simulation(self):
+        """进入游戏场景：多线程模式下启动（或继续）模拟线程"""
+        if self.sim_thread is not None:
+            self.sim_thread.start()
+
+    def pause_simulation(self):
+        """离开游戏场景：停止模拟线程，之后可以在主线程直接访问模拟"""
+        if self.sim_thread is not None:
+            self.sim_thread.stop()
+
+    def loop_stats(self):
+        """帧耗时和tick积压统计（用于监控）"""
+        if self.sim_thread is not None:
+            return self.sim_thread.stats()
+        return self.timestep.stats()
+
+    def record_score(self):
+        """把本局成绩交给后台线程保存，返回本局分数排名的异步查询"""
+        sim = self.sim
+        self.scores.record(score=sim.score, max_combo=sim.max_combo, customers_served=sim.total_served,
+                           ending=sim.ending or ENDING_QUIT, duration=sim.tick_count / FPS, seed=sim.seed)
+        return self.scores.percentile_rank(sim.score)
+
+    def change_scene(self, scene):
+        if self.scene is not None:
+            self.scene.exit()
+        self.scene = scene
+        scene.enter()
+
+    def start_game(self):
+        """开始新的一局：只重置模拟状态，已加载的图片、字体和缓存全部保留"""
+        if self.sim.tick_count > 0:
+            self.sim = Simulation()
+            self.sim.profiler = self.profiler
+        self.recorder = InputRecorder(self.sim.seed) if self.record_path else None
+        if self.threaded:
+            # 分析器不是线程安全的：模拟线程的tick耗时由主线程汇总
+            self.sim.profiler = NULL_PROFILER
+            self.sim_thread = SimulationThread(self.sim, actions_to_input,
+                                               on_step=self.recorder.record if self.recorder else None,
+                                               on_publish=self.spectators.broadcast if self.spectators else None)
+        self.hud.invalidate()
+        self.session_active = True
+        self.change_scene(PlayingScene(self))
+
+    def end_game(self):
+        """结束当前这局：保存录像并记录成绩，返回排名的异步查询（没有进行中的对局时返回None）"""
+        if not self.session_active:
+            return None
+        self.session_active = False
+        self.pause_simulation()
+        if self.recorder is not None:
+            self.recorder.save(self.record_path, self.sim)
+        return self.record_score()
+
+    def set_render_mode(self, mode):
+        """切换渲染模式；切换后第一帧总是整屏刷新"""
+        self.render_mode = mode
+        self.dirty.set_enabled(mode == "dirty")
+        self.sprites.set_enabled(mode == "sprites")
+
+    def cycle_render_mode(self):
+        self.set_render_mode(RENDER_MODES[(RENDER_MODES.index(self.render_mode) + 1) % len(RENDER_MODES)])
+
+    def invalidate_screen(self):
+        """屏幕被其他场景覆盖过：下一帧整屏重画"""
+        self.dirty.invalidate()
+        self.sprites.invalidate()
+
+    def draw(self, alpha=1.0, present=True):
+        if self.sprites.enabled:
+            self.draw_sprites(alpha)
+            if present:
+                self.present()
+            return
+        sim = self.drawn_state = self.view()
+        mark = self.dirty.mark
+        prof = self.profiler
+        # 绘制背景图片（脏矩形模式下只恢复上一帧画过的区域）
+        with prof.section("draw.background"):
+            self.dirty.begin_frame(self.screen)
+
+        # 店员、柜台和食物框
+        with prof.section("draw.counter"):
+            self.draw_counter(sim)
+
+        # 投掷的食物（alpha为两个tick之间的插值系数）
+        with prof.section("draw.foods"):
+            self.draw_foods(sim, alpha)
+
+        # 顾客和巨人顾客
+        with prof.section("draw.customers"):
+            self.draw_customers(sim)
+
+        # 绘制特效（钞票和文字）
+        with prof.section("draw.effects"):
+            self.draw_effects(sim, alpha)
 
+        # 绘制投掷轨迹预览
+        with prof.section("draw.trajectory"):
+            self.draw_trajectory(sim)
+
+        # === 所有文字绘制在最后，确保显示在最前面 ===
+        with prof.section("draw.labels"):
+            self.draw_labels(sim)
+
+        # 绘制HUD（数值不变时直接复用离屏图层）
+        with prof.section("draw.hud"):
+            self.hud.update(sim)
+            self.hud.draw(self.screen, mark)
+
+        # 脏矩形模式下显示上一帧推送的像素量
+        if self.dirty.enabled:
+            dirty = self.dirty
+            dirty_text = self.text_cache.render(
+                f"Dirty rects: {dirty.rects_pushed}  {dirty.pixels_pushed} px ({dirty.bandwidth_ratio():.0%})"
+                + ("  full flip" if dirty.fell_back else ""), 24, WHITE)
+            mark(self.screen.blit(dirty_text, (SCREEN_WIDTH - 350, 35)))
+
+        # 性能分析浮层
+        if self.show_profiler_overlay:
+            self.draw_profiler_overlay()
+
+        if present:
+            self.present()
+
+    def draw_sprites(self, alpha=1.0):
+        """精灵组模式：把状态同步到精灵，然后只重画变化了的精灵"""
+        sim = self.drawn_state = self.view()
+        prof = self.profiler
+        with prof.section("draw.sync"):
+            self.hud.update(sim)
+            trajectory = self.trajectory.get(sim, pygame.mouse.get_pos()) if len(sim.customers) > 0 else None
+            sprites = self.sprites
+            stats = self.text_cache.render(
+                f"Sprites: {sprites.sprite_count()}  dirty {sprites.rects_pushed} rects  {sprites.pixels_pushed} px "
+                f"({sprites.bandwidth_ratio():.0%})" + ("  full flip" if sprites.fell_back else ""), 24, WHITE)
+            overlays = [(stats, (SCREEN_WIDTH - 420, 35))]
+            if self.show_profiler_overlay:
+                image = self.profiler_overlay_image()
+                overlays.append((image, (5, SCREEN_HEIGHT - 5 - image.get_height())))
+            sprites.sync(sim, alpha, trajectory, self.hud, overlays)
+        with prof.section("draw.sprites"):
+            sprites.draw(self.screen)
+
+    def draw_counter(self, sim):
+        """绘制店员、柜台和食物框"""
+        mark = self.dirty.mark
         # 绘制玩家（在选中的食物框位置）- 先绘制，这样会在柜台和食物框后面
-        player_x = self.food_boxes[self.current_food_box]["x"]
+        player_x = sim.food_boxes[sim.current_food_box]["x"]
         # 计算店员图片的位置（居中显示）
         staff_rect = self.staff_image.get_rect()
-        staff_rect.center = (player_x, self.player_y)
-        self.screen.blit(self.staff_image, staff_rect)
+        staff_rect.center = (player_x, sim.player_y)
+        mark(self.screen.blit(self.staff_image, staff_rect))
 
         # 绘制柜台（左下大区域）
-        pygame.draw.rect(self.screen, BROWN, (self.counter_x, self.counter_y, self.counter_width, self.counter_height))
+        mark(pygame.draw.rect(self.screen, BROWN, (sim.counter_x, sim.counter_y, sim.counter_width, sim.counter_height)))
 
         # 绘制食物框
-        for i, box in enumerate(self.food_boxes):
+        for i, box in enumerate(sim.food_boxes):
             # 高亮当前选择的食物框
             color = box["color"]
-            if i == self.current_food_box:
+            if i == sim.current_food_box:
                 # 添加白色边框表示选中
-                pygame.draw.rect(self.screen, WHITE, 
-                               (box["x"] - 35, box["y"] - 10, 70, 60), 4)
-            pygame.draw.rect(self.screen, color, 
-                           (box["x"] - 30, box["y"], 60, 40))
+                mark(pygame.draw.rect(self.screen, WHITE,
+                               (box["x"] - 35, box["y"] - 10, 70, 60), 4))
+            mark(pygame.draw.rect(self.screen, color,
+                           (box["x"] - 30, box["y"], 60, 40)))
+
 
+    def draw_foods(self, sim, alpha=1.0):
+        """绘制投掷中的食物"""
+        mark = self.dirty.mark
         # 绘制投掷的食物
-        for food in self.thrown_foods:
-            # 使用图片而不是色块
-            food_image = self.food_images[food["type"]]
-            # 计算图片中心位置
-            image_rect = food_image.get_rect()
-            image_rect.center = (int(food["x"]), int(food["y"]))
-            self.screen.blit(food_image, image_rect)
+        foods = sim.thrown_foods
+        slots = foods.live_slots()
+        food_xs, food_ys = foods.lerp_positions(slots, alpha)  # 在两个tick之间插值
+        # 图片中心对准食物位置，所有食物一次批量blit
+        half = THROWN_FOOD_SIZE // 2
+        images = [self.food_images[food_type] for food_type in FOOD_TYPES]
+        blits = zip([images[code] for code in foods.food[slots].tolist()],
+                    zip((food_xs.astype(np.int64) - half).tolist(), (food_ys.astype(np.int64) - half).tolist()))
+        if self.dirty.enabled:
+            for rect in self.screen.blits(blits):
+                mark(rect)
+        else:
+            self.screen.blits(blits, doreturn=False)
+
 
+    def draw_customers(self, sim):
+        """绘制顾客和巨人顾客"""
+        mark = self.dirty.mark
         # 绘制顾客（调整位置以适应1.5倍尺寸）
-        for customer in self.customers:
+        for customer in sim.customers:
             if customer is not None:  # 检查顾客是否存在
                 # 顾客矩形，居中对齐（width=45, height=75）
-                pygame.draw.rect(self.screen, customer["color"], 
-                               (customer["x"] - customer["width"]//2, customer["y"] - customer["height"], 
-                                customer["width"], customer["height"]))
-        
+                mark(pygame.draw.rect(self.screen, customer.color,
+                               (customer.x - customer.width//2, customer.y - customer.height,
+                                customer.width, customer.height)))
+
         # 绘制巨人顾客
-        if self.giant_customer is not None:
-            giant = self.giant_customer
+        if sim.giant_customer is not None:
+            giant = sim.giant_customer
             # 绘制巨大的矩形
-            pygame.draw.rect(self.screen, giant["color"], 
-                           (giant["x"] - giant["width"]//2, giant["y"] - giant["height"], 
-                            giant["width"], giant["height"]))
+            mark(pygame.draw.rect(self.screen, giant.color,
+                           (giant.x - giant.width//2, giant.y - giant.height,
+                            giant.width, giant.height)))
             # 绘制边框表示特殊
-            pygame.draw.rect(self.screen, YELLOW, 
-                           (giant["x"] - giant["width"]//2, giant["y"] - giant["height"], 
-                            giant["width"], giant["height"]), 5)
-            
+            mark(pygame.draw.rect(self.screen, YELLOW,
+                           (giant.x - giant.width//2, giant.y - giant.height,
+                            giant.width, giant.height), 5))
+
             # 绘制倒计时
-            timer_seconds = giant["timer"] // 60
-            font = pygame.font.Font(None, 48)
-            timer_text = font.render(f"{timer_seconds}s", True, WHITE)
-            self.screen.blit(timer_text, (giant["x"] - 20, giant["y"] - giant["height"] - 50))
-            
+            timer_seconds = giant.timer // 60
+            timer_text = self.text_cache.render(f"{timer_seconds}s", 48, WHITE)
+            mark(self.screen.blit(timer_text, (giant.x - 20, giant.y - giant.height - 50)))
+
             # 绘制"GIANT BONUS!"文字
-            bonus_font = pygame.font.Font(None, 36)
-            bonus_text = bonus_font.render("GIANT BONUS!", True, YELLOW)
-            self.screen.blit(bonus_text, (giant["x"] - 80, giant["y"] - giant["height"] - 90))
-            
+            bonus_text = self.text_cache.render("GIANT BONUS!", 36, YELLOW)
+            mark(self.screen.blit(bonus_text, (giant.x - 80, giant.y - giant.height - 90)))
+
             # 绘制巨人想要的食物
-            food_font = pygame.font.Font(None, 42)
-            food_text = food_font.render(giant["desired_food"].value.upper(), True, WHITE)
-            self.screen.blit(food_text, (giant["x"] - 50, giant["y"] - giant["height"]//2 - 10))
-            
+            food_text = self.text_cache.render(giant.desired_food.value.upper(), 42, WHITE)
+            mark(self.screen.blit(food_text, (giant.x - 50, giant.y - giant.height//2 - 10)))
+
             # 绘制还能吃几个食物
-            left = max(0, 10 - giant['hits'])
-            left_text = bonus_font.render(f"Left: {left}", True, WHITE)
-            self.screen.blit(left_text, (giant["x"] - 40, giant["y"] + 10))
-        
-        # 绘制特效（钞票和文字）
-        for effect in self.effects:
-            if effect["type"] == "bill":
-                # 绘制钞票（绿色矩形）
-                alpha = int(255 * (effect["life"] / 60))  # 根据生命周期计算透明度
-                bill_color = (0, min(255, 150 + alpha // 3), 0)  # 绿色
-                pygame.draw.rect(self.screen, bill_color, 
-                               (int(effect["x"]) - 8, int(effect["y"]) - 4, 16, 8))
-                # 绘制钞票上的"$"符号
-                font = pygame.font.Font(None, 16)
-                dollar_text = font.render("$", True, WHITE)
-                self.screen.blit(dollar_text, (int(effect["x"]) - 4, int(effect["y"]) - 6))
-            elif effect["type"] == "text":
-                # 绘制文字特效（加分）
-                alpha = int(255 * (effect["life"] / 60))  # 根据生命周期计算透明度
-                font = pygame.font.Font(None, 32)
-                # 创建带阴影的文字效果
-                shadow_text = font.render(effect["text"], True, BLACK)
-                self.screen.blit(shadow_text, (int(effect["x"]) - 58, int(effect["y"]) + 2))
-                color_text = font.render(effect["text"], True, YELLOW)
-                self.screen.blit(color_text, (int(effect["x"]) - 60, int(effect["y"])))
-            elif effect["type"] == "angry_emoji":
-                # 绘制生气表情（红色圆圈 + 愤怒符号）
-                alpha = int(255 * (effect["life"] / 60))
-                # 绘制红色圆形背景
-                pygame.draw.circle(self.screen, (255, 50, 50), 
-                                 (int(effect["x"]), int(effect["y"])), 15)
-                # 绘制愤怒的眼睛（两个小三角形）
-                pygame.draw.polygon(self.screen, BLACK, 
-                                  [(int(effect["x"]) - 8, int(effect["y"]) - 3),
-                                   (int(effect["x"]) - 3, int(effect["y"]) - 3),
-                                   (int(effect["x"]) - 5, int(effect["y"]) + 2)])
-                pygame.draw.polygon(self.screen, BLACK, 
-                                  [(int(effect["x"]) + 3, int(effect["y"]) - 3),
-                                   (int(effect["x"]) + 8, int(effect["y"]) - 3),
-                                   (int(effect["x"]) + 5, int(effect["y"]) + 2)])
-                # 绘制愤怒的嘴巴（弧线）
-                pygame.draw.arc(self.screen, BLACK, 
-                              (int(effect["x"]) - 8, int(effect["y"]) + 2, 16, 10),
-                              3.14, 0, 2)
-            elif effect["type"] == "angry_text":
-                # 绘制扣分文字特效（红色）
-                alpha = int(255 * (effect["life"] / 60))
-                font = pygame.font.Font(None, 36)
-                # 创建带阴影的文字效果
-                shadow_text = font.render(effect["text"], True, BLACK)
-                self.screen.blit(shadow_text, (int(effect["x"]) - 48, int(effect["y"]) + 2))
-                color_text = font.render(effect["text"], True, RED)
-                self.screen.blit(color_text, (int(effect["x"]) - 50, int(effect["y"])))
-        
-        # 绘制投掷轨迹预览
-        if len(self.customers) > 0:
-            mouse_x, mouse_y = pygame.mouse.get_pos()
-            box = self.food_boxes[self.current_food_box]
-            
-            # 计算投掷方向
-            dx = mouse_x - box["x"]
-            dy = mouse_y - (self.player_y - 20)
-            distance = math.sqrt(dx*dx + dy*dy)
-            
-            if distance > 0:
-                dx /= distance
-                dy /= distance
-                
-                # 绘制投掷轨迹
-                start_x, start_y = box["x"], self.player_y - 20
-                for i in range(20):
-                    t = i * 0.5
-                    x = start_x + dx * 10 * t
-                    y = start_y + dy * 10 * t + 0.3 * t * t / 2
-                    
-                    if 0 <= x <= SCREEN_WIDTH and 0 <= y <= SCREEN_HEIGHT:
-                        pygame.draw.circle(self.screen, GRAY, (int(x), int(y)), 2)
-                    else:
-                        break
-        
-        # === 所有文字绘制在最后，确保显示在最前面 ===
-        
+            left = max(0, 10 - giant.hits)
+            left_text = self.text_cache.render(f"Left: {left}", 36, WHITE)
+            mark(self.screen.blit(left_text, (giant.x - 40, giant.y + 10)))
+
+
+    def draw_trajectory(self, sim):
+        """绘制投掷轨迹预览（轨迹按瞄准方向缓存，一次 blits 画完所有点）"""
+        if len(sim.customers) > 0:
+            trajectory = self.trajectory.get(sim, pygame.mouse.get_pos())
+            if trajectory is not None:
+                dot = self.trajectory_dot
+                rects = self.screen.blits([(dot, (x - 2, y - 2)) for x, y in trajectory.dots])
+                for rect in rects:
+                    self.dirty.mark(rect)
+
+    def draw_labels(self, sim):
+        """绘制食物框标签和顾客的文字信息（需显示在最前面）"""
+        mark = self.dirty.mark
         # 绘制食物框标签（黑色）
-        for i, box in enumerate(self.food_boxes):
-            font = pygame.font.Font(None, 24)
-            text = font.render(box["type"].value.upper(), True, BLACK)
-            self.screen.blit(text, (box["x"] - 25, box["y"] - 25))
-        
+        for i, box in enumerate(sim.food_boxes):
+            text = self.text_cache.render(box["type"].value.upper(), 24, BLACK)
+            mark(self.screen.blit(text, (box["x"] - 25, box["y"] - 25)))
+
         # 绘制顾客的文字信息
-        for customer in self.customers:
+        for customer in sim.customers:
             if customer is not None:
                 # 显示顾客想要的食物（字体放大到30）
-                font = pygame.font.Font(None, 30)
-                text = font.render(customer["desired_food"].value.upper(), True, WHITE)
-                self.screen.blit(text, (customer["x"] - 30, customer["y"] - customer["height"] - 25))
-                
+                text = self.text_cache.render(customer.desired_food.value.upper(), 30, WHITE)
+                mark(self.screen.blit(text, (customer.x - 30, customer.y - customer.height - 25)))
+
                 # 显示耐心条（放大到60宽度）
-                patience_width = int((customer["patience"] / 300) * 60)
-                pygame.draw.rect(self.screen, RED, 
-                               (customer["x"] - 30, customer["y"] - customer["height"] - 10, 60, 8))
-                pygame.draw.rect(self.screen, GREEN, 
-                               (customer["x"] - 30, customer["y"] - customer["height"] - 10, patience_width, 8))
-        
-        # 绘制分数和金钱
-        font = pygame.font.Font(None, 36)
-        score_text = font.render(f"Score: {self.score}", True, WHITE)
-        money_text = font.render(f"Money: ${self.money}", True, WHITE)
-        self.screen.blit(score_text, (10, 10))
-        self.screen.blit(money_text, (10, 50))
-        
-        # 绘制连击系统
-        if self.combo > 0:
-            combo_font = pygame.font.Font(None, 48)
-            combo_text = combo_font.render(f"COMBO: {self.combo}x", True, YELLOW)
-            self.screen.blit(combo_text, (10, 90))
-            # 绘制连击计时条
-            combo_bar_width = int((self.combo_timer / 180) * 150)
-            pygame.draw.rect(self.screen, YELLOW, (10, 135, combo_bar_width, 8))
-            pygame.draw.rect(self.screen, WHITE, (10, 135, 150, 8), 2)
-        
-        # 绘制店铺评分系统（5颗星）
-        rating_font = pygame.font.Font(None, 32)
-        rating_text = rating_font.render("Rating:", True, WHITE)
-        self.screen.blit(rating_text, (10, 150))
-        
-        # 绘制星星
-        star_x = 100
-        star_y = 155
-        full_stars = int(self.rating)
-        half_star = (self.rating - full_stars) >= 0.5
-        
-        for i in range(5):
-            if i < full_stars:
-                # 满星（黄色）
-                pygame.draw.polygon(self.screen, YELLOW, [
-                    (star_x + i*25 + 10, star_y),
-                    (star_x + i*25 + 12, star_y + 7),
-                    (star_x + i*25 + 20, star_y + 7),
-                    (star_x + i*25 + 14, star_y + 12),
-                    (star_x + i*25 + 16, star_y + 20),
-                    (star_x + i*25 + 10, star_y + 15),
-                    (star_x + i*25 + 4, star_y + 20),
-                    (star_x + i*25 + 6, star_y + 12),
-                    (star_x + i*25 + 0, star_y + 7),
-                    (star_x + i*25 + 8, star_y + 7)
-                ])
-            elif i == full_stars and half_star:
-                # 半星（灰+黄）
-                pygame.draw.polygon(self.screen, GRAY, [
-                    (star_x + i*25 + 10, star_y),
-                    (star_x + i*25 + 12, star_y + 7),
-                    (star_x + i*25 + 20, star_y + 7),
-                    (star_x + i*25 + 14, star_y + 12),
-                    (star_x + i*25 + 16, star_y + 20),
-                    (star_x + i*25 + 10, star_y + 15),
-                    (star_x + i*25 + 4, star_y + 20),
-                    (star_x + i*25 + 6, star_y + 12),
-                    (star_x + i*25 + 0, star_y + 7),
-                    (star_x + i*25 + 8, star_y + 7)
-                ])
-                # 左半边涂黄色
-                pygame.draw.polygon(self.screen, YELLOW, [
-                    (star_x + i*25 + 10, star_y),
-                    (star_x + i*25 + 10, star_y + 15),
-                    (star_x + i*25 + 4, star_y + 20),
-                    (star_x + i*25 + 6, star_y + 12),
-                    (star_x + i*25 + 0, star_y + 7),
-                    (star_x + i*25 + 8, star_y + 7)
-                ])
-            else:
-                # 空星（灰色）
-                pygame.draw.polygon(self.screen, GRAY, [
-                    (star_x + i*25 + 10, star_y),
-                    (star_x + i*25 + 12, star_y + 7),
-                    (star_x + i*25 + 20, star_y + 7),
-                    (star_x + i*25 + 14, star_y + 12),
-                    (star_x + i*25 + 16, star_y + 20),
-                    (star_x + i*25 + 10, star_y + 15),
-                    (star_x + i*25 + 4, star_y + 20),
-                    (star_x + i*25 + 6, star_y + 12),
-                    (star_x + i*25 + 0, star_y + 7),
-                    (star_x + i*25 + 8, star_y + 7)
-                ])
-        
-        # 绘制难度等级
-        difficulty_font = pygame.font.Font(None, 28)
-        difficulty_text = difficulty_font.render(f"Difficulty: Lv.{self.difficulty_level}", True, RED)
-        self.screen.blit(difficulty_text, (10, 190))
-        
-        # 绘制顾客服务进度（距离巨人顾客还差几个）
-        customers_until_giant = 15 - self.customers_served
-        if self.giant_customer is None:
-            progress_font = pygame.font.Font(None, 28)
-            progress_text = progress_font.render(f"Giant in: {customers_until_giant} customers", True, YELLOW)
-            self.screen.blit(progress_text, (10, 220))
-        
-        # 绘制最高连击记录
-        if self.max_combo > 0:
-            max_combo_font = pygame.font.Font(None, 24)
-            max_combo_text = max_combo_font.render(f"Max Combo: {self.max_combo}x", True, ORANGE)
-            self.screen.blit(max_combo_text, (10, 250))
-        
-        # 绘制控制说明
-        font = pygame.font.Font(None, 24)
-        controls_text = font.render("Move: AD | Aim: mouse | Throw: left click", True, WHITE)
-        self.screen.blit(controls_text, (SCREEN_WIDTH - 350, 10))
-        
+                patience_width = int((customer.patience / 300) * 60)
+                mark(pygame.draw.rect(self.screen, RED,
+                               (customer.x - 30, customer.y - customer.height - 10, 60, 8)))
+                mark(pygame.draw.rect(self.screen, GREEN,
+                               (customer.x - 30, customer.y - customer.height - 10, patience_width, 8)))
+
+
+    def present(self):
+        """把合成好的画面推送到显示器（整屏flip或脏矩形update）"""
+        if self.sprites.enabled:
+            self.sprites.present()
+        else:
+            self.dirty.present()
+        if self.sim_thread is not None and self.drawn_state is not None:
+            self.input.mark_applied(self.sim_thread.take_applied(self.drawn_state.tick_count))
+        self.input.presented()
+        # 画面已推送，接下来帧循环会等待下一帧：这时再让观战线程编码本帧的tick
+        if self.spectators is not None:
+            self.spectators.flush()
+        self.frame_presented()
+
+    def present_static(self):
+        """空闲场景整屏推送；回到游戏时脏矩形渲染器需要整屏重画"""
         pygame.display.flip()
+        self.invalidate_screen()
+        self.frame_presented()
+
+    def frame_presented(self):
+        if self.capture is not None:
+            with self.profiler.section("capture"):
+                self.capture.grab()
+        if not self.startup.finished:
+            self.startup.finish("first frame")
+            if self.print_startup_report:
+                print(self.startup.report())
     
+    def save_capture(self):
+        """F9：把最近几秒的画面交给后台线程写盘"""
+        if self.capture is None:
+            print("video capture is off (start with --capture SECONDS)")
+            return
+        path = self.capture.save()
+        if path is None:
+            print("video capture: still writing the previous clip")
+        else:
+            print(f"video capture: saving last {self.capture.stats()['seconds']:.1f} s to {path}")
+
+    def draw_effects(self, sim, alpha=1.0):
+        """绘制粒子数组中的所有特效：钞票和生气表情是预渲染帧的一次批量blit，文字特效画在最上面"""
+        mark = self.dirty.mark
+        effects = sim.effects
+        n = len(effects)
+        xs, ys = effects.lerp_positions(alpha)  # 在两个tick之间插值
+        xs = xs.astype(np.int64)
+        ys = ys.astype(np.int64)
+        kind = effects.kind[:n]
+        images, frame_xs, frame_ys = self.effect_atlas.place(kind, effects.life[:n], effects.rotation[:n], xs, ys)
+        for rect in self.screen.blits(zip(images, zip(frame_xs, frame_ys))):
+            mark(rect)
+
+        texts = np.flatnonzero((kind == particles.TEXT) | (kind == particles.ANGRY_TEXT))
+        for kind, x, y, text in zip(kind[texts].tolist(), xs[texts].tolist(), ys[texts].tolist(),
+                                    effects.text[texts].tolist()):
+            if kind == particles.TEXT:
+                # 绘制文字特效（加分），带阴影
+                shadow_text = self.text_cache.render(text, 32, BLACK)
+                mark(self.screen.blit(shadow_text, (x - 58, y + 2)))
+                color_text = self.text_cache.render(text, 32, YELLOW)
+                mark(self.screen.blit(color_text, (x - 60, y)))
+            else:
+                # 绘制扣分文字特效（红色），带阴影
+                shadow_text = self.text_cache.render(text, 36, BLACK)
+                mark(self.screen.blit(shadow_text, (x - 48, y + 2)))
+                color_text = self.text_cache.render(text, 36, RED)
+                mark(self.screen.blit(color_text, (x - 50, y)))
+
+    def toggle_profiler_overlay(self):
+        self.show_profiler_overlay = not self.show_profiler_overlay
+        # 浮层打开时自动启用分析；如果设置了导出文件则保持启用
+        if self.show_profiler_overlay or not self.profiler.export_path:
+            self.profiler.set_enabled(self.show_profiler_overlay)
+        self._overlay_refresh = 0
+
+    def entity_counts(self):
+        sim = self.view()
+        return {
+            "thrown_foods": len(sim.thrown_foods),
+            "effects": len(sim.effects),
+            "customers": sum(1 for customer in sim.customers if customer is not None),
+        }
+
+    def profiler_overlay_image(self):
+        """性能浮层：FPS、各阶段耗时和实体数量（每15帧重新生成一次）"""
+        profiler = self.profiler
+        if self._overlay_refresh <= 0 or self._overlay_image is None:
+            self._overlay_refresh = 15
+            counts = self.entity_counts()
+            lines = [f"FPS {profiler.fps():5.1f}   foods {counts['thrown_foods']}  "
+                     f"effects {counts['effects']}  customers {counts['customers']}"]
+            if self.spectators is not None:
+                stats = self.spectators.stats()
+                lag = max((client["lag_ms"] for client in stats["clients"]), default=0.0)
+                lines.append(f"spectators {len(stats['clients'])}  {stats['bytes_per_sec'] / 1024:.1f} KiB/s  "
+                             f"max lag {lag:.1f} ms")
+            if self.capture is not None:
+                stats = self.capture.stats()
+                lines.append(f"capture {stats['seconds']:4.1f} s  {stats['buffer_mb']:.0f} MiB  "
+                             f"dropped {stats['dropped']}" + ("  saving" if stats["saving"] else ""))
+            for name in sorted(profiler.samples):
+                stats = profiler.stats(name)
+                lines.append(f"{name:<18} {stats['mean_ms']:6.2f} ms  p95 {stats['p95_ms']:6.2f}")
+
+            line_height = 16
+            panel = pygame.Surface((330, line_height * len(lines) + 10))
+            panel.fill(BLACK)
+            for i, line in enumerate(lines):
+                # 数字每次都不同，直接渲染而不放进文字缓存
+                panel.blit(self.fonts.get(18).render(line, True, GREEN), (5, 5 + i * line_height))
+            self._overlay_image = panel
+        self._overlay_refresh -= 1
+        return self._overlay_image
+
+    def draw_profiler_overlay(self):
+        """左下角的性能浮层"""
+        image = self.profiler_overlay_image()
+        self.dirty.mark(self.screen.blit(image, (5, SCREEN_HEIGHT - 5 - image.get_height())))
+
     def run(self):
+        """场景主循环：游戏中按固定步长运行，其他场景阻塞等待事件；关闭窗口时返回"""
+        if self.scene is None:
+            self.change_scene(TitleScene(self))
         while self.running:
-            self.handle_events()
-            self.update()
-            self.draw()
-            self.clock.tick(FPS)
-        # Game over
-        self.show_game_over()
+            self.scene.run_frame()
+        self.shutdown()
+
+    def shutdown(self):
+        # 中途关闭窗口也记录这一局
+        self.end_game()
+        self.scores.close()
+        if self.spectators is not None:
+            self.spectators.close()
+        if self.capture is not None:
+            self.capture.close()
+        self.gc_monitor.uninstall()
         pygame.quit()
-        sys.exit()
+
 
 if __name__ == "__main__":
-    game = Game()
+    parser = argparse.ArgumentParser(description="FOOD FLINGER")
+    parser.add_argument("--seed", type=seed_arg, default=None, help="random seed for this game")
+    parser.add_argument("--record", metavar="PATH", help="record inputs of this game to PATH")
+    parser.add_argument("--replay", metavar="PATH", help="replay a recording headlessly and verify the result")
+    parser.add_argument("--profile", action="store_true", help="enable the frame profiler from the start")
+    parser.add_argument("--startup-report", action="store_true",
+                        help="print the time spent in each startup step up to the first frame")
+    parser.add_argument("--no-asset-cache", action="store_true", help="always decode and rescale images")
+    parser.add_argument("--profile-export", metavar="PATH",
+                        help="periodically append profiler metrics to PATH (.csv or .jsonl)")
+    parser.add_argument("--threaded", action="store_true",
+                        help="run the simulation on a worker thread and render its snapshots")
+    parser.add_argument("--spectate", type=int, metavar="PORT",
+                        help="stream the game to spectators (python viewer.py) on PORT")
+    parser.add_argument("--spectate-host", default="127.0.0.1", help="address the spectator server listens on")
+    parser.add_argument("--capture", type=float, metavar="SECONDS",
+                        help="keep the last SECONDS of video in memory; press F9 to save them")
+    parser.add_argument("--capture-fps", type=int, default=CAPTURE_FPS, help="video capture frame rate")
+    parser.add_argument("--capture-format", choices=FORMATS, default="raw",
+                        help="raw frames (muxed later with ffmpeg) or a PNG sequence")
+    parser.add_argument("--capture-dir", default=CAPTURE_DIR, help="directory for saved clips")
+    args = parser.parse_args()
+
+    if args.replay:
+        sys.exit(0 if verify(args.replay) else 1)
+    game = Game(seed=args.seed, record_path=args.record, profile=args.profile,
+                profile_export=args.profile_export, startup=StartupTimer(PROCESS_START),
+                asset_cache=not args.no_asset_cache, threaded=args.threaded,
+                spectate=(args.spectate_host, args.spectate) if args.spectate is not None else None,
+                capture={"seconds": args.capture, "fps": args.capture_fps, "fmt": args.capture_format,
+                         "directory": args.capture_dir} if args.capture else None)
+    game.print_startup_report = args.startup_report
     game.run()
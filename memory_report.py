@@ -0,0 +1,136 @@
+import os
+import gc
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+
+# 无窗口运行：必须在导入pygame之前设置
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import benchmark
+from entities import Customer, GiantCustomer
+from settings import BLUE, ORANGE, FoodType
+
+
+def legacy_customer(i):
+    """旧版的字典顾客（用于对比）"""
+    return {"x": 800, "y": 450, "width": 45, "height": 75,
+            "desired_food": FoodType.BURGER, "color": BLUE, "patience": 300}
+
+
+def legacy_giant(i):
+    return {"x": 1000, "y": 500, "width": 120, "height": 200, "color": ORANGE,
+            "timer": 600, "hits": 0, "desired_food": FoodType.COLA}
+
+
+def slotted_customer(i):
+    return Customer(800, 450, 45, 75, FoodType.BURGER, BLUE)
+
+
+def slotted_giant(i):
+    return GiantCustomer(1000, 500, 120, 200, ORANGE, FoodType.COLA)
+
+
+ENTITY_LAYOUTS = [
+    ("customer", legacy_customer, slotted_customer),
+    ("giant", legacy_giant, slotted_giant),
+]
+
+
+def bytes_per_entity(factory, n=10000):
+    """用 tracemalloc 测量 factory 创建的每个对象平均占用的字节数"""
+    objects = [None] * n  # 列表本身不计入
+    gc.collect()
+    tracemalloc.start()
+    start, _ = tracemalloc.get_traced_memory()
+    for i in range(n):
+        objects[i] = factory(i)
+    end, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return (end - start) / n
+
+
+def full_collection_ms(repeat=5):
+    """一次完整回收（gen2）的耗时，取最小值"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        gc.collect()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def run_session(scenario_name, frames, seed, frozen):
+    """跑一段压测场景，返回GC停顿统计和顾客对象池的分配情况"""
+    scenario = next(s for s in benchmark.SCENARIOS if s.name == scenario_name)
+    game = benchmark.Game(seed=seed, scores_path=":memory:")  # Game 初始化时已经冻结了GC
+    if not frozen:
+        gc.unfreeze()
+    if scenario.setup is not None:
+        scenario.setup(game)
+    monitor = game.gc_monitor
+    monitor.reset()
+    for frame in range(frames):
+        if scenario.before_frame is not None:
+            scenario.before_frame(game, frame)
+        game.handle_events()
+        game.update()
+        game.draw(present=False)
+        game.present()
+    result = {
+        "frozen": frozen,
+        "gc": monitor.stats(),
+        "full_collection_ms": full_collection_ms(),
+        "customers_allocated": game.sim.customer_pool.allocated,
+        "customers_reused": game.sim.customer_pool.reused,
+    }
+    monitor.uninstall()
+    game.scores.close()
+    gc.unfreeze()
+    return result
+
+
+def print_report(report):
+    print(f"{'entity':<12}{'dict B':>10}{'slots B':>10}{'saved':>8}")
+    for name, sizes in report["entities"].items():
+        print(f"{name:<12}{sizes['dict']:>10.0f}{sizes['slots']:>10.0f}{sizes['saved']:>8.0%}")
+    print()
+    for session in report["sessions"]:
+        label = "gc frozen" if session["frozen"] else "gc not frozen"
+        print(f"{label}: full collection {session['full_collection_ms']:.2f} ms, "
+              f"customers {session['customers_allocated']} allocated / {session['customers_reused']} reused")
+        for generation, stats in session["gc"].items():
+            print(f"  {generation}: {stats['collections']:>5} collections  total {stats['total_ms']:8.2f} ms  "
+                  f"max {stats['max_ms']:6.2f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bytes per entity (tracemalloc) and GC pauses (gc.callbacks)")
+    parser.add_argument("--scenario", default="busy", help="benchmark scenario to run (default: busy)")
+    parser.add_argument("--frames", type=int, default=3600)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", "-o", metavar="PATH", help="write results as JSON")
+    args = parser.parse_args(argv)
+
+    output = os.path.abspath(args.output) if args.output else None
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+    entities = {}
+    for name, legacy, slotted in ENTITY_LAYOUTS:
+        old = bytes_per_entity(legacy)
+        new = bytes_per_entity(slotted)
+        entities[name] = {"dict": old, "slots": new, "saved": 1 - new / old}
+    sessions = [run_session(args.scenario, args.frames, args.seed, frozen) for frozen in (False, True)]
+    report = {"scenario": args.scenario, "frames": args.frames, "entities": entities, "sessions": sessions}
+    print_report(report)
+    if output:
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+import numpy as np
+
+# 粒子种类
+BILL = 0  # 钞票
+TEXT = 1  # 加分/成本文字
+ANGRY_EMOJI = 2  # 生气表情
+ANGRY_TEXT = 3  # 扣分文字
+
+GRAVITY = 0.3
+
+
+class ParticleSystem:
+    """结构数组（SoA）形式的特效粒子系统：所有粒子一次向量化更新"""
+
+    def __init__(self, capacity=256):
+        self.count = 0
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        self.capacity = capacity
+        self.x = np.zeros(capacity, dtype=np.float64)
+        self.y = np.zeros(capacity, dtype=np.float64)
+        # 上一tick的位置，用于渲染插值
+        self.prev_x = np.zeros(capacity, dtype=np.float64)
+        self.prev_y = np.zeros(capacity, dtype=np.float64)
+        self.dx = np.zeros(capacity, dtype=np.float64)
+        self.dy = np.zeros(capacity, dtype=np.float64)
+        self.gravity = np.zeros(capacity, dtype=np.float64)
+        self.rotation = np.zeros(capacity, dtype=np.float64)
+        self.spin = np.zeros(capacity, dtype=np.float64)
+        self.life = np.zeros(capacity, dtype=np.int32)
+        self.kind = np.zeros(capacity, dtype=np.int8)
+        self.text = np.empty(capacity, dtype=object)
+
+    def _columns(self):
+        return ("x", "y", "prev_x", "prev_y", "dx", "dy", "gravity", "rotation", "spin", "life", "kind", "text")
+
+    def _grow(self, needed):
+        """容量不足时按2倍扩容，并拷贝已有粒子"""
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        old = {name: getattr(self, name) for name in self._columns()}
+        self._allocate(capacity)
+        n = self.count
+        for name, column in old.items():
+            getattr(self, name)[:n] = column[:n]
+
+    def __len__(self):
+        return self.count
+
+    def emit(self, x, y, dx=0.0, dy=0.0, life=60, kind=BILL, gravity=0.0,
+             rotation=0.0, spin=0.0, text=None, count=None):
+        """批量发射粒子；参数可以是标量或长度为count的数组"""
+        if count is None:
+            count = max(np.size(x), np.size(y), np.size(dx), np.size(dy), np.size(life), np.size(rotation))
+        if count <= 0:
+            return
+        start = self.count
+        end = start + count
+        if end > self.capacity:
+            self._grow(end)
+        self.x[start:end] = x
+        self.y[start:end] = y
+        self.prev_x[start:end] = self.x[start:end]
+        self.prev_y[start:end] = self.y[start:end]
+        self.dx[start:end] = dx
+        self.dy[start:end] = dy
+        self.life[start:end] = life
+        self.kind[start:end] = kind
+        self.gravity[start:end] = gravity
+        self.rotation[start:end] = rotation
+        self.spin[start:end] = spin
+        self.text[start:end] = text
+        self.count = end
+
+    def update(self):
+        """一次向量化积分所有粒子，并用一个掩码压缩掉死亡粒子"""
+        n = self.count
+        if n == 0:
+            return
+        self.life[:n] -= 1
+        self.prev_x[:n] = self.x[:n]
+        self.prev_y[:n] = self.y[:n]
+        self.x[:n] += self.dx[:n]
+        self.y[:n] += self.dy[:n]
+        self.dy[:n] += self.gravity[:n]
+        self.rotation[:n] += self.spin[:n]
+
+        alive = self.life[:n] > 0
+        remaining = int(np.count_nonzero(alive))
+        if remaining == n:
+            return
+        for name in self._columns():
+            column = getattr(self, name)
+            column[:remaining] = column[:n][alive]
+        # 释放死亡粒子上的文字引用
+        self.text[remaining:n] = None
+        self.count = remaining
+
+    def lerp_positions(self, alpha):
+        """按插值系数 alpha（0=上一tick，1=当前tick）返回所有粒子的渲染位置"""
+        n = self.count
+        prev_x = self.prev_x[:n]
+        prev_y = self.prev_y[:n]
+        return prev_x + (self.x[:n] - prev_x) * alpha, prev_y + (self.y[:n] - prev_y) * alpha
+
+    def clear(self):
+        self.text[:self.count] = None
+        self.count = 0
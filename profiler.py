@@ -0,0 +1,214 @@
+import csv
+import gc
+import json
+import os
+import time
+from collections import deque
+
+# 直方图分桶上限（毫秒），最后一个桶收集所有更慢的样本
+HISTOGRAM_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2, 4, 8, 16.6, 33.3, float("inf"))
+
+
+class _NullSection:
+    """禁用时返回的空计时区段：不做任何事，几乎没有开销"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NULL_SECTION = _NullSection()
+
+
+class _Section:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.profiler.add(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class FrameProfiler:
+    """按阶段计时的帧分析器：滚动窗口直方图 + 周期性导出到CSV/JSONL"""
+
+    def __init__(self, enabled=False, history=300, export_path=None, export_interval=5.0):
+        self.enabled = enabled
+        self.history = history
+        self.export_path = export_path
+        self.export_interval = export_interval
+        self.samples = {}  # 区段名 -> 最近每帧耗时（秒）的滚动窗口
+        self.counts = {}  # 最近一帧的实体数量
+        self.frame_times = deque(maxlen=history)
+        self._frame = {}  # 当前帧各区段累计耗时
+        self._last_frame_end = None
+        self._last_export = time.perf_counter()
+
+    def section(self, name):
+        """计时区段：with profiler.section("update"): ..."""
+        if not self.enabled:
+            return NULL_SECTION
+        return _Section(self, name)
+
+    def add(self, name, seconds):
+        # 同一帧内多次进入同一区段（例如一帧跑多个tick）时累加
+        self._frame[name] = self._frame.get(name, 0.0) + seconds
+
+    def sample(self, name, seconds):
+        """直接记录一个独立样本（例如单个输入动作的延迟），不按帧累加"""
+        if not self.enabled:
+            return
+        window = self.samples.get(name)
+        if window is None:
+            window = self.samples[name] = deque(maxlen=self.history)
+        window.append(seconds)
+
+    def end_frame(self, counts=None):
+        """结束一帧：把本帧的区段耗时并入滚动窗口，必要时导出"""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if self._last_frame_end is not None:
+            self.frame_times.append(now - self._last_frame_end)
+        self._last_frame_end = now
+
+        for name, seconds in self._frame.items():
+            window = self.samples.get(name)
+            if window is None:
+                window = self.samples[name] = deque(maxlen=self.history)
+            window.append(seconds)
+        self._frame = {}
+        if counts is not None:
+            self.counts = counts
+
+        if self.export_path and now - self._last_export >= self.export_interval:
+            self.export()
+            self._last_export = now
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        self._frame = {}
+        self._last_frame_end = None
+
+    def fps(self):
+        if not self.frame_times:
+            return 0.0
+        return len(self.frame_times) / sum(self.frame_times)
+
+    def stats(self, name):
+        window = self.samples.get(name)
+        if not window:
+            return {"mean_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+        ordered = sorted(window)
+        return {
+            "mean_ms": sum(ordered) / len(ordered) * 1000,
+            "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+            "max_ms": ordered[-1] * 1000,
+        }
+
+    def histogram(self, name):
+        """滚动窗口内的耗时分布：每个桶的样本数"""
+        buckets = [0] * len(HISTOGRAM_BUCKETS_MS)
+        for seconds in self.samples.get(name, ()):
+            ms = seconds * 1000
+            for i, limit in enumerate(HISTOGRAM_BUCKETS_MS):
+                if ms <= limit:
+                    buckets[i] += 1
+                    break
+        return buckets
+
+    def snapshot(self):
+        return {
+            "time": time.time(),
+            "fps": self.fps(),
+            "sections": {name: self.stats(name) for name in sorted(self.samples)},
+            "histograms": {name: self.histogram(name) for name in sorted(self.samples)},
+            "counts": dict(self.counts),
+        }
+
+    def export(self):
+        """追加一条指标记录；.csv 按区段一行，其他扩展名写JSONL"""
+        snapshot = self.snapshot()
+        if self.export_path.endswith(".csv"):
+            new_file = not os.path.exists(self.export_path)
+            with open(self.export_path, "a", newline="") as f:
+                writer = csv.writer(f)
+                if new_file:
+                    writer.writerow(["time", "fps", "section", "mean_ms", "p95_ms", "max_ms"])
+                for name, stats in snapshot["sections"].items():
+                    writer.writerow([f"{snapshot['time']:.3f}", f"{snapshot['fps']:.1f}", name,
+                                     f"{stats['mean_ms']:.4f}", f"{stats['p95_ms']:.4f}", f"{stats['max_ms']:.4f}"])
+        else:
+            with open(self.export_path, "a") as f:
+                f.write(json.dumps(snapshot) + "\n")
+
+
+class GcMonitor:
+    """用 gc.callbacks 统计每次垃圾回收的停顿；分析器启用时停顿也记为 gc.gen0/1/2 样本"""
+
+    def __init__(self, profiler=None):
+        self.profiler = profiler
+        self.collections = [0, 0, 0]
+        self.pause_total = [0.0, 0.0, 0.0]
+        self.pause_max = [0.0, 0.0, 0.0]
+        self._start = None
+        self.installed = False
+
+    def install(self):
+        if not self.installed:
+            gc.callbacks.append(self._callback)
+            self.installed = True
+        return self
+
+    def uninstall(self):
+        if self.installed:
+            gc.callbacks.remove(self._callback)
+            self.installed = False
+
+    def reset(self):
+        self.collections = [0, 0, 0]
+        self.pause_total = [0.0, 0.0, 0.0]
+        self.pause_max = [0.0, 0.0, 0.0]
+
+    def _callback(self, phase, info):
+        if phase == "start":
+            self._start = time.perf_counter()
+            return
+        if self._start is None:
+            return
+        pause = time.perf_counter() - self._start
+        self._start = None
+        generation = info["generation"]
+        self.collections[generation] += 1
+        self.pause_total[generation] += pause
+        self.pause_max[generation] = max(self.pause_max[generation], pause)
+        profiler = self.profiler
+        if profiler is not None and profiler.enabled:
+            profiler.sample(f"gc.gen{generation}", pause)
+
+    def stats(self):
+        """每一代的回收次数、总停顿和最长停顿（毫秒）"""
+        return {
+            f"gen{generation}": {
+                "collections": self.collections[generation],
+                "total_ms": self.pause_total[generation] * 1000,
+                "max_ms": self.pause_max[generation] * 1000,
+            }
+            for generation in range(3)
+        }
+
+
+# 未启用分析时使用的共享实例
+NULL_PROFILER = FrameProfiler(enabled=False)
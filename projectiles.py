@@ -0,0 +1,120 @@
+import numpy as np
+
+GRAVITY = 0.3
+
+
+class ProjectilePool:
+    """固定容量的投掷食物池：按列存储，积分、出界剔除和空槽回收都是一次批量操作"""
+
+    def __init__(self, capacity=4096):
+        self.capacity = capacity
+        self.x = np.zeros(capacity, dtype=np.float64)
+        self.y = np.zeros(capacity, dtype=np.float64)
+        # 上一tick的位置，用于渲染插值
+        self.prev_x = np.zeros(capacity, dtype=np.float64)
+        self.prev_y = np.zeros(capacity, dtype=np.float64)
+        self.dx = np.zeros(capacity, dtype=np.float64)
+        self.dy = np.zeros(capacity, dtype=np.float64)
+        self.food = np.zeros(capacity, dtype=np.int8)  # 食物类型编号（settings.FOOD_TYPES 的下标）
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.seq = np.zeros(capacity, dtype=np.int64)  # 投掷顺序，命中时优先最早投出的食物
+        # 空槽栈：栈顶在末尾，先用低编号槽位
+        self._free = np.arange(capacity - 1, -1, -1, dtype=np.int64)
+        self._free_top = capacity
+        self._next_seq = 0
+        self.high = 0  # 最高的存活槽位+1，批量操作只扫描 [:high]
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def spawn(self, x, y, dx, dy, food):
+        """占用一个空槽；池满时返回-1"""
+        if self._free_top == 0:
+            return -1
+        self._free_top -= 1
+        slot = int(self._free[self._free_top])
+        self.x[slot] = x
+        self.y[slot] = y
+        self.prev_x[slot] = x
+        self.prev_y[slot] = y
+        self.dx[slot] = dx
+        self.dy[slot] = dy
+        self.food[slot] = food
+        self.alive[slot] = True
+        self.seq[slot] = self._next_seq
+        self._next_seq += 1
+        self.count += 1
+        if slot >= self.high:
+            self.high = slot + 1
+        return slot
+
+    def release(self, slots):
+        """批量回收槽位"""
+        slots = np.asarray(slots, dtype=np.int64)
+        if slots.size == 0:
+            return
+        self.alive[slots] = False
+        self.count -= int(slots.size)
+        if self.alive[self.high - 1]:
+            # 回收的槽位都在 high 以下，直接压栈
+            top = self._free_top
+            self._free[top:top + slots.size] = slots[::-1]
+            self._free_top = top + slots.size
+            return
+        # 最高的槽位空了：high 收缩到最高的存活槽位，一阵密集投掷过后批量操作不再扫描已回收的尾部；
+        # 空槽栈按编号重建（低编号在栈顶），新食物先填低槽位，high 不会马上又涨回去
+        live = np.flatnonzero(self.alive[:self.high])
+        self.high = int(live[-1]) + 1 if live.size else 0
+        free = np.flatnonzero(~self.alive)
+        self._free[:free.size] = free[::-1]
+        self._free_top = free.size
+
+    def update(self, width, height):
+        """批量积分所有食物，并剔除落地或出界的食物"""
+        h = self.high
+        if self.count == 0:
+            return
+        alive = self.alive[:h]
+        self.prev_x[:h] = self.x[:h]
+        self.prev_y[:h] = self.y[:h]
+        self.x[:h] += self.dx[:h]
+        self.y[:h] += self.dy[:h]
+        self.dy[:h] += GRAVITY
+
+        x = self.x[:h]
+        out = alive & ((self.y[:h] > height) | (x > width) | (x < 0))
+        self.release(np.flatnonzero(out))
+
+    def first_hit(self, center_x, center_y, half_width, half_height, food=None):
+        """返回与矩形范围重叠的最早投出的食物槽位（可限定食物类型），没有则返回-1"""
+        h = self.high
+        if self.count == 0:
+            return -1
+        mask = (self.alive[:h]
+                & (np.abs(self.x[:h] - center_x) < half_width)
+                & (np.abs(self.y[:h] - center_y) < half_height))
+        if food is not None:
+            mask &= self.food[:h] == food
+        candidates = np.flatnonzero(mask)
+        if candidates.size == 0:
+            return -1
+        return int(candidates[np.argmin(self.seq[candidates])])
+
+    def lerp_positions(self, slots, alpha):
+        """按插值系数 alpha（0=上一tick，1=当前tick）返回指定槽位的渲染位置"""
+        prev_x = self.prev_x[slots]
+        prev_y = self.prev_y[slots]
+        return prev_x + (self.x[slots] - prev_x) * alpha, prev_y + (self.y[slots] - prev_y) * alpha
+
+    def live_slots(self):
+        """按投掷顺序返回存活食物的槽位"""
+        slots = np.flatnonzero(self.alive[:self.high])
+        return slots[np.argsort(self.seq[slots], kind="stable")]
+
+    def clear(self):
+        self.alive[:] = False
+        self._free = np.arange(self.capacity - 1, -1, -1, dtype=np.int64)
+        self._free_top = self.capacity
+        self.high = 0
+        self.count = 0
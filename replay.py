@@ -0,0 +1,114 @@
+import struct
+import sys
+import time
+import zlib
+from simulation import Simulation, SimInput
+
+# 录像文件格式：
+#   文件头  <4sHQIiid  魔数、版本、种子、tick数、最终分数、最终金钱、最终评分
+#   正文    zlib压缩的逐tick记录：<bbhhB（方向键、食物框、瞄准点x/y、投掷次数）+ 每次投掷 <hh
+MAGIC = b"FFRP"
+VERSION = 1
+HEADER = struct.Struct("<4sHQIiid")
+TICK = struct.Struct("<bbhhB")
+THROW = struct.Struct("<hh")
+
+
+class ReplayError(Exception):
+    pass
+
+
+class InputRecorder:
+    """逐tick记录模拟输入，结束时写成紧凑的二进制文件"""
+
+    def __init__(self, seed):
+        self.seed = seed
+        self.ticks = 0
+        self._body = bytearray()
+
+    def record(self, inputs):
+        aim_x, aim_y = inputs.aim if inputs.aim is not None else (0, 0)
+        lane = -1 if inputs.lane is None else inputs.lane
+        throws = list(inputs.throws)
+        self._body += TICK.pack(inputs.move, lane, int(aim_x), int(aim_y), len(throws))
+        for throw_x, throw_y in throws:
+            self._body += THROW.pack(int(throw_x), int(throw_y))
+        self.ticks += 1
+
+    def save(self, path, sim):
+        """写出录像，并附上最终分数/金钱/评分用于回放校验"""
+        header = HEADER.pack(MAGIC, VERSION, self.seed, self.ticks, sim.score, sim.money, sim.rating)
+        with open(path, "wb") as f:
+            f.write(header)
+            f.write(zlib.compress(bytes(self._body)))
+
+
+class Recording:
+    """读取后的录像：种子、最终结果和逐tick输入"""
+
+    def __init__(self, seed, ticks, score, money, rating, inputs):
+        self.seed = seed
+        self.ticks = ticks
+        self.score = score
+        self.money = money
+        self.rating = rating
+        self.inputs = inputs
+
+
+def load_recording(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < HEADER.size:
+        raise ReplayError(f"{path}: file too short")
+    magic, version, seed, ticks, score, money, rating = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ReplayError(f"{path}: not a Food Flinger recording (version {version})")
+    body = zlib.decompress(data[HEADER.size:])
+
+    inputs = []
+    offset = 0
+    for _ in range(ticks):
+        move, lane, aim_x, aim_y, n_throws = TICK.unpack_from(body, offset)
+        offset += TICK.size
+        throws = []
+        for _ in range(n_throws):
+            throws.append(THROW.unpack_from(body, offset))
+            offset += THROW.size
+        inputs.append(SimInput(move=move, lane=None if lane < 0 else lane,
+                               aim=(aim_x, aim_y), throws=throws))
+    return Recording(seed, ticks, score, money, rating, inputs)
+
+
+def replay(recording):
+    """不开窗口，以CPU最快速度回放录像，返回最终的模拟对象"""
+    sim = Simulation(seed=recording.seed)
+    for inputs in recording.inputs:
+        sim.step(inputs)
+    return sim
+
+
+def verify(path):
+    """回放录像并与录制时的最终分数/金钱/评分比对，一致返回True"""
+    recording = load_recording(path)
+    start = time.perf_counter()
+    sim = replay(recording)
+    elapsed = time.perf_counter() - start
+
+    expected = (recording.score, recording.money, recording.rating)
+    actual = (sim.score, sim.money, sim.rating)
+    rate = recording.ticks / elapsed if elapsed > 0 else float("inf")
+    print(f"Replayed {recording.ticks} ticks in {elapsed:.3f}s ({rate:.0f} ticks/s)")
+    print(f"Recorded score/money/rating: {expected}")
+    print(f"Replayed score/money/rating: {actual}")
+    if actual != expected:
+        print("MISMATCH")
+        return False
+    print("OK")
+    return True
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("usage: python replay.py RECORDING")
+        sys.exit(2)
+    sys.exit(0 if verify(sys.argv[1]) else 1)
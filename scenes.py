@@ -0,0 +1,189 @@
+import pygame
+from settings import SCREEN_WIDTH, SCREEN_HEIGHT, RENDER_FPS, WHITE, BLACK, GRAY, RED, YELLOW, ORANGE
+
+# 后台线程投递的事件：成绩库的排行榜或排名查询有了新结果，空闲场景需要重画
+SCORES_CHANGED = pygame.USEREVENT + 1
+
+# 窗口被遮挡后重新显示时需要重画
+EXPOSE_EVENTS = (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED, pygame.WINDOWRESTORED)
+
+
+def post_scores_changed(*_):
+    """可以在任何线程调用；pygame已退出时忽略"""
+    try:
+        pygame.event.post(pygame.event.Event(SCORES_CHANGED))
+    except pygame.error:
+        pass
+
+
+class Scene:
+    """场景基类：空闲场景（idle=True）画面静止，主循环用 pygame.event.wait 阻塞等待下一个事件"""
+
+    idle = True
+
+    def __init__(self, game):
+        self.game = game
+        self.needs_redraw = True
+
+    def enter(self):
+        pass
+
+    def exit(self):
+        pass
+
+    def run_frame(self):
+        """空闲场景：需要时重画一次，然后阻塞到有事件为止（不占CPU）"""
+        if self.needs_redraw:
+            self.needs_redraw = False
+            self.draw()
+            self.game.present_static()
+        self.handle_event(pygame.event.wait())
+        for event in pygame.event.get():
+            if self.game.scene is not self:
+                break
+            self.handle_event(event)
+
+    def handle_event(self, event):
+        if event.type == pygame.QUIT:
+            self.game.running = False
+        elif event.type == SCORES_CHANGED or event.type in EXPOSE_EVENTS:
+            self.needs_redraw = True
+
+    def draw(self):
+        pass
+
+    def blit_centered(self, text, size, color, y):
+        surface = self.game.text_cache.render(text, size, color)
+        self.game.screen.blit(surface, (SCREEN_WIDTH//2 - surface.get_width()//2, y))
+
+
+def _is_confirm(event):
+    return ((event.type == pygame.KEYDOWN and event.key in (pygame.K_SPACE, pygame.K_RETURN))
+            or (event.type == pygame.MOUSEBUTTONDOWN and event.button == 1))
+
+
+class TitleScene(Scene):
+    """标题画面：最高分排行榜，点击或空格开始"""
+
+    def handle_event(self, event):
+        if _is_confirm(event):
+            self.game.start_game()
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+            self.game.running = False
+        else:
+            super().handle_event(event)
+
+    def draw(self):
+        screen = self.game.screen
+        screen.blit(self.game.background_image, (0, 0))
+        shade = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
+        shade.fill((0, 0, 0, 170))
+        screen.blit(shade, (0, 0))
+        self.blit_centered("FOOD FLINGER", 96, YELLOW, 60)
+        self.blit_centered("Click or press SPACE to start", 36, WHITE, 170)
+
+        top = self.game.scores.top(5)
+        if top:
+            self.blit_centered("Top Scores", 36, ORANGE, 250)
+            for i, row in enumerate(top):
+                line = f"{i + 1}.  {row['score']:>6}    max combo {row['max_combo']}x    {row['customers_served']} served"
+                self.blit_centered(line, 28, WHITE, 295 + i * 32)
+        self.blit_centered("ESC to exit", 28, GRAY, SCREEN_HEIGHT - 50)
+
+
+class PlayingScene(Scene):
+    """游戏进行中：固定步长模拟 + 插值渲染，每帧都要运行
+
+    多线程模式下模拟在工作线程里运行，这里只处理输入并画最新的快照
+    """
+
+    idle = False
+
+    def enter(self):
+        self.game.timestep.reset()
+        self.game.invalidate_screen()
+        # 暂停期间的按键状态已不可靠，回到游戏时清空输入队列
+        self.game.input.reset()
+        self.game.resume_simulation()
+
+    def exit(self):
+        self.game.pause_simulation()
+
+    def run_frame(self):
+        game = self.game
+        prof = game.profiler
+        with prof.section("handle_events"):
+            game.handle_events()
+        if game.scene is not self or not game.running:
+            return
+        if game.sim_thread is None:
+            with prof.section("update"):
+                for _ in range(game.timestep.advance()):
+                    game.update()
+                    if not game.sim.running:
+                        break
+        else:
+            tick_times = game.sim_thread.take_tick_times()
+            if prof.enabled:
+                prof.add("update", sum(tick_times))
+        with prof.section("draw"):
+            game.draw(game.frame_alpha(), present=False)
+        with prof.section("present"):
+            game.present()
+        prof.end_frame(game.entity_counts() if prof.enabled else None)
+        if not game.view().running:
+            game.change_scene(GameOverScene(game, game.end_game()))
+            return
+        game.clock.tick(RENDER_FPS)
+
+
+class PausedScene(Scene):
+    """暂停：保留最后一帧的画面并加暗，模拟时钟停止"""
+
+    def handle_event(self, event):
+        if event.type == pygame.KEYDOWN and event.key in (pygame.K_ESCAPE, pygame.K_p):
+            self.game.change_scene(PlayingScene(self.game))
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_q:
+            self.game.end_game()
+            self.game.change_scene(TitleScene(self.game))
+        else:
+            super().handle_event(event)
+
+    def draw(self):
+        game = self.game
+        game.invalidate_screen()
+        game.draw(game.frame_alpha(), present=False)
+        shade = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
+        shade.fill((0, 0, 0, 140))
+        game.screen.blit(shade, (0, 0))
+        self.blit_centered("PAUSED", 96, WHITE, SCREEN_HEIGHT//2 - 110)
+        self.blit_centered("P / ESC: resume    Q: quit to title", 36, GRAY, SCREEN_HEIGHT//2)
+
+
+class GameOverScene(Scene):
+    """结算画面：本局分数、历史最高分和排名（排名在后台查询完成后显示）"""
+
+    def __init__(self, game, rank):
+        super().__init__(game)
+        self.rank = rank
+        rank.add_done_callback(post_scores_changed)
+
+    def handle_event(self, event):
+        if _is_confirm(event):
+            self.game.start_game()
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+            self.game.change_scene(TitleScene(self.game))
+        else:
+            super().handle_event(event)
+
+    def draw(self):
+        sim = self.game.sim
+        self.game.screen.fill(BLACK)
+        if sim.game_over_message:
+            self.blit_centered(sim.game_over_message, 64, RED, SCREEN_HEIGHT//2 - 100)
+        self.blit_centered(f"Your Score: {sim.score}", 36, WHITE, SCREEN_HEIGHT//2)
+        self.blit_centered(f"High Score: {self.game.scores.best()}", 36, YELLOW, SCREEN_HEIGHT//2 + 50)
+        rank = self.rank
+        if rank.done() and rank.exception() is None:
+            self.blit_centered(f"Better than {rank.result():.0%} of your games", 28, GRAY, SCREEN_HEIGHT//2 + 90)
+        self.blit_centered("SPACE: play again    ESC: title", 36, GRAY, SCREEN_HEIGHT//2 + 140)
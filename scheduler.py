@@ -0,0 +1,119 @@
+import heapq
+
+# 计时器所在的阶段：每个tick内按数值从小到大进入，与 Simulation.update 中各步骤的顺序一致
+PHASE_MOVE = 0  # 切换食物框的按键间隔
+PHASE_SPAWN = 1  # 生成顾客
+PHASE_CUSTOMERS = 2  # 顾客失去耐心
+PHASE_GIANT = 3  # 巨人顾客离开
+PHASE_COMBO = 4  # 连击清零
+PHASE_END = 5  # 两个tick之间
+
+
+class Timer:
+    """一个倒计时：相当于每个tick在 phase 阶段减1、减到0时调用 callback(*args) 的计数器"""
+
+    __slots__ = ("scheduler", "deadline", "phase", "callback", "args", "active")
+
+    def __init__(self, scheduler, deadline, phase, callback, args):
+        self.scheduler = scheduler
+        self.deadline = deadline  # 触发的tick
+        self.phase = phase
+        self.callback = callback
+        self.args = args
+        self.active = True
+
+    def remaining(self):
+        """计数器当前的值（界面显示的剩余耐心、倒计时等都由此算出）"""
+        return self.scheduler.remaining(self)
+
+    def cancel(self):
+        self.scheduler.cancel(self)
+
+    def fire(self):
+        self.callback(*self.args)
+
+
+class Scheduler:
+    """截止时间堆：计时器只在到期时才被处理，每tick的开销与到期的计时器数量有关，与计时器总数无关
+
+    模拟每进入一个阶段调用一次 run(phase)（或 pop_due(phase) 自己决定触发顺序）；
+    取消的计时器留在堆里，出堆时跳过，取消的太多时整体重建
+    """
+
+    def __init__(self):
+        self.now = -1  # 正在处理（或最近处理完）的tick
+        self.phase = PHASE_END
+        self._heap = []
+        self._seq = 0  # 同一tick同一阶段到期时按加入顺序触发
+        self._cancelled = 0
+        self.fired = 0
+
+    def __len__(self):
+        return len(self._heap) - self._cancelled
+
+    def begin_tick(self):
+        self.now += 1
+        self.phase = -1
+
+    def end_tick(self):
+        self.phase = PHASE_END
+
+    def schedule(self, count, phase, callback, *args):
+        """加入一个从 count 开始倒数的计时器（count >= 1）
+
+        计数器在本tick还没进入 phase 时本tick就减1，否则从下一个tick开始
+        """
+        first = self.now if self.phase < phase else self.now + 1
+        timer = Timer(self, first + max(1, count) - 1, phase, callback, args)
+        heapq.heappush(self._heap, (timer.deadline, phase, self._seq, timer))
+        self._seq += 1
+        return timer
+
+    def reschedule(self, timer, count):
+        """把计时器重新设为从 count 倒数（返回新的计时器）"""
+        self.cancel(timer)
+        return self.schedule(count, timer.phase, timer.callback, *timer.args)
+
+    def cancel(self, timer):
+        if not timer.active:
+            return
+        timer.active = False
+        self._cancelled += 1
+        # 取消的条目超过一半时重建堆，避免长时间运行后堆里堆满已取消的计时器
+        if self._cancelled > 64 and self._cancelled * 2 > len(self._heap):
+            self._heap = [entry for entry in self._heap if entry[3].active]
+            heapq.heapify(self._heap)
+            self._cancelled = 0
+
+    def remaining(self, timer):
+        """计数器当前的值；已取消或已触发的计时器为0"""
+        if not timer.active:
+            return 0
+        counted = self.now if self.phase >= timer.phase else self.now - 1
+        return timer.deadline - counted
+
+    def pop_due(self, phase):
+        """进入阶段 phase：取出本阶段到期的计时器（按到期顺序），由调用方触发"""
+        self.phase = phase
+        now = self.now
+        heap = self._heap
+        if not heap or heap[0][0] > now:
+            return ()  # 大多数tick没有计时器到期
+        due = []
+        while heap:
+            deadline, timer_phase, _, timer = heap[0]
+            if deadline > now or (deadline == now and timer_phase > phase):
+                break
+            heapq.heappop(heap)
+            if not timer.active:
+                self._cancelled -= 1
+                continue
+            timer.active = False
+            due.append(timer)
+        self.fired += len(due)
+        return due
+
+    def run(self, phase):
+        """进入阶段 phase 并触发本阶段到期的所有计时器"""
+        for timer in self.pop_due(phase):
+            timer.fire()
@@ -0,0 +1,206 @@
+import os
+import time
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+
+SCORES_PATH = "scores.db"
+LEGACY_HIGHSCORE_PATH = "highscore.txt"
+ENDING_QUIT = "quit"  # 玩家中途关闭窗口（其他结局见 simulation.ENDING_*）
+ENDING_IMPORTED = "imported"  # 从旧版 highscore.txt 导入的记录
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    played_at REAL NOT NULL,
+    seed INTEGER,
+    score INTEGER NOT NULL,
+    max_combo INTEGER NOT NULL,
+    customers_served INTEGER NOT NULL,
+    ending TEXT NOT NULL,
+    duration REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS games_score ON games (score);
+"""
+COLUMNS = ("played_at", "seed", "score", "max_combo", "customers_served", "ending", "duration")
+
+_STOP = object()
+
+
+class ScoreStore:
+    """每局成绩的持久化存储（SQLite），所有磁盘读写都在后台线程完成
+
+    - record() 只把记录放进队列，立即返回；后台线程逐条写入，每条一个事务（原子提交）
+    - top() / best() 读取内存中的排行榜缓存，任何时候都不阻塞
+    - percentile_rank() / score_at() 返回 Future，由后台线程借助分数索引计算
+    """
+
+    def __init__(self, path=SCORES_PATH, cache_size=20, legacy_path=LEGACY_HIGHSCORE_PATH, on_change=None):
+        self.path = path
+        self.cache_size = cache_size
+        self.legacy_path = legacy_path
+        self.on_change = on_change  # 排行榜缓存更新后在后台线程中调用（例如投递一个pygame事件）
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._top = []  # 排行榜缓存：按分数从高到低的记录字典
+        self.ready = threading.Event()  # 后台线程打开数据库并加载好缓存后置位
+        self.error = None  # 后台线程遇到的最后一个错误（存储失败不影响游戏）
+        self.written = 0
+        self._thread = threading.Thread(target=self._run, name="score-store", daemon=True)
+        self._thread.start()
+
+    def record(self, score, max_combo, customers_served, ending, duration, seed=None):
+        """记录一局成绩（非阻塞）；排行榜缓存立即更新"""
+        row = {
+            "played_at": time.time(),
+            "seed": seed,
+            "score": score,
+            "max_combo": max_combo,
+            "customers_served": customers_served,
+            "ending": ending,
+            "duration": duration,
+        }
+        with self._lock:
+            self._top = _merge_top(self._top, [row], self.cache_size)
+        self._queue.put(("insert", row))
+
+    def top(self, k=10):
+        """最高的k条记录（来自内存缓存，最多 cache_size 条）"""
+        with self._lock:
+            return list(self._top[:k])
+
+    def best(self):
+        """历史最高分；没有记录时为0"""
+        with self._lock:
+            return self._top[0]["score"] if self._top else 0
+
+    def percentile_rank(self, score):
+        """异步查询：严格低于 score 的对局所占比例（0~1）"""
+        return self._submit(_percentile_rank, score)
+
+    def score_at(self, fraction):
+        """异步查询：给定分位（0~1）处的分数；没有记录时为None"""
+        return self._submit(_score_at, fraction)
+
+    def count(self):
+        """异步查询：已保存的对局数"""
+        return self._submit(lambda conn: conn.execute("SELECT COUNT(*) FROM games").fetchone()[0])
+
+    def _submit(self, query, *args):
+        future = Future()
+        self._queue.put(("query", query, args, future))
+        return future
+
+    def flush(self, timeout=None):
+        """等待队列中已有的写入和查询全部完成"""
+        return self._submit(lambda conn: None).result(timeout)
+
+    def close(self, timeout=5.0):
+        """写完队列中剩余的记录后关闭后台线程"""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+
+    def _run(self):
+        try:
+            conn = self._open()
+        except sqlite3.Error as e:
+            self.error = e
+            self.ready.set()
+            self._drain_without_db()
+            return
+        self.ready.set()
+        try:
+            while True:
+                item = self._queue.get()
+                if item is _STOP:
+                    break
+                if item[0] == "insert":
+                    self._insert(conn, item[1])
+                else:
+                    _, query, args, future = item
+                    if future.set_running_or_notify_cancel():
+                        try:
+                            future.set_result(query(conn, *args))
+                        except Exception as e:
+                            future.set_exception(e)
+        finally:
+            conn.close()
+
+    def _open(self):
+        conn = sqlite3.connect(self.path)
+        conn.executescript(SCHEMA)
+        empty = conn.execute("SELECT COUNT(*) FROM games").fetchone()[0] == 0
+        if empty:
+            self._import_legacy(conn)
+        self._refresh_top(conn)
+        return conn
+
+    def _import_legacy(self, conn):
+        """新建的库：把旧版 highscore.txt 中的最高分导入为一条记录"""
+        if not self.legacy_path or not os.path.exists(self.legacy_path):
+            return
+        try:
+            with open(self.legacy_path) as f:
+                score = int(f.read().strip())
+        except (OSError, ValueError):
+            return
+        self._insert(conn, {"played_at": os.path.getmtime(self.legacy_path), "seed": None, "score": score,
+                            "max_combo": 0, "customers_served": 0, "ending": ENDING_IMPORTED, "duration": 0.0})
+
+    def _insert(self, conn, row):
+        try:
+            with conn:  # 一条记录一个事务，异常时自动回滚
+                conn.execute(f"INSERT INTO games ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                             [row[column] for column in COLUMNS])
+            self.written += 1
+        except sqlite3.Error as e:
+            self.error = e
+            return
+        self._refresh_top(conn)
+
+    def _refresh_top(self, conn):
+        rows = conn.execute(f"SELECT {', '.join(COLUMNS)} FROM games ORDER BY score DESC LIMIT ?",
+                            (self.cache_size,)).fetchall()
+        stored = [dict(zip(COLUMNS, row)) for row in rows]
+        with self._lock:
+            # 与缓存合并：保留还没写入数据库的新记录
+            self._top = _merge_top(stored, self._top, self.cache_size)
+        if self.on_change is not None:
+            self.on_change()
+
+    def _drain_without_db(self):
+        """数据库打不开时继续消费队列，让查询得到异常而不是永远等待"""
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            if item[0] == "query":
+                future = item[3]
+                if future.set_running_or_notify_cancel():
+                    future.set_exception(self.error)
+
+
+def _merge_top(first, second, limit):
+    """合并两份排行榜（按 played_at 去重），按分数从高到低取前 limit 条"""
+    merged = {}
+    for row in first + second:
+        merged.setdefault((row["played_at"], row["score"]), row)
+    return sorted(merged.values(), key=lambda row: row["score"], reverse=True)[:limit]
+
+
+def _percentile_rank(conn, score):
+    total = conn.execute("SELECT COUNT(*) FROM games").fetchone()[0]
+    if total == 0:
+        return 0.0
+    below = conn.execute("SELECT COUNT(*) FROM games WHERE score < ?", (score,)).fetchone()[0]
+    return below / total
+
+
+def _score_at(conn, fraction):
+    total = conn.execute("SELECT COUNT(*) FROM games").fetchone()[0]
+    if total == 0:
+        return None
+    offset = min(total - 1, max(0, int(fraction * total)))
+    return conn.execute("SELECT score FROM games ORDER BY score LIMIT 1 OFFSET ?", (offset,)).fetchone()[0]
@@ -0,0 +1,30 @@
+from enum import Enum
+
+# 游戏常量
+SCREEN_WIDTH = 1200
+SCREEN_HEIGHT = 600
+FPS = 60  # 模拟tick频率（所有以帧为单位的常量都按这个频率计）
+RENDER_FPS = 120  # 渲染帧率上限（0表示不限制）
+THROW_SPEED = 17  # 投掷初速度（像素/tick）
+THROWN_FOOD_SIZE = 50  # 飞行中食物图片的边长（上千个同时在空中时填充像素量仍在帧预算内）
+
+# 颜色定义
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+GRAY = (128, 128, 128)
+BROWN = (139, 69, 19)
+GREEN = (0, 255, 0)
+RED = (255, 0, 0)
+BLUE = (0, 0, 255)
+YELLOW = (255, 255, 0)
+ORANGE = (255, 165, 0)
+
+# 食物类型枚举
+class FoodType(Enum):
+    BURGER = "burger"
+    FRIES = "fries"
+    COLA = "cola"
+
+# 食物类型编号（投掷池等数组中用整数表示食物类型）
+FOOD_TYPES = list(FoodType)
+FOOD_CODES = {food_type: code for code, food_type in enumerate(FOOD_TYPES)}
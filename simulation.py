@@ -0,0 +1,514 @@
+import random
+import math
+import numpy as np
+import particles
+from particles import ParticleSystem
+from projectiles import ProjectilePool
+from collision import CollisionSystem
+from entities import Customer, GiantCustomer, EntityPool
+from scheduler import Scheduler, PHASE_MOVE, PHASE_SPAWN, PHASE_CUSTOMERS, PHASE_GIANT, PHASE_COMBO
+from profiler import NULL_PROFILER
+from settings import (SCREEN_WIDTH, SCREEN_HEIGHT, THROW_SPEED, BROWN, YELLOW, RED, BLUE, ORANGE,
+                      FoodType, FOOD_CODES)
+
+
+# 对局结束原因
+ENDING_BANKRUPT = "bankrupt"
+ENDING_BAD_REVIEWS = "bad_reviews"
+
+KEY_DELAY = 15  # 切换食物框后的按键间隔（tick）
+COMBO_TIME = 180  # 连击计时：3秒内没有新的成功，连击清零
+GIANT_TIME = 600  # 巨人顾客存在10秒（60fps * 10）
+
+
+class SimInput:
+    """一帧的输入：方向键状态、直接选择的食物框、瞄准点和本帧的投掷"""
+
+    def __init__(self, move=0, lane=None, aim=None, throws=()):
+        self.move = move  # -1 = A（向左），1 = D（向右），0 = 不动
+        self.lane = lane  # 直接指定食物框索引（None表示不指定）
+        self.aim = aim  # 当前瞄准点 (x, y)
+        self.throws = throws  # 本帧每次投掷的瞄准点列表
+
+
+class Simulation:
+    """不依赖pygame的游戏规则核心，通过 step(inputs) 推进一帧"""
+
+    def __init__(self, seed=None):
+        # 每局独立的随机数生成器：相同种子+相同输入 => 完全相同的对局
+        if seed is None:
+            seed = random.randrange(2**32)
+        self.seed = seed
+        self.rng = random.Random(seed)
+
+        self.running = True
+        self.game_over_message = None
+        self.ending = None  # 结束原因（ENDING_*），进行中为None
+        self.tick_count = 0
+
+        # 游戏状态
+        self.counter_height = 120
+        self.counter_width = 600
+        self.counter_x = 0
+        self.counter_y = SCREEN_HEIGHT - self.counter_height
+        # 玩家和食物框尺寸更大
+        self.player_width = 150  # 从120增大到150
+        self.player_height = 150  # 从120增大到150
+        self.player_y = self.counter_y - 75  # 玩家站在柜台正上方（调整位置以适应更大的员工）
+
+        self.current_food_box = 0  # 当前选择的食物框索引
+        # 食物框放在柜台上方（而不是悬空）
+        food_box_y = self.counter_y + 10  # 放在柜台顶部
+        food_box_gap = self.counter_width // 4
+        self.food_boxes = [
+            {"x": self.counter_x + food_box_gap * 1, "y": food_box_y, "type": FoodType.BURGER, "color": BROWN},
+            {"x": self.counter_x + food_box_gap * 2, "y": food_box_y, "type": FoodType.FRIES, "color": YELLOW},
+            {"x": self.counter_x + food_box_gap * 3, "y": food_box_y, "type": FoodType.COLA, "color": RED}
+        ]
+
+        # 所有倒计时（顾客生成、耐心、连击、巨人、按键间隔）都登记在调度器里，只在到期时处理
+        self.timers = Scheduler()
+        self.key_timer = None  # 按键间隔计时器（None表示可以切换）
+
+        # 顾客系统
+        self.customers = [None, None, None]  # 3个固定位置
+        self.spawn_timer = self.timers.schedule(1, PHASE_SPAWN, self.spawn_customer)  # 第一个tick就生成顾客
+        self._spawn_suspended = None  # 巨人在场时暂停生成：暂停时计数器的剩余值
+        self.customers_served = 0  # 已服务的顾客数量（巨人出现时清零）
+        self.total_served = 0  # 整局累计服务的顾客数量
+        self.giant_customer = None  # 巨人顾客（特殊）
+        # 离场的顾客放回对象池，下一个顾客重用（不再每次生成新字典）
+        self.customer_pool = EntityPool(Customer)
+        self.giant_pool = EntityPool(GiantCustomer)
+
+        # 顾客位置定义
+        self.customer_positions = [
+            {"x": 800, "y": 450},   # 位置1
+            {"x": 900, "y": 450},   # 位置2
+            {"x": 1000, "y": 450}   # 位置3
+        ]
+
+        # 投掷系统（固定容量的食物池）
+        self.thrown_foods = ProjectilePool()
+        # 碰撞检测（空间哈希，顾客位置可扩展到几十个）
+        self.collisions = CollisionSystem(self.thrown_foods)
+
+        # 分数
+        self.score = 0
+        self.money = 10  # 初始10元
+
+        # 连击系统
+        self.combo = 0  # 当前连击数
+        self.max_combo = 0  # 最高连击数
+        self.combo_reset_timer = None  # 连击计时器（一段时间不操作连击消失）
+
+        # 难度系统
+        self.difficulty_level = 1  # 难度等级
+        self.base_customer_spawn_delay = 180  # 基础生成延迟
+        self.base_customer_patience = 300  # 基础耐心值
+        self.customers_per_level = 10  # 每服务多少顾客难度+1
+        self.spawn_delay_step = 15  # 每级难度减少的生成延迟
+        self.patience_step = 20  # 每级难度减少的耐心值
+
+        # 经济和奖励关卡
+        self.throw_cost = 3  # 每次出餐的成本
+        self.giant_trigger = 15  # 服务多少顾客后出现巨人
+
+        # 店铺评分系统
+        self.rating = 5.0  # 当前评分（0-5星）
+        self.success_count = 0  # 成功出餐计数（每3次加半颗星）
+        self.fail_count = 0  # 失败计数（每次扣半颗星）
+
+        # 特效系统（钞票、文字和生气表情都存放在粒子数组中）
+        self.effects = ParticleSystem()
+        self.effect_rng = np.random.default_rng(seed)  # 特效速度的随机数生成器
+
+        # 性能分析（默认禁用，开销可忽略）
+        self.profiler = NULL_PROFILER
+
+    @property
+    def combo_timer(self):
+        """连击剩余时间（tick），由计时器算出"""
+        timer = self.combo_reset_timer
+        return timer.remaining() if timer is not None else 0
+
+    @property
+    def customer_spawn_timer(self):
+        """距离下一次尝试生成顾客还有几个tick（0表示下一个tick就生成）"""
+        if self._spawn_suspended is not None:
+            return self._spawn_suspended - 1
+        return max(0, self.spawn_timer.remaining() - 1)
+
+    @customer_spawn_timer.setter
+    def customer_spawn_timer(self, value):
+        count = max(0, value) + 1
+        if self._spawn_suspended is not None:
+            self._spawn_suspended = count
+            return
+        self.spawn_timer.cancel()
+        self.spawn_timer = self.timers.schedule(count, PHASE_SPAWN, self.spawn_customer)
+
+    def step(self, inputs=None):
+        """推进一帧：先处理投掷（与原先事件处理顺序一致），再更新规则"""
+        if inputs is None:
+            inputs = SimInput()
+        if inputs.lane is not None:
+            self.current_food_box = max(0, min(len(self.food_boxes) - 1, inputs.lane))
+        for aim in inputs.throws:
+            self.throw_food(aim)
+        self.update(inputs.move)
+        self.tick_count += 1
+
+    def move_player(self, move):
+        # 使用连续按键检测，添加延迟避免切换太快
+        self.timers.run(PHASE_MOVE)
+        if self.key_timer is None and move != 0:
+            if move < 0:
+                self.current_food_box = max(0, self.current_food_box - 1)
+            else:
+                self.current_food_box = min(len(self.food_boxes) - 1, self.current_food_box + 1)
+            # 间隔在第 KEY_DELAY 个tick数完，再下一个tick才能再次切换
+            self.key_timer = self.timers.schedule(KEY_DELAY + 1, PHASE_MOVE, self._key_ready)
+
+    def _key_ready(self):
+        self.key_timer = None
+
+    def launch_point(self):
+        """食物从当前食物框出手的位置"""
+        return self.food_boxes[self.current_food_box]["x"], self.player_y - 20
+
+    def throw_food(self, aim):
+        # 从当前选择的食物框投掷食物
+        box = self.food_boxes[self.current_food_box]
+        start_x, start_y = self.launch_point()
+        mouse_x, mouse_y = aim
+
+        # 计算投掷方向
+        dx = mouse_x - start_x
+        dy = mouse_y - start_y
+        distance = math.sqrt(dx*dx + dy*dy)
+
+        if distance > 0:
+            # 标准化方向向量
+            dx /= distance
+            dy /= distance
+
+            # 创建投掷的食物（食物池满时本次投掷无效）
+            slot = self.thrown_foods.spawn(start_x, start_y, dx * THROW_SPEED, dy * THROW_SPEED,
+                                           FOOD_CODES[box["type"]])
+            if slot < 0:
+                return
+
+            # 每次出餐扣除成本（默认3元）
+            self.money -= self.throw_cost
+            # 显示扣除成本的文字特效
+            self.effects.emit(box["x"], self.player_y - 60, dy=-2, life=40,
+                              kind=particles.TEXT, text=f"- ${self.throw_cost} (cost)")
+
+    def create_money_effect(self, x, y, combo_multiplier=1):
+        """创建金钱特效：飞出的钞票和文字"""
+        # 创建3-5张飞出的钞票
+        num_bills = self.rng.randint(3, 5)
+        self.effects.emit(x, y,
+                          dx=self.effect_rng.uniform(-3, 3, num_bills),  # 随机水平速度
+                          dy=self.effect_rng.uniform(-8, -4, num_bills),  # 向上飞
+                          life=60,  # 生命周期（帧数）
+                          kind=particles.BILL, gravity=particles.GRAVITY)
+
+        # 计算实际得分和金钱（分数受combo影响，金钱不受影响）
+        score_gained = 10 * combo_multiplier
+        money_gained = 5
+        # 创建文字特效（显示连击倍率）
+        if combo_multiplier > 1:
+            text = f"+{score_gained} Score  +$5  {combo_multiplier}x COMBO!"
+        else:
+            text = f"+{score_gained} Score  +$5"
+        self.effects.emit(x, y - 20, dy=-2, life=60, kind=particles.TEXT, text=text)  # 向上漂浮
+
+    def create_angry_effect(self, x, y):
+        """创建生气特效：飞出的生气符号和扣分文字"""
+        # 创建3-4个生气符号（愤怒emoji）
+        num_emojis = self.rng.randint(3, 4)
+        self.effects.emit(x, y,
+                          dx=self.effect_rng.uniform(-4, 4, num_emojis),  # 随机水平速度
+                          dy=self.effect_rng.uniform(-9, -5, num_emojis),  # 向上飞
+                          life=60,  # 生命周期（帧数）
+                          rotation=self.effect_rng.uniform(0, 360, num_emojis),  # 随机旋转角度
+                          kind=particles.ANGRY_EMOJI, gravity=particles.GRAVITY, spin=10)
+
+        # 创建扣分文字特效
+        self.effects.emit(x, y - 20, dy=-2, life=60, kind=particles.ANGRY_TEXT, text="-5 Score")
+
+    def update_effects(self):
+        """更新所有特效（一次向量化积分）"""
+        self.effects.update()
+
+    def spawn_customer(self):
+        """生成计时器到期：在随机空位上生成新顾客；没有空位时下一个tick再试"""
+        # 如果巨人顾客存在，不生成普通顾客
+        if self.giant_customer is not None:
+            return
+        self.spawn_timer.cancel()
+
+        # 检查预设的三个位置中是否有空位
+        empty_positions = []
+        for i in range(len(self.customer_positions)):
+            if i >= len(self.customers) or self.customers[i] is None:
+                empty_positions.append(i)
+
+        # 如果有空位，在随机空位上生成新顾客
+        if empty_positions:
+            position_index = self.rng.choice(empty_positions)
+            position = self.customer_positions[position_index]
+
+            # 计算当前难度的生成延迟和耐心值
+            current_spawn_delay = max(60, self.base_customer_spawn_delay - (self.difficulty_level - 1) * self.spawn_delay_step)  # 最少1秒
+            current_patience = max(120, self.base_customer_patience - (self.difficulty_level - 1) * self.patience_step)  # 最少2秒
+
+            # 创建新顾客（尺寸扩大到1.5倍）
+            customer = self.customer_pool.acquire(
+                position["x"], position["y"],
+                45,  # 宽度从30扩大到45
+                75,  # 高度从50扩大到75
+                self.rng.choice(list(FoodType)),
+                BLUE
+            )
+            # 耐心根据难度调整，耗尽时顾客生气离开
+            customer.patience_timer = self.timers.schedule(current_patience, PHASE_CUSTOMERS,
+                                                           self.customer_out_of_patience, position_index, customer)
+
+            # 确保customers列表有足够的长度
+            while len(self.customers) <= position_index:
+                self.customers.append(None)
+
+            # 在指定位置放置顾客
+            self.customers[position_index] = customer
+            # 生成延迟数完之后的下一个tick再生成
+            self.spawn_timer = self.timers.schedule(current_spawn_delay + 1, PHASE_SPAWN, self.spawn_customer)
+        else:
+            self.spawn_timer = self.timers.schedule(1, PHASE_SPAWN, self.spawn_customer)
+
+    def spawn_giant_customer(self):
+        """生成巨人顾客"""
+        giant = self.giant_pool.acquire(
+            1000,  # 在右侧中央
+            SCREEN_HEIGHT - 100,  # 站在地面
+            120, 200,  # 超大尺寸
+            ORANGE,  # 橙色表示特殊
+            self.rng.choice(list(FoodType))  # 当前想要的食物
+        )
+        # 时间到了离开
+        giant.leave_timer = self.timers.schedule(GIANT_TIME, PHASE_GIANT, self.dismiss_giant)
+        self.giant_customer = giant
+        # 巨人在场时暂停生成普通顾客（计数器冻结，离开后继续）
+        if self._spawn_suspended is None:
+            self._spawn_suspended = self.spawn_timer.remaining()
+            self.spawn_timer.cancel()
+
+    def dismiss_giant(self):
+        """巨人顾客离开：回收对象并恢复生成普通顾客"""
+        giant = self.giant_customer
+        if giant is None:
+            return
+        giant.leave_timer.cancel()
+        self.giant_customer = None
+        self.giant_pool.release(giant)
+        if self._spawn_suspended is not None:
+            self.spawn_timer = self.timers.schedule(self._spawn_suspended, PHASE_SPAWN, self.spawn_customer)
+            self._spawn_suspended = None
+
+    def update_giant_customer(self, hit_slots=None):
+        """更新巨人顾客；hit_slots 为本tick的命中结果（目标键 -> 食物槽位）"""
+        giant = self.giant_customer
+        if giant is not None:
+            if hit_slots is None:
+                hit_slots = self.find_hits()
+            # 任何食物都会被巨人拦下
+            slot = hit_slots.get("giant", -1)
+            if slot >= 0:
+                if self.thrown_foods.food[slot] == FOOD_CODES[giant.desired_food]:
+                    # 巨人吃到正确食物，加分加钱
+                    self.score += 20
+                    self.money += 5  # 现在每个只加5元
+                    giant.hits += 1
+                    self.create_giant_money_effect(giant.x, giant.y - giant.height)
+                self.thrown_foods.release([slot])
+            # 吃满10个食物后离开并奖励50元
+            if giant.hits >= 10:
+                self.money += 50
+                self.dismiss_giant()
+        # 时间到了也离开（保留原有机制）
+        self.timers.run(PHASE_GIANT)
+
+    def create_giant_money_effect(self, x, y):
+        """创建巨人顾客的金钱特效：更少钞票，不卡顿"""
+        # 创建2-3张飞出的钞票（大幅减少）
+        num_bills = self.rng.randint(2, 3)
+        self.effects.emit(x, y,
+                          dx=self.effect_rng.uniform(-4, 4, num_bills),
+                          dy=self.effect_rng.uniform(-8, -4, num_bills),
+                          life=40,  # 更短寿命
+                          kind=particles.BILL, gravity=particles.GRAVITY)
+        # 只显示一次文字特效
+        self.effects.emit(x, y - 30, dy=-2, life=40, kind=particles.TEXT, text="+20 Score  +$10")
+
+    def collision_targets(self):
+        """按检测顺序列出碰撞目标：先是各位置的顾客（只接想要的食物），最后是巨人（拦下任何食物）"""
+        targets = []
+        for i, customer in enumerate(self.customers):
+            if customer is not None:
+                # 顾客矩形从 y-height 到 y，检测范围向外放大40像素
+                targets.append((i, customer.x, customer.y - customer.height // 2,
+                                customer.width//2 + 40, customer.height//2 + 40,
+                                FOOD_CODES[customer.desired_food]))
+        giant = self.giant_customer
+        if giant is not None:
+            targets.append(("giant", giant.x, giant.y - giant.height // 2,
+                            giant.width//2 + 50, giant.height//2 + 50, None))
+        return targets
+
+    def find_hits(self):
+        """一次遍历算出本tick所有命中：{目标键: 食物槽位}"""
+        return {key: slot for slot, key in self.collisions.find_hits(self.collision_targets())}
+
+    def update_customers(self, hit_slots=None):
+        """更新普通顾客：命中处理和失去耐心离开（只处理被击中或耐心到期的位置）"""
+        if hit_slots is None:
+            hit_slots = self.find_hits()
+        expired = {timer.args[0]: timer for timer in self.timers.pop_due(PHASE_CUSTOMERS)}
+        hit = [key for key in hit_slots if key != "giant"]
+        for i in sorted(expired.keys() | set(hit)):
+            customer = self.customers[i]
+            if customer is None:
+                continue
+
+            slot = hit_slots.get(i, -1)
+            if slot >= 0:
+                # 增加连击
+                self.combo += 1
+                self.restart_combo_timer()
+                if self.combo > self.max_combo:
+                    self.max_combo = self.combo
+
+                # 计算连击倍率（1x, 2x, 3x...）
+                combo_multiplier = min(self.combo, 10)  # 最多10倍
+
+                # 顾客满意，付钱离开（分数随连击增加）
+                base_score = 10
+                base_money = 5
+                self.score += base_score * combo_multiplier
+                self.money += base_money  # 金钱不受combo影响
+                self.customers_served += 1  # 增加已服务顾客计数
+                self.total_served += 1
+
+                # 店铺评分系统：每成功3次加半颗星
+                self.success_count += 1
+                if self.success_count >= 3:
+                    self.rating = min(5.0, self.rating + 0.5)  # 最多5星
+                    self.success_count = 0
+
+                # 生成特效：飞出的钞票和文字（显示连击倍率）
+                self.create_money_effect(customer.x, customer.y - customer.height, combo_multiplier)
+
+                self.customers[i] = None  # 将位置设置为空
+                self.thrown_foods.release([slot])
+
+            # 顾客失去耐心离开（同一tick被击中时也照样结算）
+            timer = expired.get(i)
+            if timer is not None:
+                timer.fire()
+            elif self.customers[i] is None:
+                customer.patience_timer.cancel()
+
+            # 离场的顾客放回对象池（同一tick既命中又失去耐心时只回收一次）
+            if self.customers[i] is None:
+                self.customer_pool.release(customer)
+
+    def customer_out_of_patience(self, i, customer):
+        """耐心计时器到期：顾客生气离开"""
+        # 连击清零
+        self.combo = 0
+        self.cancel_combo_timer()
+
+        # 扣除分数
+        self.score -= 5
+
+        # 店铺评分系统：失败扣半颗星
+        self.fail_count += 1
+        self.rating = max(0.0, self.rating - 0.5)  # 最少0星
+        self.success_count = 0  # 重置成功计数
+
+        # 生成生气特效
+        self.create_angry_effect(customer.x, customer.y - customer.height)
+
+        self.customers[i] = None  # 将位置设置为空
+
+    def restart_combo_timer(self):
+        """3秒内如果没有新的成功，连击清零"""
+        self.cancel_combo_timer()
+        self.combo_reset_timer = self.timers.schedule(COMBO_TIME, PHASE_COMBO, self._combo_expired)
+
+    def cancel_combo_timer(self):
+        if self.combo_reset_timer is not None:
+            self.combo_reset_timer.cancel()
+            self.combo_reset_timer = None
+
+    def _combo_expired(self):
+        self.combo_reset_timer = None
+        self.combo = 0  # 连击清零
+
+    def update(self, move=0):
+        prof = self.profiler
+        self.timers.begin_tick()
+        # 破产判定
+        if self.money < 0 and self.running:
+            self.running = False
+            self.game_over_message = "You are bankrupt! Game over."
+            self.ending = ENDING_BANKRUPT
+        # 更新玩家移动
+        self.move_player(move)
+
+        # 更新投掷的食物（批量积分重力并剔除落地或出界的食物）
+        with prof.section("update.foods"):
+            self.thrown_foods.update(SCREEN_WIDTH, SCREEN_HEIGHT)
+            self.collisions.sync()
+
+        # 更新特效
+        with prof.section("update.effects"):
+            self.update_effects()
+
+        # 更新顾客
+        with prof.section("update.spawn"):
+            self.timers.run(PHASE_SPAWN)
+
+        # 碰撞检测：顾客和巨人的命中在同一遍中算出
+        with prof.section("update.collisions"):
+            hit_slots = self.find_hits()
+
+        with prof.section("update.customers"):
+            self.update_customers(hit_slots)
+
+        # 更新巨人顾客
+        with prof.section("update.giant"):
+            self.update_giant_customer(hit_slots)
+
+        # 检查是否需要生成巨人顾客
+        if self.customers_served >= self.giant_trigger and self.giant_customer is None:
+            self.spawn_giant_customer()
+            self.customers_served = 0  # 重置计数器
+
+        # 更新连击计时器
+        self.timers.run(PHASE_COMBO)
+
+        # 难度递增系统：每服务10个顾客（customers_per_level），难度等级+1
+        total_served = self.customers_served
+        new_difficulty = (total_served // self.customers_per_level) + 1
+        if new_difficulty > self.difficulty_level:
+            self.difficulty_level = new_difficulty
+
+        # 游戏结束判定
+        if self.rating <= 0 and self.running:
+            self.running = False
+            self.game_over_message = "Too many bad reviews, your shop is forced to close."
+            self.ending = ENDING_BAD_REVIEWS
+        self.timers.end_tick()
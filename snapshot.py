@@ -0,0 +1,155 @@
+import numpy as np
+
+
+def _frozen(array):
+    """拷贝出一个只读数组（快照发布后任何一方都不能再修改）"""
+    array = np.array(array)
+    array.flags.writeable = False
+    return array
+
+
+class CustomerView:
+    """快照中的顾客：与 entities.Customer 字段相同，耐心是抓取时的剩余值"""
+
+    __slots__ = ("serial", "x", "y", "width", "height", "desired_food", "color", "patience")
+
+    def __init__(self, serial, x, y, width, height, desired_food, color, patience):
+        self.serial = serial
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.desired_food = desired_food
+        self.color = color
+        self.patience = patience
+
+    @classmethod
+    def capture(cls, customer):
+        return cls(customer.serial, customer.x, customer.y, customer.width, customer.height,
+                   customer.desired_food, customer.color, customer.patience)
+
+
+class GiantView:
+    """快照中的巨人顾客"""
+
+    __slots__ = ("serial", "x", "y", "width", "height", "color", "timer", "hits", "desired_food")
+
+    def __init__(self, serial, x, y, width, height, color, timer, hits, desired_food):
+        self.serial = serial
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.color = color
+        self.timer = timer
+        self.hits = hits
+        self.desired_food = desired_food
+
+    @classmethod
+    def capture(cls, giant):
+        return cls(giant.serial, giant.x, giant.y, giant.width, giant.height, giant.color,
+                   giant.timer, giant.hits, giant.desired_food)
+
+
+class FoodSnapshot:
+    """投掷中的食物：按投掷顺序紧凑排列的只读数组，接口与 ProjectilePool 的读取部分一致"""
+
+    def __init__(self, x, y, prev_x, prev_y, food):
+        self.x = _frozen(x)
+        self.y = _frozen(y)
+        self.prev_x = _frozen(prev_x)
+        self.prev_y = _frozen(prev_y)
+        self.food = _frozen(food)
+        self.count = len(self.food)
+
+    @classmethod
+    def capture(cls, foods):
+        slots = foods.live_slots()
+        return cls(foods.x[slots], foods.y[slots], foods.prev_x[slots], foods.prev_y[slots], foods.food[slots])
+
+    def __len__(self):
+        return self.count
+
+    def live_slots(self):
+        return np.arange(self.count)
+
+    def lerp_positions(self, slots, alpha):
+        prev_x = self.prev_x[slots]
+        prev_y = self.prev_y[slots]
+        return prev_x + (self.x[slots] - prev_x) * alpha, prev_y + (self.y[slots] - prev_y) * alpha
+
+
+class EffectSnapshot:
+    """特效粒子：渲染用到的列的只读拷贝，接口与 ParticleSystem 的读取部分一致"""
+
+    def __init__(self, x, y, prev_x, prev_y, rotation, life, kind, text):
+        self.x = _frozen(x)
+        self.y = _frozen(y)
+        self.prev_x = _frozen(prev_x)
+        self.prev_y = _frozen(prev_y)
+        self.rotation = _frozen(rotation)
+        self.life = _frozen(life)
+        self.kind = _frozen(kind)
+        self.text = _frozen(text)
+        self.count = len(self.kind)
+
+    @classmethod
+    def capture(cls, effects):
+        n = len(effects)
+        return cls(effects.x[:n], effects.y[:n], effects.prev_x[:n], effects.prev_y[:n],
+                   effects.rotation[:n], effects.life[:n], effects.kind[:n], effects.text[:n])
+
+    def __len__(self):
+        return self.count
+
+    def lerp_positions(self, alpha):
+        return self.prev_x + (self.x - self.prev_x) * alpha, self.prev_y + (self.y - self.prev_y) * alpha
+
+
+class SimSnapshot:
+    """一个tick结束时模拟状态的不可变快照：渲染器、HUD和轨迹预览读取的字段都在这里
+
+    顾客、食物和特效都是拷贝，布局（柜台、食物框）在一局内不变，直接共享引用。
+    快照发布后不再修改，所以可以不加锁地交给其他线程读取。
+    """
+
+    def __init__(self, sim, time=0.0):
+        self.time = time  # 发布时刻（用于渲染插值）
+        self.seed = sim.seed
+        self.tick_count = sim.tick_count
+        self.running = sim.running
+        self.game_over_message = sim.game_over_message
+        self.ending = sim.ending
+
+        # 布局
+        self.counter_x = sim.counter_x
+        self.counter_y = sim.counter_y
+        self.counter_width = sim.counter_width
+        self.counter_height = sim.counter_height
+        self.player_y = sim.player_y
+        self.food_boxes = sim.food_boxes
+        self.current_food_box = sim.current_food_box
+
+        # 顾客、投掷的食物和特效
+        self.customers = tuple(None if customer is None else CustomerView.capture(customer)
+                               for customer in sim.customers)
+        giant = sim.giant_customer
+        self.giant_customer = None if giant is None else GiantView.capture(giant)
+        self.thrown_foods = FoodSnapshot.capture(sim.thrown_foods)
+        self.effects = EffectSnapshot.capture(sim.effects)
+
+        # HUD数值
+        self.score = sim.score
+        self.money = sim.money
+        self.combo = sim.combo
+        self.combo_timer = sim.combo_timer
+        self.max_combo = sim.max_combo
+        self.rating = sim.rating
+        self.difficulty_level = sim.difficulty_level
+        self.customers_served = sim.customers_served
+        self.total_served = sim.total_served
+        self.giant_trigger = sim.giant_trigger
+
+    def launch_point(self):
+        """食物从当前食物框出手的位置（与 Simulation.launch_point 相同）"""
+        return self.food_boxes[self.current_food_box]["x"], self.player_y - 20
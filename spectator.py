@@ -0,0 +1,610 @@
+import sys
+import time
+import zlib
+import struct
+import asyncio
+import argparse
+import threading
+from collections import deque
+import numpy as np
+from simulation import Simulation, ENDING_BANKRUPT, ENDING_BAD_REVIEWS
+from snapshot import SimSnapshot, CustomerView, GiantView, FoodSnapshot, EffectSnapshot
+from settings import FPS, FOOD_TYPES, FOOD_CODES
+
+# 观战数据流（TCP）：每条消息是 <I 长度前缀 + 正文
+#   正文    HEADER <BIIIB  类型（关键帧/增量）、对局编号、tick、增量的基准tick、分段掩码
+#   分段    按掩码中的位从低到高排列，每段 SECTION <BI（编码方式、长度）+ 数据
+#   关键帧包含所有分段的原始字节；增量只包含变化了的分段，长度不变时与上一tick的字节异或
+#   （没变的字节异或后为0，再用zlib压缩）
+# 观众每解码一条消息回送 ACK <I（已解码的tick），服务器据此计算每个观众的延迟
+MESSAGE = struct.Struct("<I")
+HEADER = struct.Struct("<BIIIB")
+SECTION = struct.Struct("<BI")
+ACK = struct.Struct("<I")
+
+KEYFRAME = 1
+DELTA = 2
+
+# 分段
+SECTION_HUD = 0
+SECTION_CUSTOMERS = 1
+SECTION_GIANT = 2
+SECTION_FOODS = 3
+SECTION_EFFECTS = 4
+SECTION_TEXTS = 5
+SECTION_COUNT = 6
+
+# 分段编码方式（位标志）
+MODE_XOR = 1
+MODE_ZLIB = 2
+COMPRESS_MIN = 64  # 短于这个字节数的分段不压缩
+
+HUD = struct.Struct("<iiBHHHBBHHH?B")  # 分数、金钱、评分×2、连击、最高连击、连击计时、难度、食物框、服务数、累计服务数、巨人触发数、进行中、结局
+CUSTOMER = struct.Struct("<?IhhBBB3BH")  # 有无、serial、x、y、宽、高、想要的食物、颜色、耐心
+GIANT = struct.Struct("<IhhHHB3BHB")  # serial、x、y、宽、高、想要的食物、颜色、剩余时间、命中次数
+COUNT = struct.Struct("<H")
+POSITION_SCALE = 4  # 坐标按1/4像素量化为int16
+ENDINGS = (None, ENDING_BANKRUPT, ENDING_BAD_REVIEWS)
+
+DEFAULT_PORT = 8765
+KEYFRAME_INTERVAL = 2 * FPS  # 每2秒一个关键帧
+MAX_BUFFER = 256 * 1024  # 观众的发送缓冲超过这个字节数时跳过增量，追上后补发关键帧
+RATE_WINDOW = 1.0  # 字节速率的统计窗口（秒）
+
+
+def _positions(*columns):
+    """坐标列量化为int16并首尾相接（列式排列，逐tick变化小，异或后容易压缩）"""
+    data = np.rint(np.concatenate(columns) * POSITION_SCALE)
+    return np.clip(data, -32768, 32767).astype("<i2").tobytes()
+
+
+def encode_sections(snapshot):
+    """把快照编码为各分段的原始字节"""
+    s = snapshot
+    sections = [b""] * SECTION_COUNT
+    sections[SECTION_HUD] = HUD.pack(
+        s.score, s.money, int(round(s.rating * 2)), min(s.combo, 65535), min(s.max_combo, 65535),
+        min(s.combo_timer, 65535), min(s.difficulty_level, 255), s.current_food_box,
+        min(s.customers_served, 65535), min(s.total_served, 65535), s.giant_trigger, s.running,
+        ENDINGS.index(s.ending) if s.ending in ENDINGS else 0)
+
+    customers = bytearray(COUNT.pack(len(s.customers)))
+    for customer in s.customers:
+        if customer is None:
+            customers += CUSTOMER.pack(False, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
+        else:
+            customers += CUSTOMER.pack(True, customer.serial, customer.x, customer.y, customer.width,
+                                       customer.height, FOOD_CODES[customer.desired_food], *customer.color,
+                                       max(0, min(customer.patience, 65535)))
+    sections[SECTION_CUSTOMERS] = bytes(customers)
+
+    giant = s.giant_customer
+    if giant is not None:
+        sections[SECTION_GIANT] = GIANT.pack(giant.serial, giant.x, giant.y, giant.width, giant.height,
+                                             FOOD_CODES[giant.desired_food], *giant.color,
+                                             max(0, min(giant.timer, 65535)), min(giant.hits, 255))
+
+    foods = s.thrown_foods
+    sections[SECTION_FOODS] = (COUNT.pack(len(foods))
+                               + _positions(foods.x, foods.y, foods.prev_x, foods.prev_y)
+                               + foods.food.astype(np.int8).tobytes())
+
+    # 特效文字放进字符串表，特效只带表中的下标（0表示没有文字）
+    effects = s.effects
+    n = min(len(effects), 65535)
+    table = {}
+    text_index = np.zeros(n, dtype=np.uint8)
+    for i, text in enumerate(effects.text[:n].tolist()):
+        if text is not None:
+            index = table.get(text)
+            if index is None and len(table) < 255:
+                index = table[text] = len(table) + 1
+            text_index[i] = index or 0
+    sections[SECTION_EFFECTS] = (COUNT.pack(n)
+                                 + _positions(effects.x[:n], effects.y[:n], effects.prev_x[:n], effects.prev_y[:n])
+                                 + np.rint(np.mod(effects.rotation[:n], 360) * 100).astype("<u2").tobytes()
+                                 + np.clip(effects.life[:n], 0, 255).astype(np.uint8).tobytes()
+                                 + effects.kind[:n].astype(np.int8).tobytes()
+                                 + text_index.tobytes())
+    texts = bytearray([len(table)])
+    for text in table:
+        data = text.encode("utf-8")[:255]
+        texts += bytes([len(data)]) + data
+    sections[SECTION_TEXTS] = bytes(texts)
+    return sections
+
+
+def _xor(data, base):
+    return (np.frombuffer(data, dtype=np.uint8) ^ np.frombuffer(base, dtype=np.uint8)).tobytes()
+
+
+def _pack_section(data, base, level):
+    mode = 0
+    if base is not None and len(base) == len(data):
+        data = _xor(data, base)
+        mode |= MODE_XOR
+    if len(data) >= COMPRESS_MIN:
+        compressed = zlib.compress(data, level)
+        if len(compressed) < len(data):
+            data = compressed
+            mode |= MODE_ZLIB
+    return SECTION.pack(mode, len(data)) + data
+
+
+class StreamEncoder:
+    """逐tick编码快照：增量对所有观众共用，关键帧在需要时才生成（同一tick只生成一次）"""
+
+    def __init__(self, level=1):
+        self.level = level  # zlib压缩级别：1最快
+        self.sections = None
+        self.game = None
+        self.tick = None
+        self._keyframe = None
+
+    def update(self, snapshot):
+        """编码下一个tick，返回相对上一tick的增量消息；新的一局（没有基准）时返回None"""
+        sections = encode_sections(snapshot)
+        game = snapshot.seed & 0xFFFFFFFF
+        restart = self.sections is None or game != self.game or snapshot.tick_count <= self.tick
+        delta = None
+        if not restart:
+            delta = self._message(DELTA, game, snapshot.tick_count, self.tick, sections, self.sections)
+        self.sections = sections
+        self.game = game
+        self.tick = snapshot.tick_count
+        self._keyframe = None
+        return delta
+
+    def keyframe(self):
+        """当前tick的关键帧（完整状态）"""
+        if self._keyframe is None:
+            self._keyframe = self._message(KEYFRAME, self.game, self.tick, self.tick, self.sections, None)
+        return self._keyframe
+
+    def _message(self, kind, game, tick, base_tick, sections, base):
+        mask = 0
+        parts = []
+        for i, data in enumerate(sections):
+            previous = None if base is None else base[i]
+            if previous is not None and previous == data:
+                continue  # 没变的分段不发送
+            mask |= 1 << i
+            parts.append(_pack_section(data, previous, self.level))
+        body = HEADER.pack(kind, game, tick, base_tick, mask) + b"".join(parts)
+        return MESSAGE.pack(len(body)) + body
+
+
+class SpectatorState:
+    """观众端重建的局面：字段与 SimSnapshot 相同，可以直接交给渲染器和HUD"""
+
+    def __init__(self, layout, tick, seed, sections):
+        self.time = time.perf_counter()  # 收到的时刻（用于渲染插值）
+        self.seed = seed
+        self.tick_count = tick
+        # 布局不在流里传输：同一版本的 Simulation 给出相同的柜台和食物框
+        self.counter_x = layout.counter_x
+        self.counter_y = layout.counter_y
+        self.counter_width = layout.counter_width
+        self.counter_height = layout.counter_height
+        self.player_y = layout.player_y
+        self.food_boxes = layout.food_boxes
+        self.game_over_message = None
+
+        (self.score, self.money, rating2, self.combo, self.max_combo, self.combo_timer, self.difficulty_level,
+         self.current_food_box, self.customers_served, self.total_served, self.giant_trigger, self.running,
+         ending) = HUD.unpack(sections[SECTION_HUD])
+        self.rating = rating2 / 2
+        self.ending = ENDINGS[ending] if ending < len(ENDINGS) else None
+
+        data = sections[SECTION_CUSTOMERS]
+        count, = COUNT.unpack_from(data)
+        customers = []
+        for i in range(count):
+            present, serial, x, y, width, height, food, r, g, b, patience = CUSTOMER.unpack_from(
+                data, COUNT.size + i * CUSTOMER.size)
+            customers.append(CustomerView(serial, x, y, width, height, FOOD_TYPES[food], (r, g, b), patience)
+                             if present else None)
+        self.customers = tuple(customers)
+
+        data = sections[SECTION_GIANT]
+        self.giant_customer = None
+        if data:
+            serial, x, y, width, height, food, r, g, b, timer, hits = GIANT.unpack(data)
+            self.giant_customer = GiantView(serial, x, y, width, height, (r, g, b), timer, hits, FOOD_TYPES[food])
+
+        data = sections[SECTION_FOODS]
+        n, = COUNT.unpack_from(data)
+        positions = np.frombuffer(data, dtype="<i2", count=4 * n, offset=COUNT.size) / POSITION_SCALE
+        x, y, prev_x, prev_y = positions.reshape(4, n)
+        food = np.frombuffer(data, dtype=np.int8, count=n, offset=COUNT.size + 8 * n)
+        self.thrown_foods = FoodSnapshot(x, y, prev_x, prev_y, food)
+
+        texts = [None]
+        data = sections[SECTION_TEXTS]
+        offset = 1
+        for _ in range(data[0]):
+            length = data[offset]
+            texts.append(data[offset + 1:offset + 1 + length].decode("utf-8"))
+            offset += 1 + length
+        data = sections[SECTION_EFFECTS]
+        n, = COUNT.unpack_from(data)
+        offset = COUNT.size
+        positions = np.frombuffer(data, dtype="<i2", count=4 * n, offset=offset) / POSITION_SCALE
+        offset += 8 * n
+        rotation = np.frombuffer(data, dtype="<u2", count=n, offset=offset) / 100
+        offset += 2 * n
+        life = np.frombuffer(data, dtype=np.uint8, count=n, offset=offset).astype(np.int32)
+        kind = np.frombuffer(data, dtype=np.int8, count=n, offset=offset + n)
+        text_index = np.frombuffer(data, dtype=np.uint8, count=n, offset=offset + 2 * n)
+        x, y, prev_x, prev_y = positions.reshape(4, n)
+        text = np.array(texts, dtype=object)[text_index]
+        self.effects = EffectSnapshot(x, y, prev_x, prev_y, rotation, life, kind, text)
+
+    def launch_point(self):
+        return self.food_boxes[self.current_food_box]["x"], self.player_y - 20
+
+
+class StreamDecoder:
+    """观众端：按顺序应用关键帧和增量，重建每个tick的局面"""
+
+    def __init__(self):
+        self.layout = Simulation(0)
+        self.sections = None
+        self.game = None
+        self.tick = None
+        self.keyframes = 0
+        self.deltas = 0
+        self.skipped = 0  # 缺少基准而丢弃的增量（等待下一个关键帧）
+
+    def decode(self, body):
+        """解码一条消息正文；增量的基准对不上时返回None"""
+        kind, game, tick, base_tick, mask = HEADER.unpack_from(body)
+        if kind == DELTA and (self.sections is None or game != self.game or base_tick != self.tick):
+            self.skipped += 1
+            return None
+        base = self.sections if kind == DELTA else [b""] * SECTION_COUNT
+        sections = list(base)
+        offset = HEADER.size
+        for i in range(SECTION_COUNT):
+            if not mask & (1 << i):
+                continue
+            mode, length = SECTION.unpack_from(body, offset)
+            offset += SECTION.size
+            data = bytes(body[offset:offset + length])
+            offset += length
+            if mode & MODE_ZLIB:
+                data = zlib.decompress(data)
+            if mode & MODE_XOR:
+                data = _xor(data, base[i])
+            sections[i] = data
+        self.sections = sections
+        self.game = game
+        self.tick = tick
+        if kind == KEYFRAME:
+            self.keyframes += 1
+        else:
+            self.deltas += 1
+        return SpectatorState(self.layout, tick, game, sections)
+
+
+class _Client:
+    """一个已连接的观众（只在服务器的事件循环线程里访问）"""
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.peer = writer.get_extra_info("peername")
+        self.needs_keyframe = True
+        self.bytes_sent = 0
+        self.sent = deque()  # 最近 RATE_WINDOW 秒内的 (时间, 字节数)
+        self.dropped = 0  # 因发送缓冲积压而跳过的tick
+        self.acked_tick = None
+        self.lag_ticks = 0
+        self.lag_ms = 0.0
+
+    def record(self, now, size):
+        self.bytes_sent += size
+        sent = self.sent
+        sent.append((now, size))
+        while sent and sent[0][0] < now - RATE_WINDOW:
+            sent.popleft()
+
+    def bytes_per_sec(self):
+        return sum(size for _, size in self.sent) / RATE_WINDOW
+
+
+class SpectatorServer:
+    """观战服务器：在后台线程运行 asyncio 事件循环，把每个tick的快照广播给所有观众
+
+    - publish() 在游戏线程调用，只替换待发送快照的引用；flush() 唤醒事件循环去编码和发送。
+      帧循环在画面推送之后、等待下一帧之前才 flush()，编码和帧循环的计算错开，不抢GIL
+    - 后台线程来不及时合并成只发最新的快照（增量的基准tick随之跳过中间的tick）
+    - 没有观众时 watching 为False，游戏线程可以连快照都不抓取
+    - 发送缓冲积压的观众跳过增量，追上后先补一个关键帧；新观众也从关键帧开始
+    - stats() 返回最近一次广播后的统计（字节速率、每个观众的延迟），不加锁
+    """
+
+    def __init__(self, host="127.0.0.1", port=DEFAULT_PORT, keyframe_interval=KEYFRAME_INTERVAL,
+                 max_buffer=MAX_BUFFER):
+        self.host = host
+        self.port = port  # 0 表示由系统分配，start() 之后是实际端口
+        self.keyframe_interval = keyframe_interval
+        self.max_buffer = max_buffer
+        self.encoder = StreamEncoder()
+        self.error = None
+        self.keyframes = 0
+        self.deltas = 0
+        self.encode_time = deque(maxlen=240)  # 每个tick编码的耗时（秒）
+        self._clients = []
+        self._published = deque()  # 最近几秒广播过的 (tick, 发布时刻)，tick递增，用于计算观众延迟
+        self._handoff = threading.Lock()  # 保护 _pending 和 _scheduled（游戏线程与事件循环线程之间交接快照）
+        self._pending = None  # 游戏线程最新交来的快照
+        self._scheduled = False  # 事件循环里是否已经有一个待执行的 _flush
+        self.coalesced = 0  # 被合并掉的tick数
+        self._loop = None
+        self._thread = None
+        self._ready = threading.Event()
+        self._stats = self._collect_stats(time.perf_counter())
+
+    def start(self):
+        self._thread = threading.Thread(target=self._serve, name="spectator", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self.error is not None:
+            raise self.error
+        return self
+
+    def close(self):
+        loop = self._loop
+        if loop is not None and self._thread is not None:
+            loop.call_soon_threadsafe(loop.stop)
+            self._thread.join()
+            self._thread = None
+
+    @property
+    def watching(self):
+        return bool(self._clients)
+
+    def publish(self, snapshot):
+        """登记要广播的快照（任何线程都可以调用，立即返回）"""
+        if not self._clients or self._thread is None:
+            return
+        with self._handoff:
+            if self._pending is not None:
+                self.coalesced += 1
+            self._pending = snapshot
+
+    def flush(self):
+        """唤醒事件循环广播已登记的快照"""
+        if self._thread is None:
+            return
+        with self._handoff:
+            wake = self._pending is not None and not self._scheduled
+            self._scheduled = self._scheduled or wake
+        if wake:
+            self._loop.call_soon_threadsafe(self._flush)
+
+    def broadcast(self, snapshot):
+        """登记并立即唤醒（调用方接下来会空闲时使用，例如模拟线程在tick之间）"""
+        self.publish(snapshot)
+        self.flush()
+
+    def _flush(self):
+        # 取走和清空在同一把锁内完成，期间登记的新快照不会被覆盖丢失
+        with self._handoff:
+            snapshot, self._pending = self._pending, None
+            self._scheduled = False
+        if snapshot is not None:
+            self._broadcast(snapshot)
+
+    def stats(self):
+        return self._stats
+
+    def _serve(self):
+        loop = self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            server = loop.run_until_complete(asyncio.start_server(self._handle, self.host, self.port))
+        except OSError as e:
+            self.error = e
+            self._ready.set()
+            loop.close()
+            return
+        self.port = server.sockets[0].getsockname()[1]
+        self._ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            server.close()
+            for client in self._clients:
+                client.writer.close()
+            loop.run_until_complete(server.wait_closed())
+            loop.close()
+
+    async def _handle(self, reader, writer):
+        client = _Client(writer)
+        self._clients.append(client)
+        try:
+            while True:
+                tick, = ACK.unpack(await reader.readexactly(ACK.size))
+                self._acknowledge(client, tick)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._clients.remove(client)
+            writer.close()
+
+    def _acknowledge(self, client, tick):
+        client.acked_tick = tick
+        if self.encoder.tick is not None:
+            client.lag_ticks = max(0, self.encoder.tick - tick)
+        # 确认的通常是最近的tick，从新往旧找
+        for published_tick, published in reversed(self._published):
+            if published_tick <= tick:
+                if published_tick == tick:
+                    client.lag_ms = (time.perf_counter() - published) * 1000
+                break
+
+    def _broadcast(self, snapshot):
+        start = time.perf_counter()
+        delta = self.encoder.update(snapshot)
+        tick = snapshot.tick_count
+        if delta is None:
+            self._published.clear()
+        published = self._published
+        published.append((tick, snapshot.time))
+        # 只保留最近几秒的发布时刻（合并掉的tick不在队列里，按范围而不是逐个删除）
+        stale = tick - 10 * FPS
+        while published[0][0] < stale:
+            published.popleft()
+        periodic = delta is None or tick % self.keyframe_interval == 0
+
+        for client in self._clients:
+            transport = client.writer.transport
+            if transport.is_closing():
+                continue
+            if transport.get_write_buffer_size() > self.max_buffer:
+                client.dropped += 1
+                client.needs_keyframe = True
+                continue
+            if periodic or client.needs_keyframe:
+                message = self.encoder.keyframe()
+                client.needs_keyframe = False
+                self.keyframes += 1
+            else:
+                message = delta
+                self.deltas += 1
+            client.writer.write(message)
+            client.record(start, len(message))
+        now = time.perf_counter()
+        self.encode_time.append(now - start)
+        self._stats = self._collect_stats(now)
+
+    def _collect_stats(self, now):
+        clients = []
+        for client in self._clients:
+            while client.sent and client.sent[0][0] < now - RATE_WINDOW:
+                client.sent.popleft()
+            clients.append({
+                "peer": client.peer,
+                "bytes_per_sec": client.bytes_per_sec(),
+                "bytes_sent": client.bytes_sent,
+                "lag_ticks": client.lag_ticks,
+                "lag_ms": client.lag_ms,
+                "dropped": client.dropped,
+            })
+        times = self.encode_time
+        return {
+            "clients": clients,
+            "bytes_per_sec": sum(client["bytes_per_sec"] for client in clients),
+            "keyframes": self.keyframes,
+            "deltas": self.deltas,
+            "coalesced": self.coalesced,
+            "mean_broadcast_ms": sum(times) / len(times) * 1000 if times else 0.0,
+        }
+
+
+async def watch(host, port, on_state, stop=None):
+    """连接观战服务器，每重建一个tick调用 on_state(局面, 消息字节数)；stop 置位时返回"""
+    reader, writer = await asyncio.open_connection(host, port)
+    decoder = StreamDecoder()
+    try:
+        while stop is None or not stop.is_set():
+            size, = MESSAGE.unpack(await reader.readexactly(MESSAGE.size))
+            body = await reader.readexactly(size)
+            state = decoder.decode(body)
+            if state is not None:
+                writer.write(ACK.pack(state.tick_count))
+                on_state(state, MESSAGE.size + size)
+    except asyncio.IncompleteReadError:
+        pass  # 服务器关闭
+    finally:
+        writer.close()
+    return decoder
+
+
+def serve(args):
+    """无窗口地用自动玩家连续对局，并把每个tick广播出去（用于在本机测试观战）"""
+    from balance import AutoPlayer
+
+    server = SpectatorServer(args.host, args.port).start()
+    print(f"spectator server on {args.host}:{server.port}")
+    seed = args.seed
+    sim = Simulation(seed)
+    player = AutoPlayer(seed)
+    dt = 1.0 / FPS
+    next_tick = time.perf_counter()
+    next_report = next_tick + 2.0
+    try:
+        while True:
+            now = time.perf_counter()
+            if now < next_tick:
+                time.sleep(next_tick - now)
+                continue
+            next_tick += dt
+            sim.step(player.act(sim))
+            if server.watching:
+                server.broadcast(SimSnapshot(sim, time.perf_counter()))
+            if not sim.running:
+                seed += 1
+                sim = Simulation(seed)
+                player = AutoPlayer(seed)
+            if now >= next_report:
+                next_report = now + 2.0
+                stats = server.stats()
+                lags = ", ".join(f"{c['lag_ticks']} ticks/{c['lag_ms']:.1f} ms" for c in stats["clients"])
+                print(f"tick {sim.tick_count:6}  {len(stats['clients'])} clients  "
+                      f"{stats['bytes_per_sec'] / 1024:7.2f} KiB/s  broadcast {stats['mean_broadcast_ms']:.3f} ms  "
+                      f"lag [{lags}]")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+    return 0
+
+
+def probe(args):
+    """无窗口的观众：接收一段时间，打印带宽和消息统计"""
+    received = {"bytes": 0, "messages": 0, "last": None}
+
+    def on_state(state, size):
+        received["bytes"] += size
+        received["messages"] += 1
+        received["last"] = state
+
+    async def run():
+        stop = asyncio.Event()
+        asyncio.get_running_loop().call_later(args.seconds, stop.set)
+        task = asyncio.ensure_future(watch(args.host, args.port, on_state, stop))
+        await stop.wait()
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    asyncio.run(run())
+    state = received["last"]
+    print(f"{received['messages']} ticks, {received['bytes'] / args.seconds / 1024:.2f} KiB/s, "
+          f"{received['bytes'] / max(1, received['messages']):.0f} B/tick")
+    if state is not None:
+        print(f"last tick {state.tick_count}: score {state.score}  money {state.money}  rating {state.rating}  "
+              f"foods {len(state.thrown_foods)}  effects {len(state.effects)}")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Food Flinger spectator stream")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve_parser = sub.add_parser("serve", help="stream an auto-played headless game")
+    serve_parser.add_argument("--seed", type=int, default=1)
+    probe_parser = sub.add_parser("probe", help="connect without a window and report bandwidth")
+    probe_parser.add_argument("--seconds", type=float, default=5.0)
+    for command in (serve_parser, probe_parser):
+        command.add_argument("--host", default="127.0.0.1")
+        command.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args(argv)
+    return serve(args) if args.command == "serve" else probe(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,457 @@
+import numpy as np
+import pygame
+from collections import OrderedDict
+from pygame.sprite import DirtySprite, LayeredDirty
+import particles
+from settings import SCREEN_WIDTH, SCREEN_HEIGHT, WHITE, BLACK, BROWN, GREEN, RED, YELLOW, FOOD_TYPES
+
+# 图层（数值大的画在上面），顺序与整屏/脏矩形模式的绘制顺序一致
+LAYER_STAFF = 0
+LAYER_COUNTER = 1
+LAYER_FOODS = 2
+LAYER_CUSTOMERS = 3
+LAYER_EFFECTS = 4
+LAYER_TRAJECTORY = 5
+LAYER_LABELS = 6
+LAYER_HUD = 7
+LAYER_OVERLAY = 8
+
+MAX_DIRTY_SPRITES = 300  # 一帧变化的精灵超过这个数量时整屏重画并 flip()
+
+BLANK = pygame.Surface((0, 0))
+
+# 预渲染特效帧
+ROTATION_STEP = 10  # 生气表情每隔10°预先旋转一帧
+ROTATIONS = 360 // ROTATION_STEP
+LIFE_BUCKETS = 8  # 按剩余生命分成的透明度档位
+FULL_LIFE = 60  # 生命值达到60时完全不透明
+
+
+def solid(color, size):
+    """纯色矩形图片"""
+    surface = pygame.Surface(size)
+    surface.fill(color)
+    return surface
+
+
+def outline(color, size, width):
+    """矩形边框图片（中间透明）"""
+    surface = pygame.Surface(size, pygame.SRCALPHA)
+    pygame.draw.rect(surface, color, surface.get_rect(), width)
+    return surface
+
+
+def compose(parts):
+    """把若干 (图片, (dx, dy)) 按顺序合成一张透明图片，返回 (图片, 左上角相对锚点的偏移)"""
+    if len(parts) == 1:
+        return parts[0]
+    rects = [surface.get_rect(topleft=offset) for surface, offset in parts]
+    bounds = rects[0].unionall(rects[1:])
+    image = pygame.Surface(bounds.size, pygame.SRCALPHA)
+    for (surface, _), rect in zip(parts, rects):
+        image.blit(surface, rect.move(-bounds.x, -bounds.y))
+    return image, bounds.topleft
+
+
+def build_angry_emoji():
+    """生气表情（红色圆圈 + 愤怒符号），图片中心就是锚点"""
+    image = pygame.Surface((31, 31), pygame.SRCALPHA)
+    pygame.draw.circle(image, (255, 50, 50), (15, 15), 15)
+    pygame.draw.polygon(image, BLACK, [(7, 12), (12, 12), (10, 17)])
+    pygame.draw.polygon(image, BLACK, [(18, 12), (23, 12), (20, 17)])
+    pygame.draw.arc(image, BLACK, (7, 17, 16, 10), 3.14, 0, 2)
+    return image
+
+
+def fade(image, opacity):
+    """按不透明度（0~1）整体淡化一张带alpha通道的图片"""
+    faded = image.copy()
+    faded.fill((255, 255, 255, int(255 * opacity)), special_flags=pygame.BLEND_RGBA_MULT)
+    return faded
+
+
+def life_buckets(life):
+    """剩余生命 -> 透明度档位（向量化）"""
+    return np.minimum(np.maximum(life, 0) * LIFE_BUCKETS // FULL_LIFE, LIFE_BUCKETS - 1)
+
+
+class EffectAtlas:
+    """启动时一次性预渲染的钞票和生气表情帧，运行时只按下标blit，不再光栅化
+
+    frames 是扁平的帧表：先是每个透明度档位一张钞票，然后是 [档位][旋转角] 的生气表情；
+    dx/dy 是每帧左上角相对粒子位置的偏移
+    """
+
+    def __init__(self, text_cache):
+        frames = []
+        dollar = text_cache.render("$", 16, WHITE)
+        for bucket in range(LIFE_BUCKETS):
+            opacity = (bucket + 1) / LIFE_BUCKETS
+            # 钞票颜色随生命变暗（与原来的公式一致），整体再按档位淡出
+            green = min(255, 150 + int(255 * opacity) // 3)
+            image, offset = compose([(solid((0, green, 0), (16, 8)), (-8, -4)), (dollar, (-4, -6))])
+            frames.append((fade(image, opacity), offset))
+        self.emoji_start = len(frames)
+        emoji = build_angry_emoji()
+        rotated = [pygame.transform.rotozoom(emoji, -i * ROTATION_STEP, 1) for i in range(ROTATIONS)]
+        for bucket in range(LIFE_BUCKETS):
+            opacity = (bucket + 1) / LIFE_BUCKETS
+            for image in rotated:
+                frames.append((fade(image, opacity), (-(image.get_width() // 2), -(image.get_height() // 2))))
+        self.images = [image for image, _ in frames]
+        self.dx = np.array([offset[0] for _, offset in frames], dtype=np.int64)
+        self.dy = np.array([offset[1] for _, offset in frames], dtype=np.int64)
+
+    def frame_indices(self, kind, life, rotation):
+        """每个粒子对应的帧下标；不是钞票或生气表情的粒子为 -1"""
+        buckets = life_buckets(life)
+        indices = np.full(len(kind), -1, dtype=np.int64)
+        bills = kind == particles.BILL
+        indices[bills] = buckets[bills]
+        emojis = kind == particles.ANGRY_EMOJI
+        angles = np.rint(rotation[emojis] / ROTATION_STEP).astype(np.int64) % ROTATIONS
+        indices[emojis] = self.emoji_start + buckets[emojis] * ROTATIONS + angles
+        return indices
+
+    def place(self, kind, life, rotation, xs, ys):
+        """预渲染粒子的 (图片列表, 左上角x列表, 左上角y列表)；xs/ys 为整数位置数组"""
+        indices = self.frame_indices(kind, life, rotation)
+        baked = indices >= 0
+        indices = indices[baked]
+        images = self.images
+        return ([images[i] for i in indices.tolist()],
+                (xs[baked] + self.dx[indices]).tolist(), (ys[baked] + self.dy[indices]).tolist())
+
+
+class ImageCache:
+    """按键缓存合成好的图片（LRU），键相同的实体共用同一张图片"""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._images = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, build):
+        """返回键对应的 (图片, 偏移)；没有缓存时调用 build() 生成"""
+        entry = self._images.get(key)
+        if entry is not None:
+            self._images.move_to_end(key)
+            self.hits += 1
+            return entry
+        self.misses += 1
+        entry = build()
+        self._images[key] = entry
+        if len(self._images) > self.max_entries:
+            self._images.popitem(last=False)
+        return entry
+
+
+class CachedSprite(DirtySprite):
+    """图片来自缓存的精灵：只有图片或位置真的变化时才标记为脏"""
+
+    def __init__(self, layer):
+        super().__init__()
+        self._layer = layer
+        self.image = BLANK
+        self.rect = pygame.Rect(0, 0, 0, 0)
+        self.visible = 0
+
+    def show(self, image, x, y, source_rect=None):
+        """在 (x, y)（图片左上角）显示图片；source_rect 表示只显示图片的一部分"""
+        rect = self.rect
+        if (image is not self.image or rect.x != x or rect.y != y or not self.visible
+                or source_rect != self.source_rect):
+            self.image = image
+            size = image.get_size() if source_rect is None else source_rect.size
+            self.rect = pygame.Rect((x, y), size)
+            self.source_rect = source_rect
+            self.visible = 1
+            self.dirty = 1
+
+    def hide(self):
+        if self.visible:
+            self.visible = 0
+            self.dirty = 1
+
+
+class SpritePool:
+    """同一图层的精灵池：数量不够时新建并加入组，多余的只隐藏不删除"""
+
+    def __init__(self, group, layer):
+        self.group = group
+        self.layer = layer
+        self.sprites = []
+        self.shown = 0  # 前 shown 个精灵可能可见
+
+    def __getitem__(self, i):
+        sprites = self.sprites
+        while len(sprites) <= i:
+            sprite = CachedSprite(self.layer)
+            sprites.append(sprite)
+            self.group.add(sprite)
+        self.shown = max(self.shown, i + 1)
+        return sprites[i]
+
+    def hide_from(self, n):
+        """隐藏第 n 个及之后的精灵"""
+        for sprite in self.sprites[n:self.shown]:
+            sprite.hide()
+        self.shown = min(self.shown, n)
+
+    def sync(self, items):
+        """依次显示 (图片, x, y)，其余隐藏"""
+        items = list(items)
+        n = len(items)
+        if n:
+            self[n - 1]  # 一次补足精灵数量
+        for sprite, (image, x, y) in zip(self.sprites, items):
+            sprite.show(image, x, y)
+        self.hide_from(n)
+
+
+class SpriteRenderer:
+    """LayeredDirty精灵渲染：每个实体一个带缓存图片的精灵，只重画变化了的精灵，图层顺序由精灵组负责
+
+    - sync() 把模拟状态同步到精灵（图片不变、位置不变的精灵保持干净）
+    - draw() 只恢复和重画脏区域，present() 只推送这些区域
+    """
+
+    def __init__(self, background, text_cache, staff_image, food_images, trajectory_dot, effect_atlas,
+                 enabled=False):
+        self.background = background
+        self.text_cache = text_cache
+        self.effect_atlas = effect_atlas
+        self.staff_image = staff_image
+        self.food_images = food_images
+        self.trajectory_dot = trajectory_dot
+        self.enabled = enabled
+        self.screen_rect = background.get_rect()
+        self.group = LayeredDirty()
+        self.images = ImageCache()
+        self._full_redraw = True
+        self._rects = []
+        # 统计：本帧推送的像素数
+        self.pixels_pushed = 0
+        self.rects_pushed = 0
+        self.fell_back = False  # 本帧是否因为变化的精灵太多而整屏重画
+        self.fallback_frames = 0
+
+        self.staff = SpritePool(self.group, LAYER_STAFF)
+        self.counter = SpritePool(self.group, LAYER_COUNTER)
+        self.boxes = SpritePool(self.group, LAYER_COUNTER)
+        self.foods = SpritePool(self.group, LAYER_FOODS)
+        self.customers = SpritePool(self.group, LAYER_CUSTOMERS)
+        self.giant = SpritePool(self.group, LAYER_CUSTOMERS)
+        self.effects = SpritePool(self.group, LAYER_EFFECTS)
+        self.trajectory = SpritePool(self.group, LAYER_TRAJECTORY)
+        self.box_labels = SpritePool(self.group, LAYER_LABELS)
+        self.customer_labels = SpritePool(self.group, LAYER_LABELS)
+        self.hud = SpritePool(self.group, LAYER_HUD)
+        self.overlays = SpritePool(self.group, LAYER_OVERLAY)
+        self._trajectory_key = None
+        self._giant_key = None
+        self._hud_renders = None
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        self._full_redraw = True
+
+    def invalidate(self):
+        """下一帧整屏重画（屏幕被其他场景或其他渲染模式覆盖过之后调用）"""
+        self._full_redraw = True
+
+    def sprite_count(self):
+        return len(self.group)
+
+    def sync(self, sim, alpha=1.0, trajectory=None, hud=None, overlays=()):
+        """把一帧的模拟状态同步到精灵；trajectory 为轨迹预览（或None），overlays 为 [(图片, (x, y))]"""
+        self.sync_counter(sim)
+        self.sync_foods(sim, alpha)
+        self.sync_customers(sim)
+        self.sync_giant(sim)
+        self.sync_effects(sim, alpha)
+        self.sync_trajectory(trajectory)
+        if hud is not None:
+            self.sync_hud(hud)
+        self.overlays.sync((image, x, y) for image, (x, y) in overlays)
+
+    def sync_counter(self, sim):
+        """店员、柜台、食物框和食物框标签"""
+        staff = self.staff_image
+        player_x = sim.food_boxes[sim.current_food_box]["x"]
+        self.staff[0].show(staff, player_x - staff.get_width() // 2, sim.player_y - staff.get_height() // 2)
+
+        counter, _ = self.images.get(("counter", sim.counter_width, sim.counter_height),
+                                     lambda: (solid(BROWN, (sim.counter_width, sim.counter_height)), (0, 0)))
+        self.counter[0].show(counter, sim.counter_x, sim.counter_y)
+
+        for i, box in enumerate(sim.food_boxes):
+            selected = i == sim.current_food_box
+            image, (dx, dy) = self.images.get(("box", box["color"], selected),
+                                              lambda: self._build_box(box["color"], selected))
+            self.boxes[i].show(image, box["x"] + dx, box["y"] + dy)
+            label = self.text_cache.render(box["type"].value.upper(), 24, BLACK)
+            self.box_labels[i].show(label, box["x"] - 25, box["y"] - 25)
+        self.boxes.hide_from(len(sim.food_boxes))
+        self.box_labels.hide_from(len(sim.food_boxes))
+
+    def _build_box(self, color, selected):
+        parts = [(solid(color, (60, 40)), (-30, 0))]
+        if selected:
+            # 白色边框表示选中
+            parts.insert(0, (outline(WHITE, (70, 60), 4), (-35, -10)))
+        return compose(parts)
+
+    def sync_foods(self, sim, alpha):
+        foods = sim.thrown_foods
+        slots = foods.live_slots()
+        xs, ys = foods.lerp_positions(slots, alpha)
+        # 按食物编号索引的图片，左上角坐标一次向量化算出
+        images = [self.food_images[food_type] for food_type in FOOD_TYPES]
+        half_width = [image.get_width() // 2 for image in images]
+        half_height = [image.get_height() // 2 for image in images]
+        codes = foods.food[slots]
+        xs = (xs.astype(np.int64) - np.take(half_width, codes)).tolist()
+        ys = (ys.astype(np.int64) - np.take(half_height, codes)).tolist()
+        self.foods.sync(zip([images[code] for code in codes.tolist()], xs, ys))
+
+    def sync_customers(self, sim):
+        """顾客：身体在顾客层，想要的食物和耐心条在标签层"""
+        customers = sim.customers
+        for i, customer in enumerate(customers):
+            if customer is None:
+                self.customers[i].hide()
+                self.customer_labels[i].hide()
+                continue
+            x = customer.x
+            y = customer.y
+            width = customer.width
+            height = customer.height
+            body, _ = self.images.get(("body", customer.color, width, height),
+                                      lambda: (solid(customer.color, (width, height)), (0, 0)))
+            self.customers[i].show(body, x - width // 2, y - height)
+
+            patience_width = min(60, int((customer.patience / 300) * 60))
+            food = customer.desired_food
+            label, (dx, dy) = self.images.get(("label", food, height, patience_width),
+                                              lambda: self._build_label(food, height, patience_width))
+            self.customer_labels[i].show(label, x + dx, y + dy)
+        self.customers.hide_from(len(customers))
+        self.customer_labels.hide_from(len(customers))
+
+    def _build_label(self, food, height, patience_width):
+        parts = [(self.text_cache.render(food.value.upper(), 30, WHITE), (-30, -height - 25)),
+                 (solid(RED, (60, 8)), (-30, -height - 10))]
+        if patience_width > 0:
+            parts.append((solid(GREEN, (patience_width, 8)), (-30, -height - 10)))
+        return compose(parts)
+
+    def sync_giant(self, sim):
+        """巨人顾客：倒计时秒数或剩余次数变化时才重新合成图片"""
+        giant = sim.giant_customer
+        if giant is None:
+            self.giant.hide_from(0)
+            self._giant_key = None
+            return
+        width = giant.width
+        height = giant.height
+        key = (giant.color, width, height, giant.timer // 60, giant.desired_food, max(0, 10 - giant.hits))
+        if key != self._giant_key:
+            self._giant_key = key
+            color, _, _, seconds, food, left = key
+            render = self.text_cache.render
+            self._giant_image = compose([
+                (solid(color, (width, height)), (-width // 2, -height)),
+                (outline(YELLOW, (width, height), 5), (-width // 2, -height)),
+                (render(f"{seconds}s", 48, WHITE), (-20, -height - 50)),
+                (render("GIANT BONUS!", 36, YELLOW), (-80, -height - 90)),
+                (render(food.value.upper(), 42, WHITE), (-50, -height // 2 - 10)),
+                (render(f"Left: {left}", 36, WHITE), (-40, 10)),
+            ])
+        image, (dx, dy) = self._giant_image
+        self.giant[0].show(image, giant.x + dx, giant.y + dy)
+
+    def sync_effects(self, sim, alpha):
+        """钞票和生气表情用预渲染帧，文字特效画在它们上面"""
+        effects = sim.effects
+        n = len(effects)
+        xs, ys = effects.lerp_positions(alpha)
+        xs = xs.astype(np.int64)
+        ys = ys.astype(np.int64)
+        kind = effects.kind[:n]
+        images, frame_xs, frame_ys = self.effect_atlas.place(kind, effects.life[:n], effects.rotation[:n], xs, ys)
+        items = list(zip(images, frame_xs, frame_ys))
+
+        get = self.images.get
+        texts = np.flatnonzero((kind == particles.TEXT) | (kind == particles.ANGRY_TEXT))
+        for kind, x, y, text in zip(kind[texts].tolist(), xs[texts].tolist(), ys[texts].tolist(),
+                                    effects.text[texts].tolist()):
+            if kind == particles.TEXT:
+                image, (dx, dy) = get(("text", text), lambda: self._build_text(text, 32, YELLOW, -60, 2))
+            else:
+                image, (dx, dy) = get(("angry_text", text), lambda: self._build_text(text, 36, RED, -50, 2))
+            items.append((image, x + dx, y + dy))
+        self.effects.sync(items)
+
+    def _build_text(self, text, size, color, dx, shadow):
+        """带阴影的文字"""
+        return compose([(self.text_cache.render(text, size, BLACK), (dx + shadow, shadow)),
+                        (self.text_cache.render(text, size, color), (dx, 0))])
+
+    def sync_trajectory(self, trajectory):
+        """轨迹预览：同一条缓存轨迹只合成一次"""
+        if trajectory is None or not trajectory.dots:
+            self.trajectory.hide_from(0)
+            self._trajectory_key = None
+            return
+        if trajectory is not self._trajectory_key:
+            self._trajectory_key = trajectory
+            dot = self.trajectory_dot
+            self._trajectory_image = compose([(dot, (x - 2, y - 2)) for x, y in trajectory.dots])
+        image, (x, y) = self._trajectory_image
+        self.trajectory[0].show(image, x, y)
+
+    def sync_hud(self, hud):
+        """HUD图层的每个有内容的区域一个精灵；图层重绘后这些区域才变脏"""
+        if hud.renders == self._hud_renders:
+            return
+        self._hud_renders = hud.renders
+        for i, region in enumerate(hud.regions):
+            sprite = self.hud[i]
+            sprite.show(hud.surface, region.x, region.y, region.copy())
+            sprite.dirty = 1  # 图层内容变了，位置相同也要重画
+        self.hud.hide_from(len(hud.regions))
+
+    def draw(self, screen):
+        """恢复并重画本帧的脏区域；变化的精灵太多时这一帧整屏重画"""
+        self.fell_back = False
+        if not self._full_redraw:
+            dirty = sum(1 for sprite in self.group.sprites() if sprite.dirty)
+            if dirty > MAX_DIRTY_SPRITES:
+                # 逐个求脏区域是精灵数的平方级，整屏重画反而更快：
+                # 直接让精灵组走它自己的整屏路径（_use_update 是 LayeredDirty 构造参数，组按绘制耗时自己也会切换）
+                self.group._use_update = False
+                self._full_redraw = self.fell_back = True
+                self.fallback_frames += 1
+        if self._full_redraw:
+            self.group.repaint_rect(self.screen_rect)
+        self._rects = self.group.draw(screen, self.background)
+
+    def present(self):
+        """只推送本帧重画过的区域"""
+        if self._full_redraw:
+            pygame.display.flip()
+            self.pixels_pushed = SCREEN_WIDTH * SCREEN_HEIGHT
+            self.rects_pushed = 1
+            self._full_redraw = False
+        else:
+            rects = [rect.clip(self.screen_rect) for rect in self._rects]
+            rects = [rect for rect in rects if rect.width and rect.height]
+            pygame.display.update(rects)
+            self.pixels_pushed = sum(rect.width * rect.height for rect in rects)
+            self.rects_pushed = len(rects)
+
+    def bandwidth_ratio(self):
+        """本帧推送像素占整屏像素的比例"""
+        return self.pixels_pushed / float(self.screen_rect.width * self.screen_rect.height)
@@ -0,0 +1,40 @@
+import time
+
+
+class StartupTimer:
+    """记录启动过程中每一步的耗时，直到第一帧显示"""
+
+    def __init__(self, start=None):
+        self.start = start if start is not None else time.perf_counter()
+        self._last = self.start
+        self.steps = []  # (步骤名, 耗时秒)
+        self.notes = []  # 附加说明（例如资源缓存命中情况）
+        self.finished = False
+
+    def mark(self, name):
+        """结束当前步骤并命名"""
+        if self.finished:
+            return
+        now = time.perf_counter()
+        self.steps.append((name, now - self._last))
+        self._last = now
+
+    def note(self, text):
+        self.notes.append(text)
+
+    def finish(self, name="first frame"):
+        if not self.finished:
+            self.mark(name)
+            self.finished = True
+
+    def total(self):
+        return self._last - self.start
+
+    def report(self):
+        lines = ["Startup time:"]
+        for name, seconds in self.steps:
+            lines.append(f"  {name:<24}{seconds * 1000:8.1f} ms")
+        lines.append(f"  {'total':<24}{self.total() * 1000:8.1f} ms")
+        for text in self.notes:
+            lines.append(f"  ({text})")
+        return "\n".join(lines)
@@ -0,0 +1,63 @@
+import pygame
+from collections import OrderedDict
+
+
+class FontRegistry:
+    """按字号共享的字体注册表（同一字号只创建一次Font对象）"""
+
+    def __init__(self, font_name=None):
+        self.font_name = font_name
+        self._fonts = {}
+
+    def __len__(self):
+        return len(self._fonts)
+
+    def get(self, size):
+        font = self._fonts.get(size)
+        if font is None:
+            font = pygame.font.Font(self.font_name, size)
+            self._fonts[size] = font
+        return font
+
+
+class TextCache:
+    """渲染后文字表面的LRU缓存，键为 (text, size, color)"""
+
+    def __init__(self, fonts=None, max_entries=256):
+        self.fonts = fonts if fonts is not None else FontRegistry()
+        self.max_entries = max_entries
+        self._surfaces = OrderedDict()
+        # 统计计数
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def render(self, text, size, color):
+        """返回渲染好的文字表面（命中缓存时不再光栅化）"""
+        key = (text, size, color)
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self._surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = self.fonts.get(size).render(text, True, color)
+        self._surfaces[key] = surface
+        # 超出上限时淘汰最久未使用的表面
+        while len(self._surfaces) > self.max_entries:
+            self._surfaces.popitem(last=False)
+            self.evictions += 1
+        return surface
+
+    def clear(self):
+        self._surfaces.clear()
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._surfaces),
+            "fonts": len(self.fonts),
+        }
@@ -0,0 +1,124 @@
+import math
+from collections import OrderedDict
+import numpy as np
+from projectiles import GRAVITY
+from settings import SCREEN_WIDTH, SCREEN_HEIGHT, THROW_SPEED, FOOD_CODES
+
+MAX_TICKS = 240  # 预测的最长飞行时间（tick）
+ANGLE_STEP = math.radians(0.2)  # 瞄准方向的量化精度
+
+
+class Trajectory:
+    """一条缓存的投掷轨迹：逐tick位置（与投掷池的积分方式完全一致）"""
+
+    __slots__ = ("xs", "ys", "dots")
+
+    def __init__(self, xs, ys, dots):
+        self.xs = xs  # 每个tick积分后的位置（出界前）
+        self.ys = ys
+        self.dots = dots  # 预览点的整数坐标 [(x, y), ...]
+
+
+class TrajectoryPreview:
+    """投掷轨迹预览服务：按 (食物框, 量化后的瞄准方向) 缓存整条轨迹"""
+
+    def __init__(self, dot_every=2, max_dots=20, max_entries=512):
+        self.dot_every = dot_every  # 每隔几个tick画一个点
+        self.max_dots = max_dots
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def quantize(self, sim, aim):
+        """把瞄准点量化为方向角档位；瞄准点与出手点重合时返回None"""
+        start_x, start_y = sim.launch_point()
+        dx = aim[0] - start_x
+        dy = aim[1] - start_y
+        if dx == 0 and dy == 0:
+            return None
+        return round(math.atan2(dy, dx) / ANGLE_STEP)
+
+    def get(self, sim, aim):
+        """返回当前食物框朝 aim 投掷的轨迹（命中缓存时不重新计算）"""
+        angle_bin = self.quantize(sim, aim)
+        if angle_bin is None:
+            return None
+        key = (sim.current_food_box, angle_bin)
+        trajectory = self._cache.get(key)
+        if trajectory is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return trajectory
+
+        self.misses += 1
+        trajectory = self._compute(sim.launch_point(), angle_bin * ANGLE_STEP)
+        self._cache[key] = trajectory
+        if len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+        return trajectory
+
+    def _compute(self, start, angle):
+        """一次批量算出所有tick的位置：x_k = x0 + vx*k，y_k = y0 + vy*k + g*k(k-1)/2"""
+        start_x, start_y = start
+        vx = math.cos(angle) * THROW_SPEED
+        vy = math.sin(angle) * THROW_SPEED
+        k = np.arange(1, MAX_TICKS + 1, dtype=np.float64)
+        xs = start_x + vx * k
+        ys = start_y + vy * k + GRAVITY * k * (k - 1) / 2
+        # 与投掷池相同的出界规则：落地或左右出界即消失
+        out = (ys > SCREEN_HEIGHT) | (xs > SCREEN_WIDTH) | (xs < 0)
+        if out.any():
+            end = int(np.argmax(out))
+            xs = xs[:end]
+            ys = ys[:end]
+
+        # 预览点：出手点 + 每 dot_every 个tick一个点，只显示屏幕内的部分
+        dot_xs = np.concatenate(([start_x], xs[self.dot_every - 1::self.dot_every]))[:self.max_dots]
+        dot_ys = np.concatenate(([start_y], ys[self.dot_every - 1::self.dot_every]))[:self.max_dots]
+        visible = dot_ys >= 0
+        dots = list(zip(dot_xs[visible].astype(int).tolist(), dot_ys[visible].astype(int).tolist()))
+        return Trajectory(xs, ys, dots)
+
+    def predict_hit(self, sim, aim):
+        """预测这次投掷首先会被哪个目标接住
+
+        返回 ("customer", 位置下标, tick) / ("giant", None, tick) / None。
+        与模拟规则一致：普通顾客只接想要的食物，巨人会拦下任何食物。
+        """
+        trajectory = self.get(sim, aim)
+        if trajectory is None or len(trajectory.xs) == 0:
+            return None
+        food = FOOD_CODES[sim.food_boxes[sim.current_food_box]["type"]]
+        xs = trajectory.xs
+        ys = trajectory.ys
+
+        best = None
+        for i, customer in enumerate(sim.customers):
+            if customer is None or FOOD_CODES[customer.desired_food] != food:
+                continue
+            tick = _first_inside(xs, ys, customer.x, customer.y - customer.height // 2,
+                                 customer.width//2 + 40, customer.height//2 + 40)
+            # 同一tick内先检测下标小的顾客
+            if tick is not None and (best is None or tick < best[2]):
+                best = ("customer", i, tick)
+
+        giant = sim.giant_customer
+        if giant is not None:
+            tick = _first_inside(xs, ys, giant.x, giant.y - giant.height // 2,
+                                 giant.width//2 + 50, giant.height//2 + 50)
+            # 巨人在顾客之后检测，同一tick时顾客优先
+            if tick is not None and (best is None or tick < best[2]):
+                best = ("giant", None, tick)
+        return best
+
+    def clear(self):
+        self._cache.clear()
+
+
+def _first_inside(xs, ys, center_x, center_y, half_width, half_height):
+    """轨迹第一次进入矩形范围的tick（从1开始计），没有则返回None"""
+    inside = (np.abs(xs - center_x) < half_width) & (np.abs(ys - center_y) < half_height)
+    if not inside.any():
+        return None
+    return int(np.argmax(inside)) + 1
@@ -0,0 +1,370 @@
+import numpy as np
+from projectiles import GRAVITY
+from simulation import Simulation
+from settings import (SCREEN_WIDTH, SCREEN_HEIGHT, THROW_SPEED, WHITE, GRAY, GREEN, BLUE, ORANGE,
+                      FOOD_TYPES, FOOD_CODES)
+
+# 对局结束原因
+ENDING_NONE = 0
+ENDING_BANKRUPT = 1
+ENDING_BAD_REVIEWS = 2
+
+# 与 Simulation 相同的可调参数（从一个模板 Simulation 复制，保证两边规则一致）
+TUNABLES = ("base_customer_spawn_delay", "base_customer_patience", "customers_per_level",
+            "spawn_delay_step", "patience_step", "throw_cost", "giant_trigger")
+
+
+def make_actions(n):
+    """N局的空动作：不移动、不切换食物框、不投掷"""
+    return {
+        "move": np.zeros(n, dtype=np.int8),  # -1 = 左，1 = 右，0 = 不动
+        "lane": np.full(n, -1, dtype=np.int8),  # 直接选择的食物框（-1表示不指定）
+        "throw": np.zeros(n, dtype=bool),  # 本tick是否投掷（每局每tick最多一次）
+        "aim": np.zeros((n, 2), dtype=np.float64),  # 投掷瞄准点 (x, y)
+    }
+
+
+class VecEnv:
+    """N局游戏以NumPy数组同步推进的批量环境，规则与 Simulation.step 相同
+
+    与 Simulation 的区别：
+    - 只模拟影响规则的状态，不生成钞票/文字等纯视觉特效；
+    - 所有对局共用一个随机数生成器，所以和同种子的 Simulation 不会逐局一致；
+    - 每局每tick最多投掷一次；已结束的对局保持不动，直到调用 reset。
+    """
+
+    def __init__(self, n, seed=None, max_foods=64, **overrides):
+        self.n = n
+        self.max_foods = max_foods
+        self.rng = np.random.default_rng(seed)
+
+        template = Simulation(seed=0)
+        for name in TUNABLES:
+            setattr(self, name, overrides.pop(name, getattr(template, name)))
+        if overrides:
+            raise TypeError(f"unknown VecEnv parameters: {', '.join(sorted(overrides))}")
+
+        # 布局（所有对局相同）
+        self.box_x = np.array([box["x"] for box in template.food_boxes], dtype=np.float64)
+        self.box_y = template.food_boxes[0]["y"]
+        self.box_colors = [box["color"] for box in template.food_boxes]
+        self.box_food = np.array([FOOD_CODES[box["type"]] for box in template.food_boxes], dtype=np.int8)
+        self.food_colors = [None] * len(FOOD_TYPES)  # 食物编号 -> 颜色
+        for box in template.food_boxes:
+            self.food_colors[FOOD_CODES[box["type"]]] = box["color"]
+        self.launch_y = template.player_y - 20
+        self.player_y = template.player_y
+        self.counter_y = template.counter_y
+        self.counter_width = template.counter_width
+        self.slot_x = np.array([p["x"] for p in template.customer_positions], dtype=np.float64)
+        self.slot_y = np.array([p["y"] for p in template.customer_positions], dtype=np.float64)
+        self.customer_width = 45
+        self.customer_height = 75
+        self.giant_x = 1000
+        self.giant_y = SCREEN_HEIGHT - 100
+        self.giant_width = 120
+        self.giant_height = 200
+
+        self._allocate()
+        self.reset()
+
+    def _allocate(self):
+        n, k, p = self.n, len(self.slot_x), self.max_foods
+        self.running = np.zeros(n, dtype=bool)
+        self.ending = np.zeros(n, dtype=np.int8)
+        self.tick_count = np.zeros(n, dtype=np.int64)
+        self.current_food_box = np.zeros(n, dtype=np.int8)
+        self.key_delay = np.zeros(n, dtype=np.int32)
+        self.score = np.zeros(n, dtype=np.int64)
+        self.money = np.zeros(n, dtype=np.int64)
+        self.combo = np.zeros(n, dtype=np.int32)
+        self.max_combo = np.zeros(n, dtype=np.int32)
+        self.combo_timer = np.zeros(n, dtype=np.int32)
+        self.difficulty_level = np.zeros(n, dtype=np.int32)
+        self.rating = np.zeros(n, dtype=np.float64)
+        self.success_count = np.zeros(n, dtype=np.int32)
+        self.fail_count = np.zeros(n, dtype=np.int32)
+        self.customers_served = np.zeros(n, dtype=np.int32)
+        self.customer_spawn_timer = np.zeros(n, dtype=np.int32)
+        # 顾客位置（N局 x K个位置）
+        self.customer_present = np.zeros((n, k), dtype=bool)
+        self.customer_food = np.zeros((n, k), dtype=np.int8)
+        self.customer_patience = np.zeros((n, k), dtype=np.int32)
+        # 巨人顾客
+        self.giant_present = np.zeros(n, dtype=bool)
+        self.giant_food = np.zeros(n, dtype=np.int8)
+        self.giant_timer = np.zeros(n, dtype=np.int32)
+        self.giant_hits = np.zeros(n, dtype=np.int32)
+        # 投掷的食物（N局 x 每局P个槽位）
+        self.food_x = np.zeros((n, p), dtype=np.float64)
+        self.food_y = np.zeros((n, p), dtype=np.float64)
+        self.food_dx = np.zeros((n, p), dtype=np.float64)
+        self.food_dy = np.zeros((n, p), dtype=np.float64)
+        self.food_type = np.zeros((n, p), dtype=np.int8)
+        self.food_alive = np.zeros((n, p), dtype=bool)
+        self.food_seq = np.zeros((n, p), dtype=np.int64)
+        self.next_seq = np.zeros(n, dtype=np.int64)
+
+    def reset(self, indices=None):
+        """把指定对局（默认全部）重置为开局状态"""
+        if indices is None:
+            indices = np.arange(self.n)
+        self.running[indices] = True
+        self.ending[indices] = ENDING_NONE
+        self.tick_count[indices] = 0
+        self.current_food_box[indices] = 0
+        self.key_delay[indices] = 0
+        self.score[indices] = 0
+        self.money[indices] = 10
+        self.combo[indices] = 0
+        self.max_combo[indices] = 0
+        self.combo_timer[indices] = 0
+        self.difficulty_level[indices] = 1
+        self.rating[indices] = 5.0
+        self.success_count[indices] = 0
+        self.fail_count[indices] = 0
+        self.customers_served[indices] = 0
+        self.customer_spawn_timer[indices] = 0
+        self.customer_present[indices] = False
+        self.giant_present[indices] = False
+        self.giant_hits[indices] = 0
+        self.food_alive[indices] = False
+        self.next_seq[indices] = 0
+
+    def step(self, actions):
+        """所有未结束的对局推进一tick；返回 (本tick得分变化, 本tick刚结束的对局)"""
+        active = self.running.copy()
+        score_before = self.score.copy()
+
+        lane = actions.get("lane")
+        if lane is not None:
+            chosen = active & (lane >= 0)
+            self.current_food_box[chosen] = np.minimum(lane[chosen], len(self.box_x) - 1)
+        throw = actions.get("throw")
+        if throw is not None:
+            self._throw(active & throw, actions["aim"])
+        move = actions.get("move")
+        self._update(active, np.zeros(self.n, dtype=np.int8) if move is None else move)
+        self.tick_count[active] += 1
+        return self.score - score_before, active & ~self.running
+
+    def _throw(self, games, aim):
+        start_x = self.box_x[self.current_food_box]
+        dx = aim[:, 0] - start_x
+        dy = aim[:, 1] - self.launch_y
+        distance = np.sqrt(dx * dx + dy * dy)
+        free = ~self.food_alive
+        # 瞄准点与出手点重合或食物池已满时本次投掷无效
+        games = np.flatnonzero(games & (distance > 0) & free.any(axis=1))
+        if games.size == 0:
+            return
+        slots = np.argmax(free[games], axis=1)
+        self.food_x[games, slots] = start_x[games]
+        self.food_y[games, slots] = self.launch_y
+        # 与 Simulation.throw_food 相同的运算顺序：先归一化再乘速度
+        self.food_dx[games, slots] = dx[games] / distance[games] * THROW_SPEED
+        self.food_dy[games, slots] = dy[games] / distance[games] * THROW_SPEED
+        self.food_type[games, slots] = self.box_food[self.current_food_box[games]]
+        self.food_alive[games, slots] = True
+        self.food_seq[games, slots] = self.next_seq[games]
+        self.next_seq[games] += 1
+        self.money[games] -= self.throw_cost
+
+    def _update(self, active, move):
+        # 破产判定
+        bankrupt = active & (self.money < 0) & self.running
+        self.running[bankrupt] = False
+        self.ending[bankrupt] = ENDING_BANKRUPT
+
+        # 切换食物框（按住方向键时每15tick移动一格）
+        ready = active & (self.key_delay <= 0)
+        left = ready & (move < 0)
+        right = ready & (move > 0)
+        self.current_food_box[left] = np.maximum(0, self.current_food_box[left] - 1)
+        self.current_food_box[right] = np.minimum(len(self.box_x) - 1, self.current_food_box[right] + 1)
+        self.key_delay[left | right] = 15
+        self.key_delay[active & ~ready] -= 1
+
+        # 投掷的食物：积分重力，剔除落地或出界的食物
+        moving = self.food_alive & active[:, None]
+        self.food_x[moving] += self.food_dx[moving]
+        self.food_y[moving] += self.food_dy[moving]
+        self.food_dy[moving] += GRAVITY
+        out = moving & ((self.food_y > SCREEN_HEIGHT) | (self.food_x > SCREEN_WIDTH) | (self.food_x < 0))
+        self.food_alive[out] = False
+
+        self._spawn_customers(active)
+        self._update_customers(active)
+        self._update_giant(active)
+
+        # 服务够数量后出现巨人顾客
+        giant = active & ~self.giant_present & (self.customers_served >= self.giant_trigger)
+        if giant.any():
+            self.giant_present[giant] = True
+            self.giant_timer[giant] = 600
+            self.giant_hits[giant] = 0
+            self.giant_food[giant] = self.rng.integers(len(FOOD_TYPES), size=int(giant.sum()))
+            self.customers_served[giant] = 0
+
+        # 连击计时器
+        counting = active & (self.combo_timer > 0)
+        self.combo_timer[counting] -= 1
+        self.combo[counting & (self.combo_timer <= 0)] = 0
+
+        # 难度递增
+        level = self.customers_served // self.customers_per_level + 1
+        self.difficulty_level[active] = np.maximum(self.difficulty_level[active], level[active])
+
+        # 差评过多关店
+        closed = active & (self.rating <= 0) & self.running
+        self.running[closed] = False
+        self.ending[closed] = ENDING_BAD_REVIEWS
+
+    def _spawn_customers(self, active):
+        waiting = active & ~self.giant_present
+        due = waiting & (self.customer_spawn_timer <= 0)
+        self.customer_spawn_timer[waiting & ~due] -= 1
+        empty = ~self.customer_present
+        games = np.flatnonzero(due & empty.any(axis=1))
+        if games.size == 0:
+            return
+        # 在随机一个空位上生成顾客：给每个空位一个随机键，取最大者
+        keys = np.where(empty[games], self.rng.random((games.size, empty.shape[1])), -1.0)
+        slots = np.argmax(keys, axis=1)
+        level = self.difficulty_level[games] - 1
+        delay = np.maximum(60, self.base_customer_spawn_delay - level * self.spawn_delay_step)
+        patience = np.maximum(120, self.base_customer_patience - level * self.patience_step)
+        self.customer_present[games, slots] = True
+        self.customer_food[games, slots] = self.rng.integers(len(FOOD_TYPES), size=games.size)
+        self.customer_patience[games, slots] = patience
+        self.customer_spawn_timer[games] = delay
+
+    def _first_hit(self, games, center_x, center_y, half_width, half_height, food=None):
+        """每局在矩形范围内最早投出的食物槽位；没有命中的局为-1"""
+        inside = (self.food_alive[games]
+                  & (np.abs(self.food_x[games] - center_x) < half_width)
+                  & (np.abs(self.food_y[games] - center_y) < half_height))
+        if food is not None:
+            inside &= self.food_type[games] == food[:, None]
+        seq = np.where(inside, self.food_seq[games], np.iinfo(np.int64).max)
+        return np.where(inside.any(axis=1), np.argmin(seq, axis=1), -1)
+
+    def _update_customers(self, active):
+        half_width = self.customer_width // 2 + 40
+        half_height = self.customer_height // 2 + 40
+        # 按位置顺序处理，与 Simulation 一致（同一tick内的连击增减有先后）
+        for k in range(len(self.slot_x)):
+            games = np.flatnonzero(active & self.customer_present[:, k])
+            if games.size == 0:
+                continue
+            self.customer_patience[games, k] -= 1
+
+            center_y = self.slot_y[k] - self.customer_height // 2
+            slots = self._first_hit(games, self.slot_x[k], center_y, half_width, half_height,
+                                    self.customer_food[games, k])
+            hit = slots >= 0
+            served = games[hit]
+            if served.size:
+                self.food_alive[served, slots[hit]] = False
+                self.combo[served] += 1
+                self.combo_timer[served] = 180
+                self.max_combo[served] = np.maximum(self.max_combo[served], self.combo[served])
+                self.score[served] += 10 * np.minimum(self.combo[served], 10)
+                self.money[served] += 5
+                self.customers_served[served] += 1
+                self.success_count[served] += 1
+                star = served[self.success_count[served] >= 3]
+                self.rating[star] = np.minimum(5.0, self.rating[star] + 0.5)
+                self.success_count[star] = 0
+                self.customer_present[served, k] = False
+
+            # 失去耐心（与 Simulation 相同：刚被服务的顾客耐心耗尽时同样计一次失败）
+            angry = games[self.customer_patience[games, k] <= 0]
+            if angry.size:
+                self.combo[angry] = 0
+                self.combo_timer[angry] = 0
+                self.score[angry] -= 5
+                self.fail_count[angry] += 1
+                self.rating[angry] = np.maximum(0.0, self.rating[angry] - 0.5)
+                self.success_count[angry] = 0
+                self.customer_present[angry, k] = False
+
+    def _update_giant(self, active):
+        games = np.flatnonzero(active & self.giant_present)
+        if games.size == 0:
+            return
+        self.giant_timer[games] -= 1
+        slots = self._first_hit(games, self.giant_x, self.giant_y - self.giant_height // 2,
+                                self.giant_width // 2 + 50, self.giant_height // 2 + 50)
+        hit = slots >= 0
+        eaten = games[hit]
+        good = eaten[self.food_type[eaten, slots[hit]] == self.giant_food[eaten]]
+        self.food_alive[eaten, slots[hit]] = False  # 任何食物都会被巨人拦下
+        self.score[good] += 20
+        self.money[good] += 5
+        self.giant_hits[good] += 1
+
+        full = games[self.giant_hits[games] >= 10]
+        self.money[full] += 50
+        self.giant_present[full] = False
+        timeout = games[(self.giant_hits[games] < 10) & (self.giant_timer[games] <= 0)]
+        self.giant_present[timeout] = False
+
+    def render(self, indices, scale=0.25):
+        """把指定对局画成RGB观测：返回 uint8 数组 (len(indices), H, W, 3)
+
+        只画影响决策的元素（柜台、食物框、当前选择、顾客及其想要的食物、巨人、飞行中的食物），
+        不依赖pygame。
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        height = int(SCREEN_HEIGHT * scale)
+        width = int(SCREEN_WIDTH * scale)
+        obs = np.empty((indices.size, height, width, 3), dtype=np.uint8)
+        obs[:] = WHITE
+
+        def rect(rows, x, y, w, h, color):
+            x0 = max(0, int(x * scale))
+            y0 = max(0, int(y * scale))
+            x1 = min(width, max(x0 + 1, int((x + w) * scale)))
+            y1 = min(height, max(y0 + 1, int((y + h) * scale)))
+            obs[rows, y0:y1, x0:x1] = color
+
+        everyone = slice(None)
+        rect(everyone, 0, self.counter_y, self.counter_width, SCREEN_HEIGHT - self.counter_y, GRAY)
+        for x, color in zip(self.box_x.tolist(), self.box_colors):
+            rect(everyone, x - 30, self.box_y, 60, 40, color)
+        # 当前选择的食物框（员工站的位置）
+        for box, x in enumerate(self.box_x.tolist()):
+            rows = np.flatnonzero(self.current_food_box[indices] == box)
+            rect(rows, x - 25, self.player_y - 50, 50, 50, GREEN)
+
+        half_w = self.customer_width // 2
+        for k, (x, y) in enumerate(zip(self.slot_x.tolist(), self.slot_y.tolist())):
+            present = self.customer_present[indices, k]
+            rect(np.flatnonzero(present), x - half_w, y - self.customer_height, self.customer_width,
+                 self.customer_height, BLUE)
+            for food, color in enumerate(self.food_colors):
+                rows = np.flatnonzero(present & (self.customer_food[indices, k] == food))
+                rect(rows, x - 12, y - self.customer_height - 30, 24, 24, color)
+
+        giant = self.giant_present[indices]
+        rect(np.flatnonzero(giant), self.giant_x - self.giant_width // 2, self.giant_y - self.giant_height,
+             self.giant_width, self.giant_height, ORANGE)
+        for food, color in enumerate(self.food_colors):
+            rows = np.flatnonzero(giant & (self.giant_food[indices] == food))
+            rect(rows, self.giant_x - 20, self.giant_y - self.giant_height - 45, 40, 40, color)
+
+        # 飞行中的食物：每个画成一个小方块（屏幕上方的不画）
+        rows, slots = np.nonzero(self.food_alive[indices])
+        size = max(1, int(20 * scale))
+        px = (self.food_x[indices[rows], slots] * scale).astype(np.int64) - size // 2
+        py = (self.food_y[indices[rows], slots] * scale).astype(np.int64) - size // 2
+        visible = py + size > 0
+        rows, slots, px, py = rows[visible], slots[visible], px[visible], py[visible]
+        if rows.size:
+            offsets = np.arange(size)
+            xs = np.clip(px[:, None, None] + offsets[None, None, :], 0, width - 1)
+            ys = np.clip(py[:, None, None] + offsets[None, :, None], 0, height - 1)
+            colors = np.array(self.food_colors, dtype=np.uint8)[self.food_type[indices[rows], slots]]
+            obs[rows[:, None, None], ys, xs] = colors[:, None, None, :]
+        return obs
@@ -0,0 +1,114 @@
+import sys
+import time
+import asyncio
+import argparse
+import threading
+import pygame
+from settings import SCREEN_WIDTH, SCREEN_HEIGHT, FPS, RENDER_FPS, THROWN_FOOD_SIZE, WHITE, GRAY, RED, FoodType
+from assets import AssetCache
+from text_cache import TextCache
+from hud import HudLayer
+from sprites import SpriteRenderer, EffectAtlas
+from spectator import watch, DEFAULT_PORT
+
+
+class Viewer:
+    """观战客户端：后台线程接收并重建数据流，主线程用精灵组渲染最新的局面"""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        pygame.display.init()
+        pygame.font.init()
+        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+        pygame.display.set_caption(f"FOOD FLINGER - spectating {host}:{port}")
+        self.clock = pygame.time.Clock()
+        self.text_cache = TextCache()
+        self.hud = HudLayer(self.text_cache)
+
+        assets = AssetCache()
+        food_size = (THROWN_FOOD_SIZE, THROWN_FOOD_SIZE)
+        food_images = {
+            FoodType.BURGER: assets.load_scaled("Image/Burger.jpg", food_size),
+            FoodType.FRIES: assets.load_scaled("Image/Fries.jpg", food_size),
+            FoodType.COLA: assets.load_scaled("Image/Cola.jpg", food_size),
+        }
+        staff_image = assets.load_scaled("Image/Staff.jpg", (150, 150))
+        background = assets.load_scaled("Image/Background.png", (SCREEN_WIDTH, SCREEN_HEIGHT))
+        dot = pygame.Surface((5, 5), pygame.SRCALPHA)  # 观众端不显示轨迹预览
+        self.sprites = SpriteRenderer(background, self.text_cache, staff_image, food_images, dot,
+                                      EffectAtlas(self.text_cache), enabled=True)
+
+        self.state = None  # 最新重建的局面（后台线程替换引用）
+        self.received = 0  # 收到的字节数
+        self.error = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._receive, name="viewer", daemon=True)
+
+    def _receive(self):
+        def on_state(state, size):
+            self.state = state
+            self.received += size
+
+        try:
+            asyncio.run(watch(self.host, self.port, on_state, self._stop))
+        except OSError as e:
+            self.error = e
+
+    def run(self):
+        self._thread.start()
+        running = True
+        last_received = 0
+        rate = 0.0
+        next_rate = time.perf_counter() + 1.0
+        while running:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                    running = False
+            if not self._thread.is_alive() and self.state is None:
+                print(f"cannot watch {self.host}:{self.port}: {self.error or 'connection closed'}")
+                break
+
+            # 每秒更新一次带宽显示
+            now = time.perf_counter()
+            if now >= next_rate:
+                rate = (self.received - last_received) / 1024
+                last_received = self.received
+                next_rate = now + 1.0
+            state = self.state
+            if state is None:
+                self.screen.fill((0, 0, 0))
+                text = self.text_cache.render(f"Waiting for {self.host}:{self.port} ...", 36, GRAY)
+                self.screen.blit(text, (SCREEN_WIDTH // 2 - text.get_width() // 2, SCREEN_HEIGHT // 2))
+                pygame.display.flip()
+                self.sprites.invalidate()
+            else:
+                # 在收到的两个tick之间插值
+                alpha = min(1.0, (now - state.time) * FPS)
+                self.hud.update(state)
+                # 数字每帧都在变，直接渲染而不放进文字缓存
+                font = self.text_cache.fonts.get(24)
+                overlays = [(font.render(f"SPECTATING  tick {state.tick_count}  {rate:.1f} KiB/s", True, WHITE),
+                             (SCREEN_WIDTH - 420, 35))]
+                if not state.running:
+                    overlays.append((self.text_cache.render("GAME OVER", 64, RED),
+                                     (SCREEN_WIDTH // 2 - 130, SCREEN_HEIGHT // 2 - 100)))
+                self.sprites.sync(state, alpha, None, self.hud, overlays)
+                self.sprites.draw(self.screen)
+                self.sprites.present()
+            self.clock.tick(RENDER_FPS)
+        self._stop.set()
+        pygame.quit()
+        return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Watch a Food Flinger game streamed with --spectate")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args(argv)
+    return Viewer(args.host, args.port).run()
+
+
+if __name__ == "__main__":
+    sys.exit(main())